@@ -1,23 +1,77 @@
 from pybricks.hubs import PrimeHub
 from pybricks.pupdevices import Motor
-from pybricks.parameters import Port, Direction
+from pybricks.parameters import Port, Direction, Axis
 from pybricks.tools import StopWatch, wait
+from recorder import Recorder
+from model_franare import FRANA_MODEL, FRANA_MV_REF
+from model_motoare import MODELE_MOTOARE
 # Am eliminat import math, deoarece nu este acceptat pe MicroPython
 # import math # -> Eliminat
 
 # CONSTANTE GLOBALE
 PI = 3.141592653589793 # Constanta PI folosită de tine
 
+# Compensare baterie: viteza maximă (grade/s) pe care motoarele o pot
+# menține la o anumită tensiune a bateriei (mV). Între puncte interpolăm.
+# Valorile sunt provizorii, până le măsurăm: rulează
+# help/coach/battery_test.py cu LOG_MODE = True (și LOAD_PORTS = motoarele
+# acestui robot), apoi copiază ce afișează tools/battery_predict.py.
+BAT_MODEL_MV = (7000, 7400, 7800, 8200)
+BAT_MODEL_VITEZA = (800, 870, 940, 1000)
+BAT_INTERVAL_MS = 5000 # Cât de des recitim tensiunea (nu în bucla de control)
+
+# Deriva giroscopului: chiar nemișcat, giroscopul raportează o mică viteză
+# unghiulară (bias), care se adună în unghi și strâmbă mersul drept. O
+# măsurăm la pornire cu robotul nemișcat și o reestimăm în pauzele dintre
+# comenzi, apoi o scădem din unghiul IMU.
+GIRO_PROBA_MS = 10 # Cât de des citim viteza unghiulară
+GIRO_MAX_MS = 3000 # Cât durează cel mult estimarea de la pornire
+GIRO_MIN_PROBE = 30 # Minim de probe înainte să considerăm media stabilă
+GIRO_PRECIZIE = 0.02 # grade/s: ne oprim când media e sigură la atât
+GIRO_PRAG_MISCARE = 3 # grade/s: peste atât robotul se mișcă, nu e derivă
+GIRO_PROBE_PAUZA = 5 # Minim de probe nemișcate într-o pauză ca să conteze
+GIRO_PONDERE_PAUZA = 0.2 # Cât contează o pauză față de estimarea de până acum
+
+# În loc de pauze fixe "ca să fim siguri", așteptăm exact până când IMU-ul
+# e calibrat și robotul nu se mai rotește, dar nu mai mult decât limita.
+# Nu folosim imu.stationary(): Pybricks îl raportează abia după ~1 s de
+# liniște, mai mult decât durează oprirea după o mișcare.
+IMU_PRAG_VITEZA = 2 # grade/s: sub atât considerăm că robotul nu se rotește
+IMU_PROBE_LINISTE = 3 # Atâtea citiri la rând sub prag = robotul stă pe loc
+IMU_PORNIRE_MAX_MS = 5000 # La pornire ready() durează câteva secunde
+IMU_OPRIRE_MAX_MS = 300 # Cât așteptăm cel mult oprirea după o mișcare
+
+# Oprire rapidă: în loc să încetinim până la 50 grade/s, mergem cu viteză
+# mare și frânăm exact cu distanța de frânare înainte de țintă. Distanța
+# vine din model_franare.py, învățată de tools/braking_model.py din
+# liniile "FRANA,..." ale opririlor anterioare.
+SUPRAFATA = "covor" # Pe ce merge robotul, cheia din FRANA_MODEL
+FRANA_IMPLICIT = (0.02, 0.00025, 0.0) # (a, b, c) până există măsurători
+FRANA_ANTICIPARE_MS = 5 # Jumătate de pas de buclă: frânăm puțin mai devreme
+FRANA_VITEZA_MIN = 100 # grade/s: sub atât oprirea nu spune nimic despre frânare
+
+# Înregistrare pentru tools/replay.py: True = salvează toate citirile și
+# comenzile din timpul traseului (linii "REC,..." afișate la final)
+INREGISTRARE = False
+
 class PrecisionRobot:
     """
     O clasă pentru a gestiona mișcarea precisă a robotului bazată pe roți și IMU.
     Utilizează controlere P sau PID simplificate pentru a îmbunătăți precizia.
     """
-    def __init__(self, hub, left_motor_port, right_motor_port, wheel_diameter_mm, axle_track_mm):
+    def __init__(self, hub, left_motor_port, right_motor_port, wheel_diameter_mm, axle_track_mm,
+                 fabrica_motor=None, fabrica_ceas=None, asteapta=None):
+        # Motoarele, cronometrele și pauzele se creează prin aceste funcții,
+        # ca recorder.py și tools/replay.py să le poată înlocui fără să
+        # schimbe Motor, StopWatch și wait în tot modulul
+        fabrica_motor = fabrica_motor or Motor
+        self.ceas_nou = fabrica_ceas or StopWatch
+        self.asteapta = asteapta or wait
+
         # Inițializare hardware
         self.hub = hub
-        self.motor_stanga = Motor(left_motor_port, positive_direction=Direction.COUNTERCLOCKWISE)
-        self.motor_dreapta = Motor(right_motor_port)
+        self.motor_stanga = fabrica_motor(left_motor_port, positive_direction=Direction.COUNTERCLOCKWISE)
+        self.motor_dreapta = fabrica_motor(right_motor_port)
         
         # Resetare unghiuri la pornire
         self.motor_stanga.reset_angle(0)
@@ -26,7 +80,17 @@ class PrecisionRobot:
         # Configurație fizică
         self.wheel_diameter_mm = wheel_diameter_mm
         self.axle_track_mm = axle_track_mm
-        self.timer = StopWatch() # Timer pentru calcularea delta time (dt)
+        self.timer = self.ceas_nou() # Timer pentru calcularea delta time (dt)
+
+        # Modelul motoarelor acestui robot, măsurat cu tools/motor_sysid.py
+        # (None dacă hub-ul nu a fost măsurat încă)
+        self.model_motoare = MODELE_MOTOARE.get(hub.system.info()["name"])
+        # Cu cât rămân motoarele în urma vitezei cerute (s), motorul mai lent decide
+        self.tau_s = 0
+        if self.model_motoare:
+            self.tau_s = max(self.model_motoare["stanga"][0], self.model_motoare["dreapta"][0]) / 1000
+        # Sensul ultimei rotiri a fiecărui motor (1, -1 sau 0 = necunoscut), pentru jocul din angrenaje
+        self.sens_motoare = (0, 0)
 
         # Setări P pentru Mers Drept bazat pe IMU (Corecția de deviație)
         # Kp_imu_straight: Cât de agresiv corectează deviația de la unghiul global
@@ -40,11 +104,24 @@ class PrecisionRobot:
         self.Kp_turn = 1.5
         self.Kd_turn = 1.0
         
-        self.global_angle = self.hub.imu.heading() # Unghiul absolut țintă (mereu actualizat)
+        # Deriva giroscopului (grade/s) și cât s-a adunat din ea în unghi
+        self.bias_giro = 0.0
+        self.corectie_giro = 0.0
+        self.ceas_giro = self.ceas_nou()
+        self.t_giro = 0
+
+        self.global_angle = self.unghi_imu() # Unghiul absolut țintă (mereu actualizat)
         self.tolerance_drive = 10 # Toleranță unghiuri (grade) pentru break loop Drive
         self.tolerance_turn = 1  # Toleranță unghiuri (grade) pentru break loop Turn
         self.steady_time = 150 # Timp în ms cât trebuie să stea robotul în toleranță
 
+        # Viteza maximă pe care bateria o poate susține acum (grade/s)
+        self.timer_baterie = self.ceas_nou()
+        self.viteza_max_baterie = self.viteza_maxima_baterie()
+
+        # Coeficienții distanței de frânare pentru suprafața curentă
+        self.model_franare = FRANA_MODEL.get(SUPRAFATA, FRANA_IMPLICIT)
+
 
     # ======================================
     # Funcții utilitare
@@ -65,6 +142,162 @@ class PrecisionRobot:
         """Returnează media unghiurilor motorului (pentru distanța parcursă)."""
         return (self.motor_stanga.angle() + self.motor_dreapta.angle()) / 2
 
+    def viteza_maxima_baterie(self):
+        """
+        Viteza maximă (grade/s) susținută la tensiunea curentă, din BAT_MODEL
+        și, dacă robotul a fost măsurat, din modelul motoarelor.
+        """
+        mv = self.hub.battery.voltage()
+        self.tensiune_mv = mv # Pentru modelul de frânare
+        viteza = self.viteza_baterie(mv)
+        if self.model_motoare:
+            # Peste viteza maximă a motorului mai slab robotul ar vira
+            for motor in ("stanga", "dreapta"):
+                tau_ms, castig, zona_moarta, joc = self.model_motoare[motor]
+                viteza = min(viteza, castig * (100 - zona_moarta) * mv / self.model_motoare["mv"])
+        return viteza
+
+    def viteza_baterie(self, mv):
+        """Interpolează în BAT_MODEL viteza maximă la tensiunea mv."""
+        if mv <= BAT_MODEL_MV[0]:
+            return BAT_MODEL_VITEZA[0]
+        for i in range(1, len(BAT_MODEL_MV)):
+            if mv <= BAT_MODEL_MV[i]:
+                return BAT_MODEL_VITEZA[i - 1] + (mv - BAT_MODEL_MV[i - 1]) * (
+                    BAT_MODEL_VITEZA[i] - BAT_MODEL_VITEZA[i - 1]) // (
+                    BAT_MODEL_MV[i] - BAT_MODEL_MV[i - 1])
+        return BAT_MODEL_VITEZA[-1]
+
+    def limiteaza_viteza(self, max_speed):
+        """
+        Limitează viteza cerută la cât poate susține bateria, ca bucla de
+        control să nu ceară motoarelor o viteză pe care n-o pot atinge.
+        Tensiunea se recitește cel mult o dată la BAT_INTERVAL_MS.
+        """
+        if self.timer_baterie.time() >= BAT_INTERVAL_MS:
+            self.timer_baterie.reset()
+            self.viteza_max_baterie = self.viteza_maxima_baterie()
+        return min(max_speed, self.viteza_max_baterie)
+
+    def joc_la_schimbare(self, stanga, dreapta):
+        """
+        Primește sensul noii rotiri a fiecărui motor (1 sau -1) și
+        returnează câte grade trebuie adăugate fiecăruia: un motor care își
+        schimbă sensul trece întâi prin jocul din angrenaje, pe care
+        encoderul îl numără dar roata nu se mișcă.
+        """
+        joc_stanga = 0
+        joc_dreapta = 0
+        if self.model_motoare:
+            if self.sens_motoare[0] == -stanga:
+                joc_stanga = self.model_motoare["stanga"][3]
+            if self.sens_motoare[1] == -dreapta:
+                joc_dreapta = self.model_motoare["dreapta"][3]
+        self.sens_motoare = (stanga, dreapta)
+        return joc_stanga, joc_dreapta
+
+    # ======================================
+    # Deriva giroscopului
+    # ======================================
+    def unghi_imu(self):
+        """Unghiul IMU din care am scăzut deriva estimată a giroscopului."""
+        t = self.ceas_giro.time()
+        # heading() crește în sensul acelor de ceas, viteza pe Z invers
+        self.corectie_giro -= self.bias_giro * (t - self.t_giro) / 1000
+        self.t_giro = t
+        return self.hub.imu.heading() - self.corectie_giro
+
+    def masoara_giro(self, durata_max_ms, pana_la_stabilizare):
+        """
+        Citește viteza unghiulară pe Z cât timp robotul stă nemișcat și
+        returnează (media, număr de probe, eroarea standard a mediei la
+        pătrat). Dacă robotul se mișcă, probele de până atunci nu mai
+        contează. Cu pana_la_stabilizare=True ne
+        oprim imediat ce media este sigură la GIRO_PRECIZIE.
+        """
+        ceas = self.ceas_nou()
+        n = 0
+        medie = 0.0
+        m2 = 0.0
+        while ceas.time() < durata_max_ms:
+            v = self.hub.imu.angular_velocity(Axis.Z)
+            if abs(v) > GIRO_PRAG_MISCARE:
+                n = 0
+                medie = 0.0
+                m2 = 0.0
+            else:
+                # Media și varianța actualizate la fiecare probă (Welford)
+                n += 1
+                delta = v - medie
+                medie += delta / n
+                m2 += delta * (v - medie)
+                # Eroarea standard a mediei (la pătrat) este destul de mică
+                if pana_la_stabilizare and n >= GIRO_MIN_PROBE and (
+                        m2 / (n - 1) / n <= GIRO_PRECIZIE * GIRO_PRECIZIE):
+                    break
+            self.asteapta(GIRO_PROBA_MS)
+        eroare2 = m2 / (n - 1) / n if n > 1 else float("inf")
+        return medie, n, eroare2
+
+    def asteapta_imu(self, durata_max_ms):
+        """
+        Așteaptă până când IMU-ul este calibrat (ready) și robotul nu se mai
+        rotește (IMU_PROBE_LINISTE citiri la rând sub IMU_PRAG_VITEZA).
+        Returnează True imediat ce se întâmplă asta, sau False dacă a trecut
+        durata_max_ms.
+        """
+        ceas = self.ceas_nou()
+        liniste = 0
+        while ceas.time() < durata_max_ms:
+            imu = self.hub.imu
+            if imu.ready() and abs(imu.angular_velocity(Axis.Z)) < IMU_PRAG_VITEZA:
+                liniste += 1
+                if liniste >= IMU_PROBE_LINISTE:
+                    return True
+            else:
+                liniste = 0
+            self.asteapta(GIRO_PROBA_MS)
+        print(f"⚠️ IMU nu s-a stabilizat în {durata_max_ms} ms")
+        return False
+
+    def estimeaza_bias_giro(self):
+        """
+        La pornire, cu robotul nemișcat: măsoară deriva giroscopului, apoi
+        pornește unghiul de la 0. Întâi așteaptă ca IMU-ul să fie gata, apoi
+        durează cât e nevoie ca media să se stabilizeze, cel mult GIRO_MAX_MS.
+        """
+        self.asteapta_imu(IMU_PORNIRE_MAX_MS)
+        medie, n, _ = self.masoara_giro(GIRO_MAX_MS, True)
+        if n > 0:
+            self.bias_giro = medie
+        self.hub.imu.reset_heading(0)
+        self.corectie_giro = 0.0
+        self.t_giro = self.ceas_giro.time()
+        self.global_angle = 0
+        self.raporteaza_giro(n)
+
+    def pauza_giro(self, durata_ms):
+        """
+        Pauza dintre comenzi. Robotul stă pe loc, deci ce măsoară acum
+        giroscopul este derivă: o folosim ca să corectăm estimarea. Întâi
+        așteptăm ca robotul să se liniștească (imediat după oprire
+        giroscopul vede încă oscilațiile), apoi corectăm doar dacă media
+        din restul pauzei este la fel de sigură ca cea de la pornire
+        (GIRO_PRECIZIE). O pauză scurtă de obicei nu ajunge și nu schimbă
+        nimic.
+        """
+        ceas = self.ceas_nou()
+        if not self.asteapta_imu(durata_ms):
+            return
+        medie, n, eroare2 = self.masoara_giro(durata_ms - ceas.time(), False)
+        if n >= GIRO_PROBE_PAUZA and eroare2 <= GIRO_PRECIZIE * GIRO_PRECIZIE:
+            self.bias_giro += GIRO_PONDERE_PAUZA * (medie - self.bias_giro)
+            self.raporteaza_giro(n)
+
+    def raporteaza_giro(self, n):
+        # Telemetrie: GIRO,timp ms,derivă mgrade/s,corecție totală grade,probe
+        print(f"GIRO,{self.ceas_giro.time()},{self.bias_giro * 1000:.0f},{self.corectie_giro:.2f},{n}")
+
     # ======================================
     # Mers drept cu P-Control Distanță și P-Control Corecție IMU
     # ======================================
@@ -74,6 +307,10 @@ class PrecisionRobot:
         și P-Controller bazat pe IMU pentru a menține unghiul global.
         """
         target_deg = self.cm_to_degrees(distance_cm)
+        # Distanța e media roților, deci și jocul se adună pe jumătate
+        joc_stanga, joc_dreapta = self.joc_la_schimbare(1, 1)
+        target_deg += (joc_stanga + joc_dreapta) / 2
+        max_speed = self.limiteaza_viteza(max_speed)
         self.motor_stanga.reset_angle(0)
         self.motor_dreapta.reset_angle(0)
         self.timer.reset()
@@ -91,6 +328,10 @@ class PrecisionRobot:
             rot_l = self.motor_stanga.angle()
             rot_r = self.motor_dreapta.angle()
             avg_rot = (rot_l + rot_r) / 2
+            if self.tau_s:
+                # Motoarele ajung la viteza cerută cu întârziere: distanța pe
+                # care o mai parcurg din inerție se scade de acum din eroare
+                avg_rot += (self.motor_stanga.speed() + self.motor_dreapta.speed()) / 2 * self.tau_s
             
             # 2. P-Controller pentru Distanță (Decelerație)
             remaining_error = target_deg - avg_rot
@@ -103,7 +344,7 @@ class PrecisionRobot:
             base_speed = self.clamp(base_speed, 50, max_speed) # Minim 50 pentru a evita blocarea
             
             # 3. P-Controller pentru Corecția Direcției (IMU Straightness)
-            current_heading = self.hub.imu.heading()
+            current_heading = self.unghi_imu()
             
             # Eroare normalizată (-180..180)
             heading_error = (self.global_angle - current_heading + 180) % 360 - 180
@@ -123,12 +364,67 @@ class PrecisionRobot:
             self.motor_stanga.run(v_l)
             self.motor_dreapta.run(v_r)
             
-            wait(10) # Buclează rapid
+            self.asteapta(10) # Buclează rapid
 
         self.motor_stanga.stop()
         self.motor_dreapta.stop()
-        print(f"Mers drept finalizat. Unghi final IMU: {self.hub.imu.heading():.0f}")
-        wait(300)
+        print(f"Mers drept finalizat. Unghi final IMU: {self.unghi_imu():.0f}")
+        self.asteapta_imu(IMU_OPRIRE_MAX_MS)
+
+    # ======================================
+    # Mers drept rapid, cu frânare la distanța învățată
+    # ======================================
+    def distanta_franare(self, viteza):
+        """Câte grade mai merg roțile după frânare de la viteza dată (grade/s)."""
+        a, b, c = self.model_franare
+        return viteza * (a + b * viteza + c * (self.tensiune_mv - FRANA_MV_REF) / 1000)
+
+    def drive_distance_rapid(self, distance_cm, max_speed):
+        """
+        Mers drept (doar înainte) cu viteza maximă până la punctul de
+        frânare, apoi frână. Corecția de direcție pe IMU e la fel ca la
+        drive_distance_precise. La final afișează o linie de telemetrie:
+        FRANA,viteza la frânare,tensiune mV,suprafață,grade după frânare,
+        grade față de țintă
+        Linia apare doar dacă robotul a prins cel puțin FRANA_VITEZA_MIN.
+        O distanță <= 0 nu e mers înainte, așa că e refuzată.
+        """
+        if distance_cm <= 0:
+            print(f"Mersul rapid merge doar înainte, ignor {distance_cm:.1f} cm")
+            return
+        target_deg = self.cm_to_degrees(distance_cm)
+        # Distanța e media roților, deci și jocul se adună pe jumătate
+        joc_stanga, joc_dreapta = self.joc_la_schimbare(1, 1)
+        target_deg += (joc_stanga + joc_dreapta) / 2
+        max_speed = self.limiteaza_viteza(max_speed)
+        self.motor_stanga.reset_angle(0)
+        self.motor_dreapta.reset_angle(0)
+
+        print(f"Începe mersul rapid pe {distance_cm:.1f} cm (Target Rot: {target_deg:.0f} deg). Țintă IMU: {self.global_angle:.0f}")
+
+        while True:
+            avg_rot = self.get_avg_angle()
+            viteza = (self.motor_stanga.speed() + self.motor_dreapta.speed()) / 2
+
+            # Unde vom fi la jumătatea pasului următor, dacă frânăm atunci
+            oprire = avg_rot + viteza * FRANA_ANTICIPARE_MS / 1000 + self.distanta_franare(viteza)
+            if oprire >= target_deg:
+                break
+
+            heading_error = (self.global_angle - self.unghi_imu() + 180) % 360 - 180
+            corectie = self.Kp_imu_straight * heading_error
+            self.motor_stanga.run(max_speed - corectie)
+            self.motor_dreapta.run(max_speed + corectie)
+
+            self.asteapta(10)
+
+        self.motor_stanga.brake()
+        self.motor_dreapta.brake()
+        self.asteapta_imu(IMU_OPRIRE_MAX_MS)
+        final = self.get_avg_angle()
+        if viteza < FRANA_VITEZA_MIN:
+            return # Oprire fără viteză, nu o dăm modelului de frânare
+        print(f"FRANA,{viteza:.0f},{self.tensiune_mv},{SUPRAFATA},{final - avg_rot:.0f},{final - target_deg:.0f}")
 
     # ======================================
     # Rotație stabilă cu PID pe IMU Heading (Metoda Precisă)
@@ -139,19 +435,20 @@ class PrecisionRobot:
         folosind PID pe datele de la IMU.
         """
         self.global_angle = target_angle # Actualizează unghiul absolut
+        max_speed = self.limiteaza_viteza(max_speed)
         
         error_prev = 0
         min_speed = 30
         
         # Timer pentru a verifica dacă robotul este stabil
-        stable_timer = StopWatch()
+        stable_timer = self.ceas_nou()
         stable_timer.reset()
 
         print(f"Începe rotația PID către unghiul absolut: {target_angle:.0f} grade")
 
         while True:
             # Măsură unghiul curent
-            heading_raw = self.hub.imu.heading()
+            heading_raw = self.unghi_imu()
             
             # Eroare normalizată (-180..180)
             error = (target_angle - heading_raw + 180) % 360 - 180
@@ -181,12 +478,15 @@ class PrecisionRobot:
             self.motor_stanga.run(-speed)
             self.motor_dreapta.run(speed)
             
-            wait(10)
+            self.asteapta(10)
 
         self.motor_stanga.stop()
         self.motor_dreapta.stop()
-        print(f"Rotație IMU finalizată la unghiul: {self.hub.imu.heading():.0f}")
-        wait(300)
+        # Rotația s-a încheiat în sensul ultimei viteze (stânga are -speed)
+        semn = 1 if speed > 0 else -1
+        self.sens_motoare = (-semn, semn)
+        print(f"Rotație IMU finalizată la unghiul: {self.unghi_imu():.0f}")
+        self.asteapta_imu(IMU_OPRIRE_MAX_MS)
 
     # ======================================
     # Rotație bazată pe Grade Motor (Pentru Teste RAW)
@@ -199,15 +499,20 @@ class PrecisionRobot:
         # Formula pentru a calcula rotația motoarelor necesară pentru un viraj în loc
         # Formula: (unghi_relativ * axle_track_mm) / wheel_diameter_mm
         motor_degrees = (relative_angle * self.axle_track_mm) / self.wheel_diameter_mm
+        max_speed = self.limiteaza_viteza(max_speed)
         
         print(f"Raw Turn: Rotesc cu {relative_angle:.0f} grade, Motoare: {motor_degrees:.0f} grade")
 
+        # Motorul care își schimbă sensul mai are de trecut prin jocul din angrenaje
+        semn = 1 if motor_degrees > 0 else -1
+        joc_stanga, joc_dreapta = self.joc_la_schimbare(-semn, semn)
+
         # Rotește motoarele
-        self.motor_stanga.run_angle(max_speed, -motor_degrees, wait=False)
-        self.motor_dreapta.run_angle(max_speed, motor_degrees, wait=True)
+        self.motor_stanga.run_angle(max_speed, -motor_degrees - semn * joc_stanga, wait=False)
+        self.motor_dreapta.run_angle(max_speed, motor_degrees + semn * joc_dreapta, wait=True)
         
-        print(f"Raw Turn: Rotație motor finalizată. Unghi IMU curent: {self.hub.imu.heading():.1f} grade")
-        wait(300)
+        print(f"Raw Turn: Rotație motor finalizată. Unghi IMU curent: {self.unghi_imu():.1f} grade")
+        self.asteapta_imu(IMU_OPRIRE_MAX_MS)
 
     # ======================================
     # Execuție traseu (combinat drive + turn)
@@ -225,6 +530,11 @@ class PrecisionRobot:
                 dist, viteza = com[1], com[2]
                 print(f"Comandă: Mers {dist:.1f} cm (Viteza Max: {viteza})")
                 self.drive_distance_precise(dist, viteza)
+
+            elif tip == 'drive_rapid':
+                dist, viteza = com[1], com[2]
+                print(f"Comandă: Mers rapid {dist:.1f} cm (Viteza: {viteza})")
+                self.drive_distance_rapid(dist, viteza)
             
             elif tip == 'turn_raw':
                 unghi_rel, viteza = com[1], com[2]
@@ -252,8 +562,9 @@ class PrecisionRobot:
                 print(f"Comandă: Rotire relativă cu {unghi_rel:.0f} grade (Target Absolut: {self.global_angle:.0f})")
                 self.turn_to_angle_precise(self.global_angle, viteza)
             
-            wait(100) # Pauză scurtă între comenzi
+            self.pauza_giro(100) # Pauză scurtă între comenzi, reestimăm deriva
         print("--- Traseu Finalizat ---")
+        self.raporteaza_giro(0)
 
 
 # ======================================
@@ -264,20 +575,7 @@ class PrecisionRobot:
 ROBOT_WHEEL_DIAMETER_MM = 62.4 # Diametrul roților în mm
 ROBOT_AXLE_TRACK_MM = 80    # Distanța dintre centrele roților în mm
 
-# 2. Inițializarea și calibrarea Hub-ului
-main_hub = PrimeHub()
-main_hub.imu.reset_heading(0) # Resetează unghiul IMU la 0 la pornire
-
-# 3. Crearea instanței robotului
-robot = PrecisionRobot(
-    hub=main_hub,
-    left_motor_port=Port.C,
-    right_motor_port=Port.F,
-    wheel_diameter_mm=ROBOT_WHEEL_DIAMETER_MM,
-    axle_track_mm=ROBOT_AXLE_TRACK_MM
-)
-
-# 4. Trasee de test
+# 2. Trasee de test
 
 # Traseu pentru CALIBRAREA RAW (Testează cât de mult se rotește robotul)
 traseu_test_raw_turn = [
@@ -300,10 +598,62 @@ traseu_test_drept = [
     ('drive', 100, 800), # Merge 1 metru
 ]
 
+# Opriri de la viteze diferite, pentru tools/braking_model.py. Schimbă
+# SUPRAFATA când măsori pe altă suprafață.
+traseu_test_franare = [
+    ('drive_rapid', 30, 300),
+    ('drive_rapid', 30, 500),
+    ('drive_rapid', 30, 700),
+    ('drive_rapid', 30, 900),
+]
+
 # ======================================
 # Rulează traseul dorit
 # ======================================
-# Acum se va executa traseul patrat care folosește corecția IMU pe mersul drept
-robot.executa_traseu(traseu_patrat)
-# robot.executa_traseu(traseu_test_raw_turn)
-# robot.executa_traseu(traseu_test_drept)
+# Doar când programul este pornit direct, ca tools/replay.py să poată
+# importa PrecisionRobot și traseele fără să pornească robotul
+if __name__ == "__main__":
+    # Acum se va executa traseul patrat care folosește corecția IMU pe mersul drept
+    traseu = traseu_patrat
+    # traseu = traseu_test_raw_turn
+    # traseu = traseu_test_drept
+    # traseu = traseu_test_franare
+    # Trasee planificate pe hartă de tools/field_planner.py:
+    # from trasee_planificate import TRASEE
+    # traseu = TRASEE["home_left_to_forge"]
+
+    # Inițializarea și calibrarea Hub-ului
+    main_hub = PrimeHub()
+    main_hub.imu.reset_heading(0) # Resetează unghiul IMU la 0 la pornire
+
+    inregistrare = {}
+    rec = None
+    if INREGISTRARE:
+        # Toate citirile și comenzile trec prin recorder
+        rec = Recorder()
+        rec.note("traseu", traseu)
+        rec.note("robot", (ROBOT_WHEEL_DIAMETER_MM, ROBOT_AXLE_TRACK_MM))
+        rec.note("bias_giro", True)
+        main_hub = rec.device("hub", main_hub)
+        inregistrare = {
+            "fabrica_motor": rec.device_class(Motor, ("motor_stanga", "motor_dreapta")),
+            "fabrica_ceas": rec.device_class(StopWatch, ("ceas",)),
+            "asteapta": rec.function("wait", wait),
+        }
+
+    # Crearea instanței robotului
+    robot = PrecisionRobot(
+        hub=main_hub,
+        left_motor_port=Port.C,
+        right_motor_port=Port.F,
+        wheel_diameter_mm=ROBOT_WHEEL_DIAMETER_MM,
+        axle_track_mm=ROBOT_AXLE_TRACK_MM,
+        **inregistrare
+    )
+
+    # Robotul trebuie să stea nemișcat cât se măsoară deriva giroscopului
+    robot.estimeaza_bias_giro()
+    robot.executa_traseu(traseu)
+
+    if rec is not None:
+        rec.finish()
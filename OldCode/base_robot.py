@@ -12,9 +12,10 @@ from pybricks.parameters import (
 )
 from pybricks.robotics import DriveBase
 from pybricks.hubs import PrimeHub
-from pybricks.tools import wait
+from pybricks.tools import wait, StopWatch
 from pybricks import version
 from utils import *
+from motor_model import MOTOR_MODELS
 
 # All default constant percentages will be defined here
 DEFAULT_MED_MOT_SPEED_PCT = 90  # normal attachment moter speed, % value
@@ -23,10 +24,158 @@ DEFAULT_BIG_MOT_SPEED_PCT = 80  # normal wheels moter speed, % value
 DEFAULT_BIG_MOT_ACCEL_PCT = 80
 DEFAULT_TURN_SPEED_PCT = 45  #
 DEFAULT_TURN_ACCEL_PCT = 45  #
-DEFAULT_STALL_PCT = 50
+JOIN_POLL_MS = 5  # how often MotionHandle.join() checks the motion
+# waitForImuReady(): the hub counts as still when the turn rate (deg/sec)
+# stays below this for IMU_STILL_POLLS polls in a row. imu.stationary() is
+# not used, the hub only reports it after about a second of stillness.
+IMU_STILL_DEG_SEC = 2
+IMU_STILL_POLLS = 3
+IMU_POLL_MS = 10
+IMU_READY_TIMEOUT_MS = 2000
 CURRENT_PYBRICKS_VERSION = "ci-release-86-v3.6.1 on 2025-03-11"
 
 
+# The custom sensor colors are set up once, when base_robot is imported,
+# instead of every time a BaseRobot is made. BaseRobot hands the list to
+# the color sensor the first time the sensor is used.
+#
+# HSV values were found by testing. Default hsv-values are provided
+# in comments. Theoretically, the farther apart the hsv-values are,
+# the less likely two colors can get "confused"
+# Use the colorTest.py program to get the color sensor values
+
+# type: ignore comments needed to supress type checking errors.
+# Result of a known bug in the pybricks library.
+# https://github.com/orgs/pybricks/discussions/2098
+
+# WHITE default: h=0,s=0,v=100
+Color.SENSOR_WHITE = Color(h=0, s=0, v=100)  # type: ignore
+
+# RED default: h=0,s=100,v=100
+Color.SENSOR_RED = Color(h=353, s=82, v=92)  # type: ignore
+
+# YELLOW default: h=60,s=100,v=100
+Color.SENSOR_YELLOW = Color(h=60, s=60, v=100)  # type: ignore
+
+# GREEN default: h=120,s=100,v=100
+Color.SENSOR_GREEN = Color(h=156, s=66, v=66)  # type: ignore
+
+# BLUE default: h=240,s=100,v=100
+Color.SENSOR_BLUE = Color(h=216, s=84, v=83)  # type: ignore
+
+# MAGENTA default: h=300,s=100,v=100
+Color.SENSOR_MAGENTA = Color(h=333, s=75, v=78)  # type: ignore
+
+# ORANGE default: h=30,s=100,v=100
+Color.SENSOR_ORANGE = Color(h=8, s=75, v=100)  # type: ignore
+
+# DARKGRAY default: h=0,s=0,v=50
+Color.SENSOR_DARKGRAY = Color(h=192, s=21, v=64)  # type: ignore
+
+# NONE default: h=0,s=0,v=0
+Color.SENSOR_NONE = Color(h=170, s=26, v=15)  # type: ignore
+
+# LIME default: h=92, s=57, v=93
+Color.SENSOR_LIME = Color(h=92, s=55, v=93)  # type: ignore
+
+# Put the custom colors in a list. Best practice is to only use
+# colors that we are using for actual missions.
+SENSOR_COLORS: list = [
+    Color.SENSOR_WHITE,  # type: ignore
+    Color.SENSOR_RED,  # type: ignore
+    Color.SENSOR_YELLOW,  # type: ignore
+    Color.SENSOR_GREEN,  # type: ignore
+    Color.SENSOR_BLUE,  # type: ignore
+    Color.SENSOR_MAGENTA,  # type: ignore
+    Color.SENSOR_ORANGE,  # type: ignore
+    Color.SENSOR_DARKGRAY,  # type: ignore
+    Color.SENSOR_NONE,  # Do not comment this out # type: ignore
+    Color.SENSOR_LIME,  # type: ignore
+]
+
+# Translates our custom colors into the default pybricks colors
+# It doesn't matter if there are extra colors in here that won't be
+# detected. Used to set the hub light color to match the color sensor
+MY_COLOR_2_DEFAULT_COLOR_DICT: dict = {
+    Color.SENSOR_GREEN: Color.GREEN,  # type: ignore
+    Color.SENSOR_RED: Color.RED,  # type: ignore
+    Color.SENSOR_YELLOW: Color.YELLOW,  # type: ignore
+    Color.SENSOR_BLUE: Color.BLUE,  # type: ignore
+    Color.SENSOR_MAGENTA: Color.MAGENTA,  # type: ignore
+    Color.SENSOR_WHITE: Color.WHITE,  # type: ignore
+    Color.SENSOR_ORANGE: Color.ORANGE,  # type: ignore
+    Color.SENSOR_DARKGRAY: Color.GRAY,  # type: ignore
+    Color.SENSOR_NONE: Color.NONE,  # type: ignore
+    Color.SENSOR_LIME: Color.CYAN,  # type: ignore
+}
+
+
+class MotionHandle:
+    """
+    Returned by the BaseRobot movement commands, so a mission can start a \
+        motion with waiting=False, do something else, and then check on it \
+        or wait for it.
+    A handle belongs to one device (the drive base or one attachment \
+        motor). When a newer command is given to the same device, the old \
+        handle counts as done and cancel() no longer does anything.
+    Example usage:
+        >>> drive = br.driveForDistance(distance=500, waiting=False)
+        >>> arm = br.moveLeftAttachmentMotorForDegrees(90, waiting=False)
+        >>> JoinAll([drive, arm], timeoutMillis=3000)
+    """
+
+    def __init__(self, device):
+        self._device = device
+        self.superseded: bool = False
+        self.cancelled: bool = False
+
+    def done(self) -> bool:
+        """True when the motion has finished, was cancelled, or was \
+        replaced by a newer command to the same device."""
+        return self.superseded or self.cancelled or self._device.done()
+
+    def join(self, timeoutMillis: int = 0) -> bool:
+        """Waits until the motion is done. With timeoutMillis > 0, gives up \
+        after that many milliseconds (the motion keeps going). Returns True \
+        if the motion is done."""
+        watch: StopWatch = StopWatch()
+        while not self.done():
+            if timeoutMillis > 0 and watch.time() >= timeoutMillis:
+                return False
+            wait(JOIN_POLL_MS)
+        return True
+
+    def cancel(self):
+        """Stops the motion, unless it is already done."""
+        if not self.done():
+            self._device.stop()
+        self.cancelled = True
+
+
+def JoinAll(handles: list, timeoutMillis: int = 0) -> bool:
+    """
+    Waits until all the motions are done, e.g. a drive and an attachment \
+        move that were started with waiting=False. With timeoutMillis > 0, \
+        gives up after that many milliseconds. Returns True if all of them \
+        are done.
+
+    Snippet: ja
+
+    Example:
+    >>> JoinAll([drive, arm], timeoutMillis=3000)
+    """
+    watch: StopWatch = StopWatch()
+    for handle in handles:
+        left: int = 0
+        if timeoutMillis > 0:
+            left = timeoutMillis - watch.time()
+            if left <= 0:
+                return all(h.done() for h in handles)
+        if not handle.join(left):
+            return False
+    return True
+
+
 class BaseRobot:
     """
     BaseRobot provides a comprehensive set of methods and attributes for \
@@ -69,6 +218,11 @@ class BaseRobot:
             acceleration, and waiting for completion.
         - Color profiles should be calibrated for your specific field and \
             lighting conditions.
+        - Straight speeds are limited to what the battery can hold (see \
+            BAT_SPEED_MODEL_MV in utils.py), so speedPct=100 is the fastest \
+            speed the robot can keep up with the battery it has.
+        - Movement commands return a MotionHandle. With waiting=False, use \
+            it (or JoinAll) to wait for the motion while doing other things.
         - Use the provided snippet names (e.g., 'dfd', 'lmd') for quick code \
             insertion in compatible editors.
     """
@@ -83,25 +237,39 @@ class BaseRobot:
             calibration, and configuration settings.
         - Sets up the PrimeHub with specified orientation.
         - Prints firmware version and battery voltage information.
-        - Initializes drive motors, attachment motors, and drive base with \
-            default speed and acceleration settings.
-        - Configures color sensor and calibrates custom HSV color values for \
-            mission-specific color detection.
-        - Sets up a list of detectable colors for the color sensor.
-        - Maps custom sensor colors to default Pybricks colors for hub \
-            light feedback.
+        - Initializes drive motors and drive base with default speed and \
+            acceleration settings.
+        - The attachment motors and the color sensor (with the custom HSV \
+            colors) are only set up the first time they are used.
+        - Records how long each step takes in bootProfile.
         """
+        bootWatch: StopWatch = StopWatch()
+        # (step, ms) for every setup step, see printBootProfile()
+        self.bootProfile: list = []
         self.hub = PrimeHub(top_side=Axis.Z, front_side=-Axis.Y)  # type: ignore
+        self._bootStep("hub", bootWatch)
         print(version[2])
         if version[2] != CURRENT_PYBRICKS_VERSION:
             print(
                 "* * * Expected Pybricks version " + CURRENT_PYBRICKS_VERSION
             )
+        # This robot's drive motor model from tools/motor_sysid.py, or
+        # None when its hub hasn't been measured
+        self.motorModel = MOTOR_MODELS.get(self.hub.system.info()["name"])
+        # Which way each drive motor turned last (1, -1, or 0 when not
+        # known), to take up the backlash when it changes direction
+        self._leftDirection: int = 0
+        self._rightDirection: int = 0
         v: int = self.hub.battery.voltage()
         vPct: int = RescaleBatteryVoltage(v)
         print(str(v))
         print(f"Battery voltage %: {vPct / 100 :.2%}")
+        # Fastest straight speed the battery can hold right now (mm/sec).
+        # Updated every BATTERY_SAMPLE_MS by updateBatteryCompensation().
+        self.maxStraightSpeed: int = self._maxStraightSpeed(v)
+        self._batteryWatch: StopWatch = StopWatch()
         self._version: str = "1.0 09/11/2024"
+        self._bootStep("version and battery", bootWatch)
         self.leftDriveMotor: Motor = Motor(Port.E, Direction.COUNTERCLOCKWISE)
         self.rightDriveMotor: Motor = Motor(Port.A)
         self.robot: DriveBase = DriveBase(
@@ -110,93 +278,176 @@ class BaseRobot:
             TIRE_DIAMETER,  # defined in utils.py
             AXLE_TRACK,  # defined in utils.py
         )
-        # default speeds were determined by testing
+        # default speeds were determined by testing, and are capped like
+        # every straight speed
         self.robot.settings(
-            RescaleStraightSpeed(DEFAULT_BIG_MOT_SPEED_PCT),
+            self._limitStraightSpeed(
+                RescaleStraightSpeed(DEFAULT_BIG_MOT_SPEED_PCT)
+            ),
             RescaleStraightAccel(DEFAULT_BIG_MOT_ACCEL_PCT),
             RescaleTurnSpeed(DEFAULT_TURN_SPEED_PCT),
             RescaleTurnAccel(DEFAULT_TURN_ACCEL_PCT),
         )
+        self._bootStep("drive base", bootWatch)
+
+        # The attachment motors and the color sensor are set up the first
+        # time they are used (see the properties below), so a mission that
+        # doesn't use them doesn't wait for them.
+        self._leftAttachmentMotor = None
+        self._rightAttachmentMotor = None
+        self._colorSensor = None
+        # The newest MotionHandle for each device, see _startMotion()
+        self._motions: dict = {}
+        self.sensorColors: list[Color] = SENSOR_COLORS
+        self.myColor2DefaultColorDict: dict[Color, Color] = (
+            MY_COLOR_2_DEFAULT_COLOR_DICT
+        )
+
+    def _bootStep(self, step: str, watch: StopWatch):
+        self.bootProfile.append((step, watch.time()))
+        watch.reset()
+
+    def printBootProfile(self):
+        """
+        Prints how long each setup step took, in milliseconds. Steps that \
+            happen the first time a device is used (like "color sensor") \
+            are listed once they have happened.
 
-        self.leftAttachmentMotor: Motor = Motor(Port.B)
-        self.rightAttachmentMotor: Motor = Motor(Port.D)
-        self.leftAttachmentMotor.control.limits(acceleration=20000)
-        self.rightAttachmentMotor.control.limits(acceleration=20000)
-
-        self.colorSensor: ColorSensor = ColorSensor(Port.F)
-
-        # HSV values were found by testing. Default hsv-values are provided
-        # in comments. Theoretically, the farther apart the hsv-values are,
-        # the less likely two colors can get "confused"
-        # Use the colorTest.py program to get the color sensor values
-
-        # type: ignore comments needed to supress type checking errors.
-        # Result of a known bug in the pybricks library.
-        # https://github.com/orgs/pybricks/discussions/2098
-
-        # WHITE default: h=0,s=0,v=100
-        Color.SENSOR_WHITE = Color(h=0, s=0, v=100)  # type: ignore
-
-        # RED default: h=0,s=100,v=100
-        Color.SENSOR_RED = Color(h=353, s=82, v=92)  # type: ignore
-
-        # YELLOW default: h=60,s=100,v=100
-        Color.SENSOR_YELLOW = Color(h=60, s=60, v=100)  # type: ignore
-
-        # GREEN default: h=120,s=100,v=100
-        Color.SENSOR_GREEN = Color(h=156, s=66, v=66)  # type: ignore
-
-        # BLUE default: h=240,s=100,v=100
-        Color.SENSOR_BLUE = Color(h=216, s=84, v=83)  # type: ignore
-
-        # MAGENTA default: h=300,s=100,v=100
-        Color.SENSOR_MAGENTA = Color(h=333, s=75, v=78)  # type: ignore
-
-        # ORANGE default: h=30,s=100,v=100
-        Color.SENSOR_ORANGE = Color(h=8, s=75, v=100)  # type: ignore
-
-        # DARKGRAY default: h=0,s=0,v=50
-        Color.SENSOR_DARKGRAY = Color(h=192, s=21, v=64)  # type: ignore
-
-        # NONE default: h=0,s=0,v=0
-        Color.SENSOR_NONE = Color(h=170, s=26, v=15)  # type: ignore
-
-        # LIME default: h=92, s=57, v=93
-        Color.SENSOR_LIME = Color(h=92, s=55, v=93)  # type: ignore
-
-        # Put the custom colors in a list. Best practice is to only use
-        # colors that we are using for actual missions.
-        self.sensorColors: list[Color] = [
-            Color.SENSOR_WHITE,  # type: ignore
-            Color.SENSOR_RED,  # type: ignore
-            Color.SENSOR_YELLOW,  # type: ignore
-            Color.SENSOR_GREEN,  # type: ignore
-            Color.SENSOR_BLUE,  # type: ignore
-            Color.SENSOR_MAGENTA,  # type: ignore
-            Color.SENSOR_ORANGE,  # type: ignore
-            Color.SENSOR_DARKGRAY,  # type: ignore
-            Color.SENSOR_NONE,  # Do not comment this out # type: ignore
-            Color.SENSOR_LIME,  # type: ignore
-        ]
-
-        # Set the detectable colors using our list
-        self.colorSensor.detectable_colors(self.sensorColors)
-
-        # Translates our custom colors into the default pybricks colors
-        # It doesn't matter if there are extra colors in here that won't be
-        # detected. Used to set the hub light color to match the color sensor
-        self.myColor2DefaultColorDict: dict[Color, Color] = {
-            Color.SENSOR_GREEN: Color.GREEN,  # type: ignore
-            Color.SENSOR_RED: Color.RED,  # type: ignore
-            Color.SENSOR_YELLOW: Color.YELLOW,  # type: ignore
-            Color.SENSOR_BLUE: Color.BLUE,  # type: ignore
-            Color.SENSOR_MAGENTA: Color.MAGENTA,  # type: ignore
-            Color.SENSOR_WHITE: Color.WHITE,  # type: ignore
-            Color.SENSOR_ORANGE: Color.ORANGE,  # type: ignore
-            Color.SENSOR_DARKGRAY: Color.GRAY,  # type: ignore
-            Color.SENSOR_NONE: Color.NONE,  # type: ignore
-            Color.SENSOR_LIME: Color.CYAN,  # type: ignore
-        }
+        Example:
+
+        >>> br.printBootProfile()
+        """
+        total: int = 0
+        for step, ms in self.bootProfile:
+            total += ms
+            print("Boot " + step + ": " + str(ms) + " ms")
+        print("Boot total: " + str(total) + " ms")
+
+    @property
+    def leftAttachmentMotor(self) -> Motor:
+        if self._leftAttachmentMotor is None:
+            watch: StopWatch = StopWatch()
+            self._leftAttachmentMotor = Motor(Port.B)
+            self._leftAttachmentMotor.control.limits(acceleration=20000)
+            self._bootStep("left attachment motor", watch)
+        return self._leftAttachmentMotor
+
+    @property
+    def rightAttachmentMotor(self) -> Motor:
+        if self._rightAttachmentMotor is None:
+            watch: StopWatch = StopWatch()
+            self._rightAttachmentMotor = Motor(Port.D)
+            self._rightAttachmentMotor.control.limits(acceleration=20000)
+            self._bootStep("right attachment motor", watch)
+        return self._rightAttachmentMotor
+
+    @property
+    def colorSensor(self) -> ColorSensor:
+        if self._colorSensor is None:
+            watch: StopWatch = StopWatch()
+            self._colorSensor = ColorSensor(Port.F)
+            # Set the detectable colors using our list
+            self._colorSensor.detectable_colors(self.sensorColors)
+            self._bootStep("color sensor", watch)
+        return self._colorSensor
+
+    def updateBatteryCompensation(self):
+        """Re-reads the battery voltage if it has not been read in the \
+        last BATTERY_SAMPLE_MS and updates maxStraightSpeed. Called at the \
+        start of every drive command, never inside a control loop."""
+        if self._batteryWatch.time() < BATTERY_SAMPLE_MS:
+            return
+        self._batteryWatch.reset()
+        self.maxStraightSpeed = self._maxStraightSpeed(
+            self.hub.battery.voltage()
+        )
+
+    def _maxStraightSpeed(self, volts: int) -> int:
+        speed: int = DB_MAX_SPEED_MMSEC * AchievableSpeedPct(volts) // 100
+        if self.motorModel is not None:
+            # Above the slower motor's top speed the robot would curve
+            speed = min(speed, MotorTopSpeedMmSec(self.motorModel, volts))
+        return speed
+
+    def _limitStraightSpeed(self, speed: int) -> int:
+        # Never ask for more speed than the battery can hold, so the
+        # drive base doesn't fall behind its speed profile.
+        self.updateBatteryCompensation()
+        if speed > self.maxStraightSpeed:
+            return self.maxStraightSpeed
+        if speed < -self.maxStraightSpeed:
+            return -self.maxStraightSpeed
+        return speed
+
+    def _setDriveDirections(self, left: int, right: int):
+        self._leftDirection = left
+        self._rightDirection = right
+
+    def _backlashMm(self, distance: int) -> int:
+        # A drive motor that turned the other way last time first turns
+        # through the gear slack, which the encoder counts but the wheel
+        # doesn't drive. Returns the extra distance to ask for.
+        sign: int = 1 if distance > 0 else -1
+        slack: float = 0
+        if self.motorModel is not None:
+            if self._leftDirection == -sign:
+                slack += self.motorModel["left"][3]
+            if self._rightDirection == -sign:
+                slack += self.motorModel["right"][3]
+        self._setDriveDirections(sign, sign)
+        # Half, the distance is the average of the two wheels
+        return int(sign * slack / 2 * TIRE_DIAMETER * 314 / 36000)
+
+    def _startMotion(self, device) -> MotionHandle:
+        # A new command replaces whatever the device was doing, so the
+        # previous handle for it is done
+        handle: MotionHandle = MotionHandle(device)
+        old = self._motions.get(device)
+        if old is not None:
+            old.superseded = True
+        self._motions[device] = handle
+        return handle
+
+    def _runUntilStalled(
+        self,
+        motor: Motor,
+        speed: int,
+        load: int,
+        stallSpeedPct: int,
+        holdPct: int,
+    ):
+        """Runs motor at speed (deg/sec) until it stalls, then holds it. \
+        A check counts as stalled when the load is at least load (mNm), or \
+        when both the measured speed and the angle turned since the last \
+        check are below stallSpeedPct percent of what speed should give \
+        (never with stallSpeedPct 0). \
+        This reacts much faster than the pybricks stall detection, which \
+        waits until the motor has been pinned for a while."""
+        # Degrees the motor should turn per check at full speed, times 100
+        expected: int = abs(speed) * STALL_POLL_MS // 10
+        slowSpeed: int = abs(speed) * stallSpeedPct // 100
+        watch: StopWatch = StopWatch()
+        motor.run(speed)
+        lastAngle: int = motor.angle()
+        ticks: int = 0
+        while ticks < STALL_CONFIRM_TICKS:
+            wait(STALL_POLL_MS)
+            angle: int = motor.angle()
+            progress: int = abs(angle - lastAngle) * 100
+            lastAngle = angle
+            if watch.time() < STALL_SPINUP_MS:
+                continue
+            if abs(motor.load()) >= load or (
+                abs(motor.speed()) < slowSpeed
+                and progress < expected * stallSpeedPct // 100
+            ):
+                ticks += 1
+            else:
+                ticks = 0
+        if holdPct > 0:
+            motor.dc(holdPct if speed > 0 else -holdPct)
+        else:
+            motor.hold()
 
     def moveLeftAttachmentMotorForDegrees(
         self,
@@ -226,13 +477,15 @@ class BaseRobot:
         waiting: (OPTIONAL bool): this tells the robot if it should wait for \
         the next line of code or run both lines of code at the same time. \
         Default is True, which means wait on this line until it is \
-        complete.
+        complete. Returns a MotionHandle to check on or wait for the motion.
         """
         # now the real work begins!
         speed = RescaleMedMotSpeed(speedPct)
+        handle: MotionHandle = self._startMotion(self.leftAttachmentMotor)
         self.leftAttachmentMotor.run_angle(
             speed=speed, rotation_angle=degrees, wait=waiting
         )
+        return handle
 
     def moveLeftAttachmentMotorForMillis(
         self,
@@ -264,18 +517,21 @@ class BaseRobot:
         waiting: (OPTIONAL bool): this tells the robot if it should wait for 
         the next line of code or run both lines of code at the same time. \
         Default is True, which means wait on this line until it is \
-        complete.
+        complete. Returns a MotionHandle to check on or wait for the motion.
 
         """
         speed: int = RescaleMedMotSpeed(speedPct)
+        handle: MotionHandle = self._startMotion(self.leftAttachmentMotor)
         self.leftAttachmentMotor.run_time(
             speed=speed, time=millis, wait=waiting
         )
+        return handle
 
     def moveLeftAttachmentMotorUntilStalled(
         self,
         speedPct: int = DEFAULT_MED_MOT_SPEED_PCT,
-        stallPct: int = DEFAULT_STALL_PCT,
+        stallPct: int = 0,
+        holdPct: int = 0,
     ):
         """
         Moves the left attachment motor until it stalls
@@ -294,15 +550,32 @@ class BaseRobot:
 
         stallPct: (OPTIONAL integer, 1 to 100): How much torque before 
         stopping and then continuing with the next line of code. Lower \
-        numbers means stopping with less torque.
+        numbers means stopping with less torque. Default (0) uses the \
+        thresholds for this motor in utils.py (LEFT_MED_MOT_STALL_LOAD and \
+        LEFT_MED_MOT_STALL_SPEED_PCT). With a stallPct only the torque \
+        counts, the motor slowing down does not.
+
+        holdPct: (OPTIONAL integer, 0 to 100): What to do after the stall. \
+        0 (default) holds the position with full torque. Anything else keeps \
+        pushing with that much power, so the attachment stays pressed \
+        against the model without straining the motor.
         """
 
         speed: int = RescaleMedMotSpeed(speedPct)
-        load: int = RescaleMedMotTorque(stallPct)
-        self.leftAttachmentMotor.run(speed)
-        while abs(self.leftAttachmentMotor.load()) < load:
-            wait(25)
-        self.leftAttachmentMotor.hold()
+        load: int = LEFT_MED_MOT_STALL_LOAD
+        stallSpeedPct: int = LEFT_MED_MOT_STALL_SPEED_PCT
+        if stallPct != 0:
+            # Only the torque, like before the stall thresholds were added
+            load = RescaleMedMotTorque(stallPct)
+            stallSpeedPct = 0
+        self._startMotion(self.leftAttachmentMotor)
+        self._runUntilStalled(
+            self.leftAttachmentMotor,
+            speed,
+            load,
+            stallSpeedPct,
+            holdPct,
+        )
 
     def moveRightAttachmentMotorForDegrees(
         self,
@@ -332,13 +605,15 @@ class BaseRobot:
         waiting: (OPTIONAL bool): this tells the robot if it should wait for \
         the next line of code or run both lines of code at the same time. \
         Default is True, which means wait on this line until it is \
-        complete.
+        complete. Returns a MotionHandle to check on or wait for the motion.
         """
         # now the real work begins!
         speed = RescaleMedMotSpeed(speedPct)
+        handle: MotionHandle = self._startMotion(self.rightAttachmentMotor)
         self.rightAttachmentMotor.run_angle(
             speed=speed, rotation_angle=degrees, wait=waiting
         )
+        return handle
 
     def moveRightAttachmentMotorForMillis(
         self,
@@ -370,18 +645,21 @@ class BaseRobot:
         waiting: (OPTIONAL bool): this tells the robot if it should wait for \
         the next line of code or run both lines of code at the same time. \
         Default is True, which means wait on this line until it is \
-        complete.
+        complete. Returns a MotionHandle to check on or wait for the motion.
 
         """
         speed: int = RescaleMedMotSpeed(speedPct)
+        handle: MotionHandle = self._startMotion(self.rightAttachmentMotor)
         self.rightAttachmentMotor.run_time(
             speed=speed, time=millis, wait=waiting
         )
+        return handle
 
     def moveRightAttachmentMotorUntilStalled(
         self,
         speedPct: int = DEFAULT_MED_MOT_SPEED_PCT,
-        stallPct: int = DEFAULT_STALL_PCT,
+        stallPct: int = 0,
+        holdPct: int = 0,
     ):
         """
         Moves the right attachment motor until it stalls
@@ -400,15 +678,32 @@ class BaseRobot:
 
         stallPct (OPTIONAL integer, 1 to 100): How much torque before stopping \
         and then continuing with the next line of code. Lower numbers means \
-        stopping with less torque.
+        stopping with less torque. Default (0) uses the thresholds for this \
+        motor in utils.py (RIGHT_MED_MOT_STALL_LOAD and \
+        RIGHT_MED_MOT_STALL_SPEED_PCT). With a stallPct only the torque \
+        counts, the motor slowing down does not.
+
+        holdPct (OPTIONAL integer, 0 to 100): What to do after the stall. \
+        0 (default) holds the position with full torque. Anything else keeps \
+        pushing with that much power, so the attachment stays pressed \
+        against the model without straining the motor.
         """
 
         speed: int = RescaleMedMotSpeed(speedPct)
-        load: int = RescaleMedMotTorque(stallPct)
-        self.rightAttachmentMotor.run(speed)
-        while abs(self.rightAttachmentMotor.load()) < load:
-            wait(25)
-        self.rightAttachmentMotor.hold()
+        load: int = RIGHT_MED_MOT_STALL_LOAD
+        stallSpeedPct: int = RIGHT_MED_MOT_STALL_SPEED_PCT
+        if stallPct != 0:
+            # Only the torque, like before the stall thresholds were added
+            load = RescaleMedMotTorque(stallPct)
+            stallSpeedPct = 0
+        self._startMotion(self.rightAttachmentMotor)
+        self._runUntilStalled(
+            self.rightAttachmentMotor,
+            speed,
+            load,
+            stallSpeedPct,
+            holdPct,
+        )
 
     def driveForDistance(
         self,
@@ -450,7 +745,7 @@ class BaseRobot:
         waiting: (OPTIONAL bool): this tells the robot if it should wait for \
         the next line of code or run both lines of code at the same time. \
         Default is True, which means wait on this line until it is \
-        complete.
+        complete. Returns a MotionHandle to check on or wait for the motion.
 
         gyro: (OPTIONAL bool): Use the gyro. Defaults to True. Set to False \
         when you do not want to use the gyro such as when you are wall \
@@ -462,16 +757,22 @@ class BaseRobot:
         briefly before driving forward. Useful to take the slack out of the \
         motors and square up against a wall. \
         """
-        speed = RescaleStraightSpeed(speedPct)
+        speed = self._limitStraightSpeed(RescaleStraightSpeed(speedPct))
         acceleration = RescaleStraightAccel(accelerationPct)
         self.robot.use_gyro(gyro)
         if wallsquare == True:
             self.robot.drive(RescaleStraightSpeed(-60), 0)
             wait(150)
             self.robot.brake()
+            self._setDriveDirections(-1, -1)
+        distance += self._backlashMm(distance)
 
-        self.robot.settings(acceleration, speed)
+        self.robot.settings(
+            straight_speed=speed, straight_acceleration=acceleration
+        )
+        handle: MotionHandle = self._startMotion(self.robot)
         self.robot.straight(distance, then, waiting)
+        return handle
 
     def driveForMillis(
         self,
@@ -503,10 +804,13 @@ class BaseRobot:
 
         accelerationPct: (OPTIONAL int > 0) How fast the robot accelerates
         """
-        speed = RescaleStraightSpeed(speedPct)
+        speed = self._limitStraightSpeed(RescaleStraightSpeed(speedPct))
         acceleration = RescaleStraightAccel(accelerationPct)
         self.robot.use_gyro(gyro)
         self.robot.settings(straight_acceleration=acceleration)
+        self._startMotion(self.robot)
+        direction: int = 1 if speed > 0 else -1
+        self._setDriveDirections(direction, direction)
         self.robot.drive(speed, 0)
         wait(millis)
         self.robot.brake()
@@ -569,6 +873,42 @@ class BaseRobot:
                 break
             wait(10)
 
+    def waitForImuReady(
+        self, timeoutMillis: int = IMU_READY_TIMEOUT_MS
+    ) -> bool:
+        """Waits until the gyro can be trusted: the hub has calibrated it \
+        (imu.ready()) and the robot is standing still. Returns as soon as \
+        that is true, so use it instead of a "just in case" wait before \
+        the first gyro move, for example right after a button press.
+
+        Snippet: wir
+
+        Example:
+        >>> br.waitForForwardButton()
+        >>> br.waitForImuReady()
+        >>> br.turnInPlace(90)
+
+        Args:
+        timeoutMillis: (OPTIONAL integer) Gives up after this many \
+        milliseconds. Defaults to 2 seconds.
+
+        Returns:
+        True when the gyro is ready, False when the time ran out.
+        """
+        watch: StopWatch = StopWatch()
+        stillPolls: int = 0
+        while watch.time() < timeoutMillis:
+            rate: float = self.hub.imu.angular_velocity(Axis.Z)  # type: ignore
+            if self.hub.imu.ready() and abs(rate) < IMU_STILL_DEG_SEC:
+                stillPolls += 1
+                if stillPolls >= IMU_STILL_POLLS:
+                    return True
+            else:
+                stillPolls = 0
+            wait(IMU_POLL_MS)
+        print("* * * Gyro not ready after " + str(timeoutMillis) + " ms")
+        return False
+
     def turnInPlace(
         self,
         angle: int,
@@ -602,7 +942,7 @@ class BaseRobot:
         waiting: (OPTIONAL bool): this tells the robot if it should wait for \
         the next line of code or run both lines of code at the same time. \
         Default is True, which means wait on this line until it is \
-        complete.
+        complete. Returns a MotionHandle to check on or wait for the motion.
 
         then: (OPTIONAL, Stop.HOLD|Stop.BRAKE|Stop.NONE|Stop.COAST): What the \
         drive motors will do after the robot has turned in place. \
@@ -618,8 +958,13 @@ class BaseRobot:
         speed = RescaleTurnSpeed(speedPct)
         acceleration = RescaleTurnAccel(accelerationPct)
         self.robot.use_gyro(gyro)
-        self.robot.settings(acceleration, speed)
+        self.robot.settings(turn_rate=speed, turn_acceleration=acceleration)
+        handle: MotionHandle = self._startMotion(self.robot)
+        # A right turn (positive angle) runs the left wheel forward
+        direction: int = 1 if angle > 0 else -1
+        self._setDriveDirections(direction, -direction)
         self.robot.turn(angle, then, waiting)
+        return handle
 
     def curve(
         self,
@@ -665,18 +1010,24 @@ class BaseRobot:
         waiting: (OPTIONAL bool): this tells the robot if it should wait for \
         the next line of code or run both lines of code at the same time. \
         Default is True, which means wait on this line until it is \
-        complete.
+        complete. Returns a MotionHandle to check on or wait for the motion.
 
         gyro (bool, optional): Use the gyro. Defaults to True.
 
         accelerationPct: (OPTIONAL int > 0) How fast the robot accelerates
 
         """
-        speed = RescaleStraightSpeed(speedPct)
+        speed = self._limitStraightSpeed(RescaleStraightSpeed(speedPct))
         acceleration = RescaleTurnAccel(accelerationPct)
         self.robot.use_gyro(gyro)
-        self.robot.settings(acceleration, speed)
+        self.robot.settings(
+            straight_speed=speed, turn_acceleration=acceleration
+        )
+        handle: MotionHandle = self._startMotion(self.robot)
+        # Tight curves turn the wheels different ways, so forget them
+        self._setDriveDirections(0, 0)
         self.robot.arc(radius=radius, angle=angle, then=then, wait=waiting)
+        return handle
 
     def driveArcDist(
         self,
@@ -721,7 +1072,7 @@ class BaseRobot:
         waiting: (OPTIONAL bool): this tells the robot if it should wait for \
         the next line of code or run both lines of code at the same time. \
         Default is True, which means wait on this line until it is \
-        complete.
+        complete. Returns a MotionHandle to check on or wait for the motion.
 
         gyro: (OPTIONAL bool): Use the gyro. Defaults to True. Set to False \
         when you do not want to use the gyro such as when you are wall \
@@ -729,11 +1080,14 @@ class BaseRobot:
 
         accelerationPct: (OPTIONAL int > 0) How fast the robot accelerates
         """
-        speed = RescaleStraightSpeed(speedPct)
+        speed = self._limitStraightSpeed(RescaleStraightSpeed(speedPct))
         accel = RescaleStraightAccel(accelerationPct)
         self.robot.use_gyro(gyro)
         self.robot.settings(straight_speed=speed, straight_acceleration=accel)
+        handle: MotionHandle = self._startMotion(self.robot)
+        self._setDriveDirections(0, 0)
         self.robot.arc(radius=radius, distance=dist, then=then, wait=waiting)
+        return handle
 
 
 # This BaseRobot class file is not meant to be run like the mission files.
@@ -0,0 +1,118 @@
+from base_robot import *
+
+# Generated by tools/field_planner.py from tools/field_map.py. Don't edit,
+# change the map or the routes and run the planner again.
+#
+# Every route is a tuple of steps, angles are positive to the right:
+#   ("turn", angle)           turnInPlace
+#   ("drive", distance)       driveForDistance, in mm
+#   ("curve", radius, angle)  curve
+
+ROUTES: dict = {
+    "home_left_to_forge": (  # 6.4 s
+        ("turn", 25),
+        ("drive", 251),
+        ("curve", 75, 20),
+        ("drive", 67),
+        ("curve", 150, 44),
+        ("drive", 614),
+        ("turn", -89),
+    ),
+    "forge_to_home_left": (  # 10.0 s
+        ("turn", -92),
+        ("drive", 696),
+        ("turn", -43),
+        ("drive", 199),
+        ("curve", 150, -41),
+        ("drive", 84),
+        ("turn", 176),
+    ),
+    "home_left_to_mineshaft": (  # 5.5 s
+        ("turn", 25),
+        ("drive", 251),
+        ("curve", 75, 20),
+        ("drive", 118),
+        ("curve", 150, 48),
+        ("drive", 118),
+        ("turn", -93),
+    ),
+    "home_right_to_silo": (  # 6.1 s
+        ("turn", -44),
+        ("drive", 554),
+        ("curve", 150, 44),
+        ("drive", 70),
+        ("curve", 150, 49),
+        ("drive", 69),
+        ("turn", -49),
+    ),
+    "silo_to_home_right": (  # 8.1 s
+        ("turn", -145),
+        ("drive", 136),
+        ("curve", 150, -35),
+        ("drive", 32),
+        ("curve", 150, -44),
+        ("drive", 554),
+        ("turn", -136),
+    ),
+    "home_right_to_statue": (  # 4.1 s
+        ("turn", -13),
+        ("drive", 354),
+        ("turn", 103),
+    ),
+    "home_right_to_heavy_lifting": (  # 5.2 s
+        ("turn", -54),
+        ("drive", 798),
+        ("turn", 54),
+    ),
+    "home_left_to_salvage": (  # 8.9 s
+        ("turn", 25),
+        ("drive", 251),
+        ("curve", 75, 20),
+        ("drive", 100),
+        ("turn", 47),
+        ("drive", 540),
+        ("turn", 61),
+        ("drive", 34),
+        ("turn", 27),
+    ),
+    "home_right_to_tip_the_scales": (  # 5.7 s
+        ("turn", -55),
+        ("drive", 571),
+        ("curve", 150, -39),
+        ("drive", 92),
+        ("turn", -86),
+    ),
+}
+
+
+def DriveRoute(
+    br: BaseRobot, name: str, speedPct: int = DEFAULT_BIG_MOT_SPEED_PCT
+):
+    """Drives one of the planned routes in ROUTES. Drives and curves \
+    that follow each other are chained with Stop.NONE so the robot \
+    doesn't stop between them.
+
+    Example:
+    >>> DriveRoute(br, "home_left_to_forge")
+
+    Args:
+    br (REQUIRED BaseRobot): The robot.
+
+    name (REQUIRED str): Name of the route in ROUTES.
+
+    speedPct (OPTIONAL, integer > 0): How fast to drive the straight \
+    lines and curves. Defaults to DEFAULT_BIG_MOT_SPEED_PCT.
+    """
+    steps = ROUTES[name]
+    for i in range(len(steps)):
+        step = steps[i]
+        last = i == len(steps) - 1 or steps[i + 1][0] == "turn"
+        then = Stop.BRAKE if last else Stop.NONE
+        if step[0] == "turn":
+            br.turnInPlace(angle=step[1])
+        elif step[0] == "drive":
+            br.driveForDistance(distance=step[1], speedPct=speedPct, then=then)
+        else:
+            br.curve(
+                radius=step[1], angle=step[2], speedPct=speedPct, then=then
+            )
@@ -0,0 +1,161 @@
+try:
+    import math
+except ImportError:
+    # The hub only has the MicroPython version of the math module
+    import umath as math
+
+# How often the master program samples the color sensor while waiting for
+# a launch, in milliseconds
+LAUNCH_POLL_MS: int = 10
+
+# How many samples in a row must agree before a color counts as "seen".
+# At LAUNCH_POLL_MS = 10 this is 50 ms, which is still faster than the
+# old single reading every 50 ms, but one bad reading can't launch a
+# mission anymore.
+LAUNCH_AGREE_SAMPLES: int = 5
+
+# Lowest confidence (0 to 100) a sample may have and still count. Samples
+# that sit halfway between two colors are ignored.
+LAUNCH_MIN_CONFIDENCE: int = 20
+
+# The lookup table splits hue into 10 degree steps and saturation and
+# value into steps of 10.
+HUE_STEP: int = 10
+HUE_BINS: int = 36
+SV_STEP: int = 10
+SV_BINS: int = 11
+UNFILLED: int = 255
+
+
+def HsvToCone(h: int, s: int, v: int) -> tuple:
+    """Converts an hsv reading into x, y, z coordinates in the hsv cone. \
+    Colors that are dark or washed out end up close together, which is \
+    the same idea pybricks uses for color()."""
+    chroma: float = s * v / 100
+    rad: float = h * math.pi / 180
+    return (chroma * math.cos(rad), chroma * math.sin(rad), v)
+
+
+def ConeDistance(a: tuple, b: tuple) -> float:
+    dx = a[0] - b[0]
+    dy = a[1] - b[1]
+    dz = a[2] - b[2]
+    return math.sqrt(dx * dx + dy * dy + dz * dz)
+
+
+def NearestCentroid(point: tuple, centroids: list) -> tuple:
+    """Returns (index, confidence) of the centroid closest to point. \
+    Confidence is 0 when the point is exactly halfway between the two \
+    closest centroids and 100 when it sits right on top of one."""
+    best: int = 0
+    d1: float = -1
+    d2: float = -1
+    for i in range(len(centroids)):
+        d = ConeDistance(point, centroids[i])
+        if d1 < 0 or d < d1:
+            d2 = d1
+            d1 = d
+            best = i
+        elif d2 < 0 or d < d2:
+            d2 = d
+    if d2 < 0 or d1 + d2 == 0:
+        return (best, 100)
+    return (best, int(100 * (d2 - d1) / (d2 + d1)))
+
+
+class LaunchClassifier:
+    """
+    Classifies raw color sensor hsv() readings into one of the custom \
+        colors configured in BaseRobot, using a nearest-centroid lookup \
+        table.
+    The table is filled lazily (and during idle time with fillSome()), \
+        so building it does not slow down startup. After a cell is \
+        filled, classifying a reading is a couple of integer divisions \
+        and two bytearray lookups.
+    Example usage:
+        >>> classifier = LaunchClassifier(br.sensorColors)
+        >>> while classifier.update(br.colorSensor.hsv()) is None:
+        >>>     wait(LAUNCH_POLL_MS)
+        >>> print(classifier.stableColor, classifier.confidence)
+    Attributes:
+        colors (list[Color]): The colors that can be detected.
+        stableColor (Color): The last color that was seen \
+            agreeSamples times in a row, or None.
+        confidence (int): Lowest confidence (0 to 100) of the samples \
+            that made up stableColor.
+    """
+
+    def __init__(
+        self,
+        colors: list,
+        agreeSamples: int = LAUNCH_AGREE_SAMPLES,
+        minConfidence: int = LAUNCH_MIN_CONFIDENCE,
+    ):
+        self.colors: list = colors
+        self.agreeSamples: int = agreeSamples
+        self.minConfidence: int = minConfidence
+        self._centroids: list = [HsvToCone(c.h, c.s, c.v) for c in colors]
+        size: int = HUE_BINS * SV_BINS * SV_BINS
+        self._classTable = bytearray(bytes((UNFILLED,)) * size)
+        self._confTable = bytearray(size)
+        self._nextFill: int = 0
+        self._candidate: int = UNFILLED
+        self._count: int = 0
+        self._windowConfidence: int = 100
+        self.stableColor = None
+        self.confidence: int = 0
+
+    def _fillCell(self, cell: int):
+        hBin = cell // (SV_BINS * SV_BINS)
+        sBin = (cell // SV_BINS) % SV_BINS
+        vBin = cell % SV_BINS
+        # Classify the center of the cell
+        point = HsvToCone(
+            hBin * HUE_STEP + HUE_STEP // 2, sBin * SV_STEP, vBin * SV_STEP
+        )
+        index, conf = NearestCentroid(point, self._centroids)
+        self._classTable[cell] = index
+        self._confTable[cell] = conf
+
+    def fillSome(self, count: int = 20):
+        """Fills the next count cells of the lookup table. Call this while \
+        waiting so the table is complete before it is needed. Returns True \
+        once the whole table is filled."""
+        size = len(self._classTable)
+        while count > 0 and self._nextFill < size:
+            if self._classTable[self._nextFill] == UNFILLED:
+                self._fillCell(self._nextFill)
+            self._nextFill += 1
+            count -= 1
+        return self._nextFill >= size
+
+    def classify(self, hsv) -> tuple:
+        """Returns (index into colors, confidence) for an hsv() reading."""
+        h = hsv.h % 360
+        cell = (
+            (h // HUE_STEP) * SV_BINS + (hsv.s + SV_STEP // 2) // SV_STEP
+        ) * SV_BINS + (hsv.v + SV_STEP // 2) // SV_STEP
+        if self._classTable[cell] == UNFILLED:
+            self._fillCell(cell)
+        return (self._classTable[cell], self._confTable[cell])
+
+    def update(self, hsv):
+        """Adds one hsv() reading. Returns the color once agreeSamples \
+        confident readings in a row agree, otherwise None. Also updates \
+        stableColor and confidence."""
+        index, conf = self.classify(hsv)
+        if conf < self.minConfidence:
+            self._count = 0
+            return None
+        if index != self._candidate:
+            self._candidate = index
+            self._count = 0
+            self._windowConfidence = 100
+        self._count += 1
+        if conf < self._windowConfidence:
+            self._windowConfidence = conf
+        if self._count < self.agreeSamples:
+            return None
+        self.stableColor = self.colors[index]
+        self.confidence = self._windowConfidence
+        return self.stableColor
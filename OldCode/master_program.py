@@ -1,28 +1,130 @@
+from pybricks.tools import StopWatch
+
+# Started first thing so we can report how long it takes to be ready
+bootWatch = StopWatch()
+
+import gc
 from base_robot import *
+from launch_classifier import *
+from profiler import *
+
+# Set to True to time every BaseRobot command of every mission. The
+# timeline is printed after each mission; save the output and run
+# tools/timeline_report.py on it.
+PROFILE = False
 
-# Import missions
-import noah2, noahsdice, shaila, shaila2, noah4, Carovanni, carternoah, GiosToast
+# Missions are imported only when they are launched (see RunMission), so
+# only one mission is in memory at a time. pybricksdev only uploads the
+# files it sees imported, so these imports are here for the upload. They
+# never run on the robot because BUNDLE_MISSIONS is False.
+BUNDLE_MISSIONS = False
+if BUNDLE_MISSIONS:
+    import noah2, noahsdice, shaila, shaila2, noah4, Carovanni, carternoah, GiosToast
 
 
 br: BaseRobot = BaseRobot()
+profiler = None
+if PROFILE:
+    profiler = Profiler(br)
+
+# Which missions to launch for each color. When a color has more than one
+# mission, the robot waits for the forward button between them. To add a
+# mission, add its file name here and to the imports above.
+MISSIONS: dict = {
+    Color.SENSOR_YELLOW: ("noah2", "shaila"),  # type: ignore
+    Color.SENSOR_GREEN: ("GiosToast",),  # type: ignore
+    Color.SENSOR_LIME: ("noahsdice",),  # type: ignore
+    Color.SENSOR_WHITE: ("shaila2",),  # type: ignore
+    Color.SENSOR_ORANGE: ("noah4",),  # type: ignore
+    Color.SENSOR_RED: ("carternoah",),  # type: ignore
+    Color.SENSOR_MAGENTA: ("carternoah",),  # type: ignore
+    Color.SENSOR_BLUE: ("Carovanni",),  # type: ignore
+}
+
+# Missions are unloaded through sys.modules. Some firmware builds leave it
+# out, then every mission stays in RAM after it ran.
+try:
+    import usys as sys
+except ImportError:
+    import sys
+loadedModules = getattr(sys, "modules", None)
+if loadedModules is None:
+    print("* * * No sys.modules, missions stay in RAM after they run")
+
+
+def UnloadMission(name: str):
+    # Forget the module so the next import loads it fresh and the garbage
+    # collector can free it
+    if loadedModules is not None:
+        loadedModules.pop(name, None)
+
+
+def RunMission(name: str):
+    """Imports the mission file, runs it, then unloads it again. Prints \
+    how long the mission took and how much RAM it used right after it was \
+    loaded and right after it ran. These are two samples, not a peak: RAM \
+    in use during the run can be higher."""
+    gc.collect()
+    ramBefore: int = gc.mem_alloc()
+    watch = StopWatch()
+    mission = __import__(name)
+    ramLoaded: int = gc.mem_alloc()
+    if profiler is not None:
+        profiler.startMission(name)
+    mission.Run(br)
+    if profiler is not None:
+        profiler.dump()
+    ramRun: int = gc.mem_alloc() - ramBefore
+    del mission
+    UnloadMission(name)
+    gc.collect()
+    print(
+        name
+        + ": "
+        + str(watch.time())
+        + " ms, RAM after load "
+        + str(ramLoaded - ramBefore)
+        + " bytes, after run "
+        + str(ramRun)
+        + " bytes, free "
+        + str(gc.mem_free())
+        + " bytes"
+    )
+
 
 pressed = []
-col: Color = br.colorSensor.color()
+# Classifies the raw hsv() readings. A color only counts once several
+# readings in a row agree, so one bad reading can't launch a mission.
+classifier = LaunchClassifier(br.sensorColors)
+col: Color = Color.SENSOR_NONE  # type: ignore
+shown = None
+imuChecked: bool = False  # waitForImuReady() ran before the first mission
+# The first reading also sets up the color sensor, so it counts as boot
+classifier.update(br.colorSensor.hsv())
+print("Boot to ready: " + str(bootWatch.time()) + " ms")
+br.printBootProfile()
 
 while True:
     while True:
-        col = br.colorSensor.color()
+        seen = classifier.update(br.colorSensor.hsv())
+        if seen is not None:
+            col = seen
         # The first thing this program does is it detects what color is
-        # being help up to the robot color sensor.
-        # If no color is detected, then it will display a sad face
-        if col == Color.SENSOR_NONE:
-            br.hub.display.icon(Icon.SAD)
-            br.hub.light.on(Color.RED)
-        else:  #  If a color is detected, then it will display a happy face
-            br.hub.display.icon(Icon.HAPPY)
-            br.hub.light.on(br.myColor2DefaultColorDict[col])
-
-        wait(50)
+        # being help up to the robot color sensor. Only change the display
+        # when the color changes, the display is slow to update.
+        if col != shown:
+            shown = col
+            # If no color is detected, then it will display a sad face
+            if col == Color.SENSOR_NONE:  # type: ignore
+                br.hub.display.icon(Icon.SAD)
+                br.hub.light.on(Color.RED)
+            else:  #  If a color is detected, then it will display a happy face
+                br.hub.display.icon(Icon.HAPPY)
+                br.hub.light.on(br.myColor2DefaultColorDict[col])
+
+        # Use the spare time to fill in more of the lookup table
+        classifier.fillSome()
+        wait(LAUNCH_POLL_MS)
         pressed = br.hub.buttons.pressed()
         #  When the left button is pressed, it will break out of the loop
         if Button.LEFT in pressed:
@@ -33,37 +135,15 @@ while True:
             br.driveForMillis(millis=30000, speedPct=100, gyro=False)
 
     # It will now launch the mission coresponding to the color
-    if col == Color.SENSOR_YELLOW:
-        print("Launching Yellow")
-        noah2.Run(br)
-        br.waitForForwardButton()
-
-        shaila.Run(br)
-
-    if col == Color.SENSOR_GREEN:
-        print("Launching Green")
-        GiosToast.Run(br)
-
-    if col == Color.SENSOR_LIME:
-        print("Launching Lime")
-        noahsdice.Run(br)
-
-    # if col == Color.SENSOR_MAGENTA:
-    #     print("Launching Magenta")
-    #     shaila.Run(br)
-
-    if col == Color.SENSOR_WHITE:
-        print("Launching White")
-        shaila2.Run(br)
-
-    if col == Color.SENSOR_ORANGE:
-        print("Launching Orange")
-        noah4.Run(br)
-
-    if col == Color.SENSOR_RED or col == Color.SENSOR_MAGENTA:
-        print("Launching Red/Magenta")
-        carternoah.Run(br)
-
-    if col == Color.SENSOR_BLUE:
-        print("Launching Blue")
-        Carovanni.Run(br)
+    print("Color confidence: " + str(classifier.confidence))
+    names = MISSIONS.get(col, ())
+    for i in range(len(names)):
+        if i > 0:
+            br.waitForForwardButton()
+        # Right after boot the gyro may not be calibrated yet, so the
+        # first mission waits for it
+        if not imuChecked:
+            br.waitForImuReady()
+            imuChecked = True
+        print("Launching " + names[i])
+        RunMission(names[i])
@@ -0,0 +1,10 @@
+# Made by tools/motor_sysid.py from the "SYSID,..." lines that
+# help/coach/motorSysId.py prints. Don't edit by hand, run the
+# test on the robot again instead.
+#
+# For every robot, by hub name: the battery voltage (mV) during the
+# test, and for each drive motor (time constant ms, deg/sec per % of
+# power, deadband % of power, backlash deg). BaseRobot and
+# tools/motion_model.py use them, FLL_Program1.py uses the same
+# values from model_motoare.py.
+MOTOR_MODELS: dict = {}
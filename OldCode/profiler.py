@@ -0,0 +1,118 @@
+from pybricks.tools import StopWatch
+
+# How many calls the profiler can remember per mission. Calls after that
+# are counted but not recorded.
+PROFILE_SIZE: int = 300
+
+
+class Profiler:
+    """
+    Records how long every public BaseRobot method takes while a mission \
+        runs, so we can see where the 150 seconds go.
+    Wraps the public methods of one BaseRobot object. Each call stores its \
+        method, start and end time (ms) and arguments into lists that are \
+        made once up front, so recording doesn't slow the robot down. \
+        Nothing is printed until dump() is called.
+    dump() prints compact "TL,..." lines. Save the output to a file and \
+        feed it to tools/timeline_report.py for a per-mission and \
+        per-command breakdown with the slowest steps.
+    Example usage:
+        >>> br = BaseRobot()
+        >>> profiler = Profiler(br)
+        >>> profiler.startMission("noah2")
+        >>> noah2.Run(br)
+        >>> profiler.dump()
+    Attributes:
+        names (list[str]): The method names that were wrapped.
+        dropped (int): Calls that did not fit in the buffer.
+    """
+
+    def __init__(self, robot, size: int = PROFILE_SIZE):
+        self.size: int = size
+        self.names: list = []
+        self._method = [0] * size
+        self._start = [0] * size
+        self._end = [0] * size
+        self._depth = [0] * size
+        self._args = [None] * size
+        self._kwargs = [None] * size
+        self._count: int = 0
+        self._active: int = 0
+        self.dropped: int = 0
+        self.mission: str = ""
+        self._watch: StopWatch = StopWatch()
+        for name in dir(type(robot)):
+            if name.startswith("_"):
+                continue
+            # Look on the class, so properties like colorSensor are skipped
+            # without setting up the hardware behind them
+            if not callable(getattr(type(robot), name)):
+                continue
+            method = getattr(robot, name)
+            self.names.append(name)
+            # An instance attribute hides the method of the class
+            setattr(robot, name, self._wrap(len(self.names) - 1, method))
+
+    def _wrap(self, index: int, method):
+        def wrapper(*args, **kwargs):
+            slot: int = self._count
+            self._count += 1
+            if slot >= self.size:
+                self.dropped += 1
+                return method(*args, **kwargs)
+            self._method[slot] = index
+            self._depth[slot] = self._active
+            self._args[slot] = args
+            self._kwargs[slot] = kwargs
+            self._start[slot] = self._watch.time()
+            self._active += 1
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._active -= 1
+                self._end[slot] = self._watch.time()
+
+        return wrapper
+
+    def startMission(self, name: str):
+        """Forgets the recorded calls and starts timing a new mission."""
+        self.mission = name
+        self._count = 0
+        self.dropped = 0
+        self._watch.reset()
+
+    def dump(self):
+        """Prints the recorded calls of the current mission as TL lines:
+        TL,mission,name,total ms,dropped calls
+        TL,call,method,start ms,end ms,depth,arguments
+        TL,end"""
+        total: int = self._watch.time()
+        print(
+            "TL,mission,"
+            + self.mission
+            + ","
+            + str(total)
+            + ","
+            + str(self.dropped)
+        )
+        for i in range(min(self._count, self.size)):
+            args: str = ";".join([repr(a) for a in self._args[i]])
+            for key in self._kwargs[i]:
+                args += (";" if args else "") + key + "="
+                args += repr(self._kwargs[i][key])
+            print(
+                "TL,call,"
+                + self.names[self._method[i]]
+                + ","
+                + str(self._start[i])
+                + ","
+                + str(self._end[i])
+                + ","
+                + str(self._depth[i])
+                + ","
+                + args.replace(",", " ")
+            )
+            # Let go of the arguments so they can be garbage collected
+            self._args[i] = None
+            self._kwargs[i] = None
+        print("TL,end")
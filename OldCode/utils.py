@@ -55,11 +55,47 @@ MED_MOT_MIN_SPEED_DEGSEC: int = 100
 MED_MOT_MAX_TORQUE: int = 195  # milli-newton-meters
 MED_MOT_MIN_TORQUE: int = 50  # milli-newton-meters
 
+# Stall thresholds for each attachment motor. A motor counts as stalled
+# when its load (mNm) goes above STALL_LOAD, or its speed drops below
+# STALL_SPEED_PCT percent of the commanded speed. These are placeholders
+# until they are measured: 121 is the old default of 50% torque, 30 is a
+# guess. Profile each attachment with help/coach/med_mot_load_test.py and
+# paste what it prints; do it again when an attachment changes.
+LEFT_MED_MOT_STALL_LOAD: int = 121
+LEFT_MED_MOT_STALL_SPEED_PCT: int = 30
+RIGHT_MED_MOT_STALL_LOAD: int = 121
+RIGHT_MED_MOT_STALL_SPEED_PCT: int = 30
+
+# How the UntilStalled methods watch for a stall. Every STALL_POLL_MS the
+# load, the speed and how far the motor turned since the last check are
+# compared with the thresholds above; STALL_CONFIRM_TICKS checks in a row
+# must agree, so the methods return within about 15 ms of contact. For
+# the first STALL_SPINUP_MS the motor is still speeding up, so its speed
+# and load don't count yet.
+STALL_POLL_MS: int = 5
+STALL_CONFIRM_TICKS: int = 3
+STALL_SPINUP_MS: int = 60
+
+# Battery compensation. With a low battery the motors can't reach the top
+# speeds, so the robot falls behind its speed profile and comes up short.
+# This is how fast the drive base can actually hold (as a percentage of
+# DB_MAX_SPEED_MMSEC) at a given battery voltage in mV. Between the
+# points we interpolate. These are placeholders until they are measured:
+# log a discharge with help/coach/battery_test.py (LOG_MODE = True) and
+# paste what tools/battery_predict.py prints. Measure again when the
+# motors or batteries change.
+BAT_SPEED_MODEL_MV: tuple = (7000, 7400, 7800, 8200)
+BAT_SPEED_MODEL_PCT: tuple = (80, 87, 94, 100)
+
+# How often to re-read the battery voltage, in milliseconds. The voltage
+# changes slowly, so there is no need to read it on every command.
+BATTERY_SAMPLE_MS: int = 5000
+
 
 def Rescale(
     val: int, in_min: int, in_max: int, out_min: int, out_max: int
 ) -> int:
-    neg: int = int(val / abs(val))  # will either be 1 or -1
+    neg: int = -1 if val < 0 else 1
     val = abs(val)
     if in_max == in_min:
         return 0
@@ -77,75 +113,78 @@ def Rescale(
     return int(retVal) * neg
 
 
+def RescaleTable(out_min: int, out_max: int) -> tuple:
+    """Precomputes Rescale(pct, 1, 100, out_min, out_max) for every pct \
+    from -100 to 100, so the motion commands only need a tuple lookup \
+    instead of float math. 0% maps to 0."""
+    table: list = [0] * 201
+    for pct in range(1, 101):
+        val: int = Rescale(pct, 1, 100, out_min, out_max)
+        table[100 + pct] = val
+        table[100 - pct] = -val
+    return tuple(table)
+
+
+def RescaleLookup(table: tuple, pct) -> int:
+    if pct > 100:
+        pct = 100
+    elif pct < -100:
+        pct = -100
+    return table[int(pct) + 100]
+
+
+# One table per kind of value, built once when utils is imported
+STRAIGHT_SPEED_TABLE: tuple = RescaleTable(
+    DB_MIN_SPEED_MMSEC, DB_MAX_SPEED_MMSEC
+)
+STRAIGHT_ACCEL_TABLE: tuple = RescaleTable(
+    DB_MIN_ACCEL_MMSEC2, DB_MAX_ACCEL_MMSEC2
+)
+TURN_SPEED_TABLE: tuple = RescaleTable(
+    DB_MIN_TURN_RATE_DEGSEC, DB_MAX_TURN_RATE_DEGSEC
+)
+TURN_ACCEL_TABLE: tuple = RescaleTable(
+    DB_MIN_TURN_ACCEL_DEGSEC2, DB_MAX_TURN_ACCEL_DEGSEC2
+)
+MED_MOT_SPEED_TABLE: tuple = RescaleTable(
+    MED_MOT_MIN_SPEED_DEGSEC, MED_MOT_MAX_SPEED_DEGSEC
+)
+MED_MOT_TORQUE_TABLE: tuple = RescaleTable(
+    MED_MOT_MIN_TORQUE, MED_MOT_MAX_TORQUE
+)
+DB_TORQUE_TABLE: tuple = RescaleTable(
+    DB_ABS_MIN_TORQUE_MNM, DB_ABS_MAX_TORQUE_MNM
+)
+MED_MOT_DUTY_LIMIT_TABLE: tuple = RescaleTable(5, 195)
+SENSITIVITY_TABLE: tuple = RescaleTable(1, 12)
+
+
 def RescaleStraightSpeed(speedPct) -> int:
-    return Rescale(
-        speedPct,
-        1,
-        100,
-        DB_MIN_SPEED_MMSEC,
-        DB_MAX_SPEED_MMSEC,
-    )
+    return RescaleLookup(STRAIGHT_SPEED_TABLE, speedPct)
 
 
 def RescaleStraightAccel(accelPct) -> int:
-    return Rescale(
-        accelPct,
-        1,
-        100,
-        DB_MIN_ACCEL_MMSEC2,
-        DB_MAX_ACCEL_MMSEC2,
-    )
+    return RescaleLookup(STRAIGHT_ACCEL_TABLE, accelPct)
 
 
 def RescaleTurnSpeed(turnSpeedPct) -> int:
-    # print(turnSpeedPct)
-    return Rescale(
-        turnSpeedPct,
-        1,
-        100,
-        DB_MIN_TURN_RATE_DEGSEC,
-        DB_MAX_TURN_RATE_DEGSEC,
-    )
+    return RescaleLookup(TURN_SPEED_TABLE, turnSpeedPct)
 
 
 def RescaleTurnAccel(turnAccelPct) -> int:
-    return Rescale(
-        turnAccelPct,
-        1,
-        100,
-        DB_MIN_TURN_ACCEL_DEGSEC2,
-        DB_MAX_TURN_ACCEL_DEGSEC2,
-    )
+    return RescaleLookup(TURN_ACCEL_TABLE, turnAccelPct)
 
 
 def RescaleMedMotSpeed(medMotSpeedPct) -> int:
-    return Rescale(
-        medMotSpeedPct,
-        1,
-        100,
-        MED_MOT_MIN_SPEED_DEGSEC,
-        MED_MOT_MAX_SPEED_DEGSEC,
-    )
+    return RescaleLookup(MED_MOT_SPEED_TABLE, medMotSpeedPct)
 
 
 def RescaleMedMotTorque(medMotTorquePct) -> int:
-    return Rescale(
-        medMotTorquePct,
-        1,
-        100,
-        MED_MOT_MIN_TORQUE,
-        MED_MOT_MAX_TORQUE,
-    )
+    return RescaleLookup(MED_MOT_TORQUE_TABLE, medMotTorquePct)
 
 
 def RescaleDbTorque(dbTorquePct) -> int:
-    return Rescale(
-        dbTorquePct,
-        1,
-        100,
-        DB_ABS_MIN_TORQUE_MNM,
-        DB_ABS_MAX_TORQUE_MNM,
-    )
+    return RescaleLookup(DB_TORQUE_TABLE, dbTorquePct)
 
 
 def RescaleConvertFarToCel(DegF) -> int:
@@ -153,24 +192,39 @@ def RescaleConvertFarToCel(DegF) -> int:
 
 
 def RescaleMedMotDutyLimit(medMotDutyLimitPct) -> int:
-    return Rescale(
-        medMotDutyLimitPct,
-        1,
-        100,
-        5,
-        195,
-    )
+    return RescaleLookup(MED_MOT_DUTY_LIMIT_TABLE, medMotDutyLimitPct)
 
 
 def RescaleSensitivity(sens) -> int:
-    return Rescale(
-        sens,
-        1,
-        100,
-        1,
-        12,
-    )
+    return RescaleLookup(SENSITIVITY_TABLE, sens)
 
 
 def RescaleBatteryVoltage(volts) -> int:
     return Rescale(volts, 7000, 8000, 0, 100)
+
+
+def AchievableSpeedPct(volts) -> int:
+    """Percentage of DB_MAX_SPEED_MMSEC the drive base can hold at the \
+    given battery voltage (mV), from the BAT_SPEED_MODEL tables."""
+    if volts <= BAT_SPEED_MODEL_MV[0]:
+        return BAT_SPEED_MODEL_PCT[0]
+    for i in range(1, len(BAT_SPEED_MODEL_MV)):
+        if volts <= BAT_SPEED_MODEL_MV[i]:
+            return BAT_SPEED_MODEL_PCT[i - 1] + (
+                (volts - BAT_SPEED_MODEL_MV[i - 1])
+                * (BAT_SPEED_MODEL_PCT[i] - BAT_SPEED_MODEL_PCT[i - 1])
+                // (BAT_SPEED_MODEL_MV[i] - BAT_SPEED_MODEL_MV[i - 1])
+            )
+    return BAT_SPEED_MODEL_PCT[-1]
+
+
+def MotorTopSpeedMmSec(motorModel: dict, volts: int) -> int:
+    """Straight speed (mm/sec) both drive motors can reach at the given \
+    battery voltage (mV), from a robot's model in motor_model.py: the \
+    slower motor's gain times the power left above its deadband, scaled \
+    with the battery voltage."""
+    slowest: float = min(
+        motorModel[m][1] * (100 - motorModel[m][2]) for m in ("left", "right")
+    )
+    degSec: float = slowest * volts / motorModel["mv"]
+    return int(degSec * TIRE_DIAMETER * 314 / 36000)
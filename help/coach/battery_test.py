@@ -1,10 +1,15 @@
 """ program to show the battery voltage and current consumed over time
-    Simplified arithmetic so this can also run on the movehub """
+    Simplified arithmetic so this can also run on the movehub
+
+    Set LOG_MODE = True to log a discharge under a match-like motor load
+    instead. Save the output to a file and feed it to
+    tools/battery_predict.py to see how many matches a pack has left. """
 
 from pybricks import version
 from pybricks.tools import wait
 from pybricks.tools import StopWatch
-from pybricks.parameters import Color
+from pybricks.parameters import Color, Port
+from pybricks.pupdevices import Motor
 
 print(f"version {version}")
 
@@ -34,6 +39,20 @@ DEBUG = False
 # DEBUG = True
 INTERVAL_MS = 30 * 1000  # 30 seconds in mSec
 
+# Discharge logging. Samples go into a preallocated ring buffer and are
+# printed in batches as "BAT,..." lines, so printing doesn't slow down
+# sampling.
+LOG_MODE = False
+# LOG_MODE = True
+PACK_NAME = "pack1"  # label the battery so logs from packs can be compared
+LOG_INTERVAL_MS = 200  # time between samples
+LOG_SIZE = 500  # samples in the ring buffer
+LOG_DUMP_EVERY = 250  # print the buffer every this many samples
+LOAD_PORTS = ["A", "E"]  # motors that run as the load (the drive motors)
+LOAD_SPEED = 1000  # deg/sec, asks for more than the battery can give
+MATCH_MS = 150 * 1000  # motors run for one match...
+REST_MS = 60 * 1000  # ...then rest like between matches
+
 if hw_type in ["technichub", "cityhub", "movehub"]:
     # max 6 * 1.2 Volt?
     BAT_HI = 8000  # mVolt
@@ -197,8 +216,79 @@ if DEBUG:
     print(format_like_decimal(100000))
 
 
+def log_discharge():
+    """Runs the load motors in match/rest cycles and logs time, voltage,
+    current, the speed the first load motor reached and whether the load
+    was on, until the battery is at BAT_OUT."""
+    motors = [Motor(getattr(Port, name)) for name in LOAD_PORTS]
+    log_time = [0] * LOG_SIZE
+    log_mv = [0] * LOG_SIZE
+    log_ma = [0] * LOG_SIZE
+    log_speed = [0] * LOG_SIZE
+    log_loaded = [0] * LOG_SIZE
+    head = 0  # where the next sample goes
+    unprinted = 0
+
+    def dump(count):
+        start = (head - count) % LOG_SIZE
+        for i in range(count):
+            j = (start + i) % LOG_SIZE
+            print(
+                "BAT,"
+                + str(log_time[j])
+                + ","
+                + str(log_mv[j])
+                + ","
+                + str(log_ma[j])
+                + ","
+                + str(log_speed[j])
+                + ","
+                + str(log_loaded[j])
+            )
+
+    print("BAT,pack," + PACK_NAME + "," + hw_type)
+    cycle = StopWatch()
+    loaded = 0
+    mv = HUB.battery.voltage()
+    while mv > BAT_OUT:
+        start_time = watch.time()
+        in_match = cycle.time() < MATCH_MS
+        if in_match and not loaded:
+            for motor in motors:
+                motor.run(LOAD_SPEED)
+            loaded = 1
+        elif not in_match and loaded:
+            for motor in motors:
+                motor.stop()
+            loaded = 0
+        if cycle.time() >= MATCH_MS + REST_MS:
+            cycle.reset()
+
+        mv = HUB.battery.voltage()
+        log_time[head] = start_time
+        log_mv[head] = mv
+        log_ma[head] = HUB.battery.current()
+        log_speed[head] = abs(motors[0].speed())
+        log_loaded[head] = loaded
+        head = (head + 1) % LOG_SIZE
+        unprinted += 1
+        if unprinted >= LOG_DUMP_EVERY:
+            dump(unprinted)
+            unprinted = 0
+
+        processing_time = watch.time() - start_time
+        wait(max(LOG_INTERVAL_MS - processing_time, 0))
+
+    for motor in motors:
+        motor.stop()
+    dump(unprinted)
+    print("BAT,end")
+
+
 watch = StopWatch()
 watch.reset()
+if LOG_MODE:
+    log_discharge()
 while True:
     # determine the time it took to deliver our payload and subtract that from waittime
     start_time = watch.time()  # get the current time
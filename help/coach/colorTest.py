@@ -3,10 +3,57 @@ from base_robot import *
 # This program is just for testing the values seen by the robot
 # for different colors as seen by the light sensor, and what it
 # is matched to by the BaseRobot class
+#
+# Set SAMPLE_MODE = True to collect labeled samples instead. For every
+# label in LABELS, hold that color under the sensor and press the
+# forward (LEFT) button. While the samples are taken, tilt the brick a
+# little and move it around so they include the lighting changes the
+# sensor sees in a match. The samples are printed as "HSV,..." lines at
+# the end; save the output to a file and feed it to
+# tools/color_profile.py to compute new Color.SENSOR_* values.
+SAMPLE_MODE = False
+# SAMPLE_MODE = True
+# Use the names from Color.SENSOR_* in base_robot.py. Also sample the
+# field colors the sensor can see while waiting (NONE is nothing under
+# the sensor).
+LABELS = ["WHITE", "RED", "YELLOW", "GREEN", "BLUE", "MAGENTA", "ORANGE"]
+LABELS += ["DARKGRAY", "NONE", "LIME"]
+SAMPLES = 100  # samples per label
+SAMPLE_MS = 20  # time between samples
+
 br = BaseRobot()
 
-while True:
-    curHsv = br.colorSensor.hsv(True)
-    curCol = br.colorSensor.color()
-    print(str(curHsv) + "; Matches " + str(curCol))
-    wait(500)
+if SAMPLE_MODE:
+    # Preallocated, printed after all labels are done
+    hues = [0] * (SAMPLES * len(LABELS))
+    sats = [0] * (SAMPLES * len(LABELS))
+    vals = [0] * (SAMPLES * len(LABELS))
+    for n in range(len(LABELS)):
+        print("Put " + LABELS[n] + " under the sensor, then press LEFT")
+        br.waitForForwardButton()
+        for i in range(SAMPLES):
+            curHsv = br.colorSensor.hsv(True)
+            hues[n * SAMPLES + i] = curHsv.h
+            sats[n * SAMPLES + i] = curHsv.s
+            vals[n * SAMPLES + i] = curHsv.v
+            wait(SAMPLE_MS)
+        # Let go of the button before the next label
+        wait(500)
+    for n in range(len(LABELS)):
+        for i in range(n * SAMPLES, (n + 1) * SAMPLES):
+            print(
+                "HSV,"
+                + LABELS[n]
+                + ","
+                + str(hues[i])
+                + ","
+                + str(sats[i])
+                + ","
+                + str(vals[i])
+            )
+else:
+    while True:
+        curHsv = br.colorSensor.hsv(True)
+        curCol = br.colorSensor.color()
+        print(str(curHsv) + "; Matches " + str(curCol))
+        wait(500)
@@ -1,14 +1,100 @@
 from pybricks.pupdevices import Motor
-from pybricks.parameters import Port
-from pybricks.tools import wait
+from pybricks.parameters import Port, Button
+from pybricks.hubs import PrimeHub
+from pybricks.tools import wait, StopWatch
 from pybricks import version
 
+# Profiles one attachment motor. It runs the motor freely, then while the
+# attachment is blocked, recording load, speed and angle at the control
+# rate. Then it prints the stall thresholds to paste into OldCode/utils.py,
+# where BaseRobot.moveLeftAttachmentMotorUntilStalled and
+# moveRightAttachmentMotorUntilStalled use them.
+#
+# Profile each motor with its real attachment on.
+
+MOTOR_PORT = Port.B  # Port.B = left attachment, Port.D = right attachment
+MOTOR_NAME = "LEFT"  # LEFT or RIGHT, used in the printed constant names
+SPEED = 500  # deg/sec to run the motor at while profiling
+SAMPLE_MS = 10  # time between samples
+SAMPLES = 150  # samples per phase (1.5 seconds)
+SPIN_UP_MS = 300  # let the motor get up to speed before recording
+PRINT_SAMPLES = False  # also print every sample as "LOAD,..." lines
+
 print(version)
 
-myMotor = Motor(Port.B)
+hub = PrimeHub()
+myMotor = Motor(MOTOR_PORT)
+
+# Preallocated buffers, [0] is the free phase and [1] the stalled phase
+loads = [[0] * SAMPLES, [0] * SAMPLES]
+speeds = [[0] * SAMPLES, [0] * SAMPLES]
+angles = [[0] * SAMPLES, [0] * SAMPLES]
+
+
+def record(phase: int):
+    watch = StopWatch()
+    for i in range(SAMPLES):
+        start = watch.time()
+        loads[phase][i] = abs(myMotor.load())
+        speeds[phase][i] = abs(myMotor.speed())
+        angles[phase][i] = myMotor.angle()
+        wait(max(SAMPLE_MS - (watch.time() - start), 0))
+
+
+def median(values: list) -> int:
+    return sorted(values)[len(values) // 2]
+
+
+def progress(phase: int) -> int:
+    # Average angle progress per sample, in degrees
+    return abs(angles[phase][-1] - angles[phase][0]) // (SAMPLES - 1)
+
+
+# Free running
+myMotor.run(SPEED)
+wait(SPIN_UP_MS)
+record(0)
+
+# Stalled
+myMotor.stop()
+print("Block the attachment (or put it against its end stop),")
+print("then press the left button")
+while Button.LEFT not in hub.buttons.pressed():
+    wait(10)
+myMotor.run(SPEED)
+wait(SPIN_UP_MS)
+record(1)
+myMotor.stop()
+
+if PRINT_SAMPLES:
+    for phase in range(2):
+        for i in range(SAMPLES):
+            print(
+                "LOAD,"
+                + str(phase)
+                + ","
+                + str(i * SAMPLE_MS)
+                + ","
+                + str(loads[phase][i])
+                + ","
+                + str(speeds[phase][i])
+                + ","
+                + str(angles[phase][i])
+            )
 
-myMotor.run(speed=1000)
+print("Free:    load median", median(loads[0]), "max", max(loads[0]))
+print("         speed median", median(speeds[0]), "min", min(speeds[0]))
+print("         deg/sample", progress(0))
+print("Stalled: load median", median(loads[1]), "min", min(loads[1]))
+print("         speed median", median(speeds[1]), "max", max(speeds[1]))
+print("         deg/sample", progress(1))
 
-while True:
-    print(myMotor.load())
-    wait(100)
+# Halfway between the worst free running sample and the typical stalled
+# sample, so normal load bumps don't count as a stall
+loadLimit = (max(loads[0]) + median(loads[1])) // 2
+speedLimitPct = (min(speeds[0]) + median(speeds[1])) * 50 // SPEED
+if median(loads[1]) <= max(loads[0]):
+    print("* * * Stalled load is not above free load. Was it blocked?")
+print("Paste into OldCode/utils.py:")
+print(MOTOR_NAME + "_MED_MOT_STALL_LOAD: int = " + str(loadLimit))
+print(MOTOR_NAME + "_MED_MOT_STALL_SPEED_PCT: int = " + str(speedLimitPct))
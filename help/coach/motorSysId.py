@@ -0,0 +1,150 @@
+from pybricks.hubs import PrimeHub
+from pybricks.pupdevices import Motor
+from pybricks.parameters import Port, Direction, Axis
+from pybricks.tools import wait, StopWatch
+from umath import sin, pi
+from utils import TIRE_DIAMETER, AXLE_TRACK
+
+# This program measures how the drive motors respond to power, so
+# tools/motor_sysid.py can fit a model of each motor: how fast it gets
+# to its speed (time constant), how fast it goes for the power it gets
+# (gain), how much power it needs before it turns at all (deadband) and
+# how far it turns when it changes direction before the wheel moves
+# (backlash).
+#
+# Put the robot on the mat with about 50 cm free in front of and behind
+# it, start the program and don't touch it. It runs three tests on raw
+# motor power (dc):
+# - ramps: one motor at a time, the power slowly goes up until the wheel
+#   turns, then the same backwards and forwards again. The robot pivots,
+#   and the gyro shows when the wheel really starts to move.
+# - steps: both motors jump to a power, forwards and backwards.
+# - chirp: both motors follow a sine that gets faster and faster.
+# The samples are printed as "SYSID,..." lines at the end. Save the
+# output to a file and feed it to tools/motor_sysid.py. Run it with a
+# charged battery, the model is scaled from the voltage during the test.
+#
+# The ports are the BaseRobot drive motors. For the FLL_Program1 robot
+# use Port.C and Port.F, and its wheel diameter and axle track.
+LEFT_PORT = Port.E
+RIGHT_PORT = Port.A
+WHEEL_MM = TIRE_DIAMETER
+AXLE_MM = AXLE_TRACK
+
+SAMPLE_MS = 10
+REST_MS = 400  # motors off between tests, long enough to stop
+RAMP_MS = 3000  # time to go from 0 to RAMP_MAX_PCT
+RAMP_MAX_PCT = 40
+RAMP_STOP_SPEED = 150  # deg/sec, the wheel is clearly turning
+STEP_PCTS = [30, 50, 70, 90]
+STEP_MS = 500
+CHIRP_MS = 4000
+CHIRP_PCT = 60
+CHIRP_START_HZ = 0.5
+CHIRP_END_HZ = 5
+MAX_SAMPLES = 3000
+TESTS = ["ramp_left", "ramp_right", "steps", "chirp"]
+
+hub = PrimeHub(top_side=Axis.Z, front_side=-Axis.Y)  # type: ignore
+leftMotor = Motor(LEFT_PORT, Direction.COUNTERCLOCKWISE)
+rightMotor = Motor(RIGHT_PORT)
+watch = StopWatch()
+
+# Preallocated, printed after all tests are done
+tests = [0] * MAX_SAMPLES
+times = [0] * MAX_SAMPLES
+leftPcts = [0] * MAX_SAMPLES
+rightPcts = [0] * MAX_SAMPLES
+leftAngles = [0] * MAX_SAMPLES
+rightAngles = [0] * MAX_SAMPLES
+headings = [0] * MAX_SAMPLES
+count = 0
+
+
+def Sample(test: int, leftPct: int, rightPct: int):
+    # Powers the motors and records what they did up to now
+    global count
+    leftMotor.dc(leftPct)
+    rightMotor.dc(rightPct)
+    if count < MAX_SAMPLES:
+        tests[count] = test
+        times[count] = watch.time()
+        leftPcts[count] = leftPct
+        rightPcts[count] = rightPct
+        leftAngles[count] = leftMotor.angle()
+        rightAngles[count] = rightMotor.angle()
+        headings[count] = int(hub.imu.heading() * 10)
+        count += 1
+    wait(SAMPLE_MS)
+
+
+def Rest(test: int):
+    for i in range(REST_MS // SAMPLE_MS):
+        Sample(test, 0, 0)
+
+
+def Ramp(test: int, motor: Motor, sign: int):
+    start = watch.time()
+    while True:
+        pct = sign * (RAMP_MAX_PCT * (watch.time() - start) // RAMP_MS)
+        if abs(motor.speed()) > RAMP_STOP_SPEED or abs(pct) > RAMP_MAX_PCT:
+            break
+        if motor == leftMotor:
+            Sample(test, pct, 0)
+        else:
+            Sample(test, 0, pct)
+    Rest(test)
+
+
+print("Measuring, don't touch the robot")
+wait(1000)
+testVolts = hub.battery.voltage()
+for sign in [1, -1, 1]:
+    Ramp(0, leftMotor, sign)
+for sign in [1, -1, 1]:
+    Ramp(1, rightMotor, sign)
+for pct in STEP_PCTS:
+    for sign in [1, -1]:
+        for i in range(STEP_MS // SAMPLE_MS):
+            Sample(2, sign * pct, sign * pct)
+        Rest(2)
+chirpStart = watch.time()
+while watch.time() - chirpStart < CHIRP_MS:
+    t = (watch.time() - chirpStart) / 1000
+    # The frequency goes up evenly from start to end
+    phase = CHIRP_START_HZ * t + (CHIRP_END_HZ - CHIRP_START_HZ) * t * t / (
+        2 * CHIRP_MS / 1000
+    )
+    pct = int(CHIRP_PCT * sin(2 * pi * phase))
+    Sample(3, pct, pct)
+Rest(3)
+leftMotor.stop()
+rightMotor.stop()
+
+print(
+    "SYSID,robot,"
+    + hub.system.info()["name"]
+    + ","
+    + str(testVolts)
+    + ","
+    + str(WHEEL_MM)
+    + ","
+    + str(AXLE_MM)
+)
+for i in range(count):
+    print(
+        "SYSID,"
+        + TESTS[tests[i]]
+        + ","
+        + str(times[i])
+        + ","
+        + str(leftPcts[i])
+        + ","
+        + str(rightPcts[i])
+        + ","
+        + str(leftAngles[i])
+        + ","
+        + str(rightAngles[i])
+        + ","
+        + str(headings[i])
+    )
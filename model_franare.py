@@ -0,0 +1,15 @@
+# ============================================================
+# model_franare.py
+# Generat de tools/braking_model.py din liniile FRANA afișate de
+# PrecisionRobot.drive_distance_rapid. Nu modifica de mână: fă mai
+# multe opriri pe suprafața respectivă și rulează din nou.
+# Distanța de frânare în grade motor, de la viteza v (grade/s) și
+# tensiunea mv: v * (a + b * v + c * (mv - FRANA_MV_REF) / 1000)
+# ============================================================
+
+FRANA_MV_REF = 7800
+
+# suprafață: (a, b, c). Încă nicio măsurătoare, PrecisionRobot
+# folosește FRANA_IMPLICIT.
+FRANA_MODEL = {
+}
@@ -0,0 +1,12 @@
+# ============================================================
+# model_motoare.py
+# Generat de tools/motor_sysid.py, aceleași valori ca
+# OldCode/motor_model.py. Nu modifica de mână: rulează din nou
+# help/coach/motorSysId.py pe robot și apoi tools/motor_sysid.py.
+# Pentru fiecare robot (numele hub-ului): tensiunea bateriei (mV) la
+# test și, pentru fiecare motor de deplasare, (constanta de timp ms,
+# grade/s la 1% putere, zona moartă % putere, joc în angrenaje grade).
+# ============================================================
+
+MODELE_MOTOARE = {
+}
@@ -0,0 +1,211 @@
+# ============================================================
+# recorder.py
+# Înregistrează tot ce citesc controlerele (unghiuri motoare, IMU,
+# reflexii, cronometre) și toate comenzile date motoarelor, cu timpul
+# fiecăruia. Pe calculator, tools/replay.py redă aceste citiri în
+# controlere și compară comenzile rezultate cu cele înregistrate.
+# ============================================================
+
+import gc
+
+from pybricks.tools import StopWatch
+
+try:
+    from array import array
+except ImportError:
+    from uarray import array  # type: ignore
+
+# Câte evenimente încap cel mult în buffer. Buffer-ul se afișează doar la
+# final (printarea durează, deci nu o facem în timpul traseului), așa că
+# ar trebui să încapă un traseu întreg: traseu_patrat are aproximativ
+# 7100. Ce nu mai încape se pierde și finish() spune câte.
+REC_SIZE = 8000
+# Buffer-ul ia cel mult această parte din memoria liberă la pornire, restul
+# rămâne pentru program
+REC_PARTE_MEMORIE = 0.5
+# Octeți per eveniment: timpul (4), canalul și tipul (2), locul din listă
+# (4) și, în cel mai rău caz, un float sau un tuplu de argumente (~30)
+REC_OCTETI_EVENIMENT = 40
+
+# Tipul unui eveniment: citire, comandă cu argumente doar poziționale
+# (valoarea = args) sau comandă cu argumente cu nume (valoarea = (args,
+# kwargs)), ca majoritatea comenzilor să nu mai aloce un tuplu în plus
+_COMANDA = 0
+_CITIRE = 1
+_COMANDA_KW = 2
+
+# Tipuri simple care se returnează direct, fără proxy
+_VALORI = (int, float, str, bool)
+
+
+class Recorder:
+    """
+    Înregistrează apelurile către dispozitive într-un buffer alocat o
+    singură dată. Un apel care returnează o valoare este o citire
+    (se păstrează valoarea), unul care returnează None este o comandă
+    (se păstrează argumentele).
+
+    Liniile afișate de dump():
+    REC,note,cheie,valoare      (valoare = repr, de ex. traseul)
+    REC,ch,index,nume           (nume = de ex. motor_stanga.angle)
+    REC,r,timp,index,valoare    (citire)
+    REC,c,timp,index,argumente  (comandă, argumente separate cu ;,
+                                 cele cu nume scrise cheie=valoare)
+    REC,note,pierdute,numar     (doar dacă buffer-ul s-a umplut)
+    REC,end
+    """
+
+    def __init__(self, size=None):
+        if size is None:
+            size = self.size_for_memory()
+        self.size = size
+        # Timpii și canalele stau împachetate, doar valorile sunt obiecte
+        self._timp = array("i", range(size))
+        self._canal = bytearray(size)  # Cel mult 256 de canale
+        self._tip = bytearray(size)
+        self._valoare: list = [None] * size
+        self._count = 0
+        self._pierdute = 0  # Evenimente care nu au mai încăput
+        self._canale = {}
+        self._nume_canale = []
+        self._note = []
+        self._ceas = StopWatch()
+
+    @staticmethod
+    def size_for_memory():
+        """Câte evenimente încap în REC_PARTE_MEMORIE din memoria liberă,
+        cel mult REC_SIZE."""
+        gc.collect()
+        mem_free = getattr(gc, "mem_free", None)
+        if mem_free is None:
+            return REC_SIZE  # Pe calculator
+        size = int(mem_free() * REC_PARTE_MEMORIE) // REC_OCTETI_EVENIMENT
+        if size < REC_SIZE:
+            print("Recorder: memorie pentru", size, "evenimente")
+        return min(size, REC_SIZE)
+
+    def note(self, cheie, valoare):
+        """Păstrează o informație pentru replay (traseul, dimensiunile)."""
+        self._note.append((cheie, repr(valoare)))
+
+    def _log(self, nume, tip, valoare):
+        canal = self._canale.get(nume)
+        if canal is None:
+            canal = len(self._nume_canale)
+            self._canale[nume] = canal
+            self._nume_canale.append(nume)
+        if self._count >= self.size:
+            # Nu afișăm în mijlocul traseului, ar strica sincronizarea
+            self._pierdute += 1
+            return
+        i = self._count
+        self._timp[i] = self._ceas.time()
+        self._canal[i] = canal
+        self._tip[i] = tip
+        self._valoare[i] = valoare
+        self._count += 1
+
+    def function(self, nume, functie):
+        """Returnează o funcție care apelează `functie` și înregistrează."""
+
+        def apel(*args, **kwargs):
+            rezultat = functie(*args, **kwargs)
+            if rezultat is not None:
+                self._log(nume, _CITIRE, rezultat)
+            elif kwargs:
+                self._log(nume, _COMANDA_KW, (args, kwargs))
+            else:
+                self._log(nume, _COMANDA, args)
+            return rezultat
+
+        return apel
+
+    def device(self, nume, obiect):
+        """Învelește un dispozitiv (motor, hub, senzor, cronometru)."""
+        return RecordedDevice(self, nume, obiect)
+
+    def device_class(self, clasa, nume):
+        """
+        Înlocuiește o clasă (Motor, StopWatch): fiecare obiect creat este
+        înregistrat cu următorul nume din `nume`. Dacă se creează mai
+        multe obiecte decât nume, ultimul nume se folosește pentru toate
+        (de ex. toate cronometrele merg pe canalul "ceas").
+        """
+        create = [0]
+
+        def creeaza(*args, **kwargs):
+            i = min(create[0], len(nume) - 1)
+            create[0] += 1
+            return RecordedDevice(self, nume[i], clasa(*args, **kwargs))
+
+        return creeaza
+
+    def dump(self):
+        """Afișează buffer-ul și îl golește."""
+        for cheie, valoare in self._note:
+            print("REC,note," + cheie + "," + valoare)
+        self._note = []
+        for i in range(len(self._nume_canale)):
+            print("REC,ch," + str(i) + "," + self._nume_canale[i])
+        for i in range(self._count):
+            valoare = self._valoare[i]
+            if self._tip[i] == _CITIRE:
+                tip = "r,"
+                text = repr(valoare)
+            else:
+                tip = "c,"
+                args, kwargs = valoare, {}
+                if self._tip[i] == _COMANDA_KW:
+                    args, kwargs = valoare
+                text = ";".join([repr(a) for a in args])
+                for cheie in kwargs:
+                    text += (";" if text else "") + cheie + "="
+                    text += repr(kwargs[cheie])
+            print(
+                "REC,"
+                + tip
+                + str(self._timp[i])
+                + ","
+                + str(self._canal[i])
+                + ","
+                + text
+            )
+            self._valoare[i] = None
+        self._count = 0
+
+    def finish(self):
+        """Afișează buffer-ul și marchează finalul."""
+        if self._pierdute:
+            self.note("pierdute", self._pierdute)
+        self.dump()
+        print("REC,end")
+
+
+class RecordedDevice:
+    """
+    Proxy pentru un dispozitiv: metodele lui sunt înregistrate, iar
+    atributele care sunt tot dispozitive (de ex. hub.imu) primesc la
+    rândul lor un proxy, cu numele "hub.imu".
+    """
+
+    def __init__(self, recorder, nume, obiect):
+        self._recorder = recorder
+        self._nume = nume
+        self._obiect = obiect
+        # Funcțiile înregistrate se creează o singură dată
+        self._cache = {}
+
+    def __getattr__(self, atribut):
+        rezultat = self._cache.get(atribut)
+        if rezultat is not None:
+            return rezultat
+        valoare = getattr(self._obiect, atribut)
+        nume = self._nume + "." + atribut
+        if callable(valoare):
+            rezultat = self._recorder.function(nume, valoare)
+        elif isinstance(valoare, _VALORI):
+            return valoare
+        else:
+            rezultat = RecordedDevice(self._recorder, nume, valoare)
+        self._cache[atribut] = rezultat
+        return rezultat
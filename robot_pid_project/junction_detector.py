@@ -0,0 +1,228 @@
+# ============================================================
+# junction_detector.py
+# Detectare intersecții pe linie (ramificații, cruce, capăt de linie)
+# din cele două fluxuri de reflexie, în paralel cu urmărirea liniei.
+#
+# Deocamdată e doar o bază: robotul din main.py are un singur senzor de
+# culoare, așa că nicio misiune nu folosește încă follow_line_route.
+# mission1 rămâne la urmărirea cu un senzor, pe timp.
+# ============================================================
+
+from pybricks.tools import wait, StopWatch
+
+# Evenimente returnate de JunctionDetector.update()
+EVENT_LEFT = "left"  # ramificație spre stânga
+EVENT_RIGHT = "right"  # ramificație spre dreapta
+EVENT_CROSS = "cross"  # cruce sau T (ambii senzori pe negru)
+EVENT_END = "end"  # capăt de linie (linia nu mai e găsită nici căutând)
+
+
+class JunctionDetector:
+    """
+    Clasifică fiecare pereche de citiri (stânga, dreapta) într-un tipar
+    și ridică un eveniment doar după ce tiparul se menține un număr
+    de pași consecutivi (debounce) și, pentru ramificații și cruce, pe o
+    distanță parcursă. Când robotul derivă puțin în timpul urmăririi, un
+    senzor trece doar scurt peste linie; o ramificație îl ține pe negru
+    cât robotul trece peste ea.
+
+    EVENT_END înseamnă doar că linia a dispărut dintre senzori (ambii pe
+    alb), ceea ce se întâmplă și cu o linie subțire centrată între ei;
+    follow_line_route o caută înainte să creadă că linia s-a terminat.
+    Senzorii trebuie așezați pe marginile liniei (gri), nu de o parte și
+    de alta a ei, altfel linia se „pierde” la fiecare pas.
+
+    Costul pe pas este constant: câteva comparații de numere întregi,
+    fără alocări, deci bucla de control rămâne la 100 Hz.
+    """
+
+    def __init__(
+        self,
+        dark_threshold=20,
+        light_threshold=40,
+        debounce_ticks=3,
+        branch_deg=25,
+        end_ticks=15,
+        holdoff_ticks=20,
+    ):
+        # Sub dark_threshold senzorul este considerat pe linia neagră
+        self.dark_threshold = dark_threshold
+        # Peste light_threshold senzorul este considerat pe alb
+        self.light_threshold = light_threshold
+        # Câți pași trebuie să persiste un tipar înainte de eveniment
+        self.debounce_ticks = debounce_ticks
+        # Cât trebuie să meargă robotul (grade roată) cu tiparul de
+        # ramificație sau cruce; mai puțin decât lățimea liniei
+        self.branch_deg = branch_deg
+        # Capătul liniei are nevoie de mai mulți pași (evită golurile mici)
+        self.end_ticks = end_ticks
+        # După un eveniment ignorăm tiparele cât timp trecem peste intersecție
+        self.holdoff_ticks = holdoff_ticks
+        self.reset()
+
+    def reset(self):
+        """Resetează starea internă (de ex. la începutul unui traseu)."""
+        self._pattern = None
+        self._count = 0
+        self._start_travel = 0
+        self._fired = False
+        self._holdoff = 0
+
+    def update(self, left, right, travel):
+        """
+        Procesează o pereche de citiri de reflexie. travel este distanța
+        parcursă până acum (media unghiurilor roților, în grade).
+        Returnează EVENT_* când un tipar a trecut de debounce, altfel None.
+        """
+        left_dark = left < self.dark_threshold
+        right_dark = right < self.dark_threshold
+
+        if left_dark and right_dark:
+            pattern = EVENT_CROSS
+        elif left_dark:
+            pattern = EVENT_LEFT
+        elif right_dark:
+            pattern = EVENT_RIGHT
+        elif left > self.light_threshold and right > self.light_threshold:
+            pattern = EVENT_END
+        else:
+            pattern = None
+
+        if self._holdoff > 0:
+            self._holdoff -= 1
+
+        # Tipar nou: repornim numărătoarea
+        if pattern != self._pattern:
+            self._pattern = pattern
+            self._count = 0
+            self._start_travel = travel
+            self._fired = False
+
+        if pattern is None or self._fired:
+            return None
+
+        self._count += 1
+        needed = (
+            self.end_ticks if pattern == EVENT_END else self.debounce_ticks
+        )
+        if self._count < needed or self._holdoff > 0:
+            return None
+        if (
+            pattern != EVENT_END
+            and abs(travel - self._start_travel) < self.branch_deg
+        ):
+            return None
+
+        # Un singur eveniment per apariție a tiparului
+        self._fired = True
+        self._holdoff = self.holdoff_ticks
+        return pattern
+
+
+# ------------------------------------------------------------
+# Căutarea liniei pierdute
+# ------------------------------------------------------------
+# Cât se rotește robotul pe loc în fiecare parte (grade roată) și cu ce
+# viteză (grade/s)
+SEARCH_DEG = 90
+SEARCH_SPEED = 120
+
+
+def search_line(motors, sensors, dark_threshold):
+    """
+    Rotește robotul pe loc spre stânga, apoi spre dreapta, până când un
+    senzor vede din nou linia. Dacă nu o găsește, revine la direcția de
+    la început. Returnează True dacă linia a fost găsită.
+    """
+    motor_stanga, motor_dreapta = motors
+    sensor_stanga, sensor_dreapta = sensors
+    found = False
+    # (sens, grade): stânga, înapoi prin mijloc până la dreapta, mijloc
+    for sens, deg in ((1, SEARCH_DEG), (-1, 2 * SEARCH_DEG), (1, SEARCH_DEG)):
+        start = motor_dreapta.angle()
+        motor_stanga.run(-sens * SEARCH_SPEED)
+        motor_dreapta.run(sens * SEARCH_SPEED)
+        while abs(motor_dreapta.angle() - start) < deg:
+            if (
+                sensor_stanga.reflection() < dark_threshold
+                or sensor_dreapta.reflection() < dark_threshold
+            ):
+                found = True
+                break
+            wait(10)
+        if found:
+            break
+    motor_stanga.stop()
+    motor_dreapta.stop()
+    return found
+
+
+# ------------------------------------------------------------
+# Urmărire linie cu doi senzori, condusă de evenimente
+# ------------------------------------------------------------
+def follow_line_route(
+    motors, sensors, pid, config, route, detector=None, timeout_ms=15000
+):
+    """
+    Urmărește linia cu doi senzori și avansează prin `route` la fiecare
+    eveniment așteptat, fără a opri bucla de control.
+
+    route = [(EVENT_*, actiune), ...]
+    actiune este None sau o funcție actiune(motors) apelată când apare
+    evenimentul (de ex. un viraj); după ea urmărirea continuă. Când
+    linia dispare dintre senzori, robotul o caută (search_line); doar
+    dacă nu o găsește evenimentul este EVENT_END.
+
+    Returnează numărul de pași din traseu finalizați.
+    """
+    motor_stanga, motor_dreapta = motors
+    sensor_stanga, sensor_dreapta = sensors
+    base_speed = config["base_speed"]
+    if detector is None:
+        detector = JunctionDetector()
+    detector.reset()
+
+    step = 0
+    timer = StopWatch()
+    while step < len(route) and timer.time() < timeout_ms:
+        left = sensor_stanga.reflection()
+        right = sensor_dreapta.reflection()
+
+        travel = (motor_stanga.angle() + motor_dreapta.angle()) / 2
+        event = detector.update(left, right, travel)
+        if event == EVENT_END and search_line(
+            motors, sensors, detector.dark_threshold
+        ):
+            # Linia era doar între senzori sau puțin în lateral
+            detector.reset()
+            pid.last_error = 0
+            pid.integral = 0
+            continue
+        if event is not None and event == route[step][0]:
+            print("Eveniment:", event)
+            action = route[step][1]
+            step += 1
+            if action is not None:
+                action(motors)
+                # Eroarea veche nu mai e relevantă după acțiune
+                pid.last_error = 0
+                pid.integral = 0
+            continue
+
+        # Linia este între senzori, ținta e stânga - dreapta = 0. Dacă
+        # robotul derivă spre dreapta, senzorul stâng ajunge pe linie
+        # (mai întunecat), corecția iese pozitivă și robotul virează
+        # înapoi spre stânga, ca în mission1
+        correction = pid.compute(0, left - right)
+        if correction > base_speed:
+            correction = base_speed
+        elif correction < -base_speed:
+            correction = -base_speed
+
+        motor_stanga.run(base_speed - correction)
+        motor_dreapta.run(base_speed + correction)
+        wait(10)
+
+    motor_stanga.stop()
+    motor_dreapta.stop()
+    return step
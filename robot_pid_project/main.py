@@ -25,7 +25,12 @@ motors = (motor_stanga, motor_dreapta)
 # Citim config-ul
 # ------------------------------------------------------------
 config = read_config()
-pid = PIDController(config["Kp"], config["Ki"], config["Kd"])
+# Câștigurile sunt reglate pentru CAL_REFERENCE_CONTRAST; calibrarea
+# salvează cât trebuie scalate pentru contrastul de pe masa de acum
+scale = config["gain_scale"]
+pid = PIDController(
+    config["Kp"] * scale, config["Ki"] * scale, config["Kd"] * scale
+)
 
 # ------------------------------------------------------------
 # Meniu de selecție misiune cu butoanele hub-ului
@@ -5,11 +5,109 @@
 
 from pybricks.tools import wait
 
+try:
+    import struct
+except ImportError:
+    import ustruct as struct
+
+try:
+    import os
+except ImportError:
+    import uos as os
+
 
 # ------------------------------------------------------------
-# Citește configurația din fișier
+# Format binar pentru configurație
+# ------------------------------------------------------------
+# Antet: "PC", versiunea formatului, numărul de valori (4 octeți)
+# Corp:  valorile ca float32 little-endian, în ordinea din CONFIG_SCHEMA
+# Final: suma de control Fletcher-16 peste antet și corp (2 octeți)
+#
+# CONFIG_SCHEMA se poate doar extinde la final: un fișier mai vechi, cu
+# mai puține valori, se citește în continuare și primește valorile
+# implicite pentru cheile noi.
+CONFIG_FILE = "config.bin"
+LEGACY_CONFIG_FILE = "config.txt"
+CONFIG_MAGIC = b"PC"
+CONFIG_VERSION = 1
+CONFIG_SCHEMA = (
+    "Kp",
+    "Ki",
+    "Kd",
+    "base_speed",
+    "target_reflection",
+    "gain_scale",
+    "reflection_noise",
+)
+CONFIG_DEFAULTS = {
+    "Kp": 0.8,
+    "Ki": 0.02,
+    "Kd": 0.4,
+    "base_speed": 150,
+    "target_reflection": 50,
+    "gain_scale": 1.0,  # scalarea lui Kp/Ki/Kd în main.py (din calibrare)
+    "reflection_noise": 0,  # varianța zgomotului senzorului (din calibrare)
+}
+
+# Ce se află acum pe disc, ca să nu rescriem fișierul degeaba
+_saved_bytes = None
+
+
+def _checksum(data):
+    a = 0
+    b = 0
+    for x in data:
+        a = (a + x) % 255
+        b = (b + a) % 255
+    return (b << 8) | a
+
+
+def _encode_config(config):
+    values = [
+        float(config.get(key, CONFIG_DEFAULTS[key])) for key in CONFIG_SCHEMA
+    ]
+    body = struct.pack(
+        "<2sBB%df" % len(values),
+        CONFIG_MAGIC,
+        CONFIG_VERSION,
+        len(values),
+        *values,
+    )
+    return body + struct.pack("<H", _checksum(body))
+
+
+def _decode_config(data):
+    """Returnează dicționarul de configurare sau None dacă datele sunt
+    corupte (antet greșit, lungime greșită sau sumă de control greșită)."""
+    if data is None or len(data) < 6 or data[:2] != CONFIG_MAGIC:
+        return None
+    version, count = data[2], data[3]
+    if version != CONFIG_VERSION or count > len(CONFIG_SCHEMA):
+        return None
+    size = 4 + 4 * count
+    if len(data) != size + 2:
+        return None
+    if struct.unpack("<H", data[size:])[0] != _checksum(data[:size]):
+        return None
+    values = struct.unpack("<%df" % count, data[4:size])
+    config = dict(CONFIG_DEFAULTS)
+    for i in range(count):
+        config[CONFIG_SCHEMA[i]] = values[i]
+    return config
+
+
+def _read_bytes(filename):
+    try:
+        with open(filename, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
 # ------------------------------------------------------------
-def read_config(filename="config.txt"):
+# Citește vechiul config.txt (key=value), folosit doar la migrare
+# ------------------------------------------------------------
+def _read_text_config(filename=LEGACY_CONFIG_FILE):
     config = {}
     try:
         with open(filename, "r") as f:
@@ -19,37 +117,192 @@ def read_config(filename="config.txt"):
                     key, value = line.split("=")
                     config[key.strip()] = float(value.strip())
     except OSError:
+        return None
+    return config
+
+
+# ------------------------------------------------------------
+# Citește configurația din fișier
+# ------------------------------------------------------------
+def read_config(filename=CONFIG_FILE):
+    global _saved_bytes
+    # Fișierul principal, apoi cel temporar (dacă scrierea a fost
+    # întreruptă după ce fișierul vechi a fost șters)
+    for name in (filename, filename + ".tmp"):
+        data = _read_bytes(name)
+        config = _decode_config(data)
+        if config is not None:
+            _saved_bytes = data if name == filename else None
+            return config
+
+    # Migrare din config.txt
+    legacy = _read_text_config()
+    if legacy is None:
         print("⚠️ Fișierul de configurare nu a fost găsit.")
+        return dict(CONFIG_DEFAULTS)
+    config = dict(CONFIG_DEFAULTS)
+    for key, value in legacy.items():
+        if key in config:
+            config[key] = value
+        else:
+            print("⚠️ Cheie necunoscută ignorată:", key)
+    write_config(config, filename)
     return config
 
 
 # ------------------------------------------------------------
-# Scrie configurația în fișier
+# Scrie configurația în fișier (doar dacă s-a schimbat ceva)
+# Scriem întâi un fișier temporar și apoi îl redenumim, ca o pană de
+# curent în timpul scrierii să nu strice configurația existentă.
 # ------------------------------------------------------------
-def write_config(config, filename="config.txt"):
+def write_config(config, filename=CONFIG_FILE):
+    global _saved_bytes
+    data = _encode_config(config)
+    if data == _saved_bytes:
+        return False
+    tmp = filename + ".tmp"
     try:
-        with open(filename, "w") as f:
-            for key, value in config.items():
-                f.write(f"{key}={value}\n")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        try:
+            os.rename(tmp, filename)
+        except OSError:
+            # Unele sisteme de fișiere nu suprascriu la redenumire
+            os.remove(filename)
+            os.rename(tmp, filename)
     except OSError:
         print("⚠️ Eroare la scrierea fișierului de configurare.")
+        return False
+    _saved_bytes = data
+    return True
 
 
 # ------------------------------------------------------------
 # Calibrare senzor de culoare
-# (măsoară valoarea alb și negru, apoi setează media ca target)
+# Senzorul este plimbat peste marginea liniei (robotul se rotește stânga-
+# dreapta dacă primim motoarele, altfel îl mișcăm cu mâna) și citirile
+# intră într-o histogramă prealocată (0..100), din care calculăm mediana
+# și percentilele fără sortare. Calibrarea se termină când nivelurile de
+# negru și alb nu se mai schimbă.
 # ------------------------------------------------------------
-def calibrate_sensor(sensor, hub, config):
-    hub.display.text("WHITE")
-    wait(2000)
-    white_val = sensor.reflection()
-    hub.display.text("BLACK")
-    wait(2000)
-    black_val = sensor.reflection()
+CAL_MAX_SAMPLES = 500  # numărul maxim de citiri (5 s la 10 ms)
+CAL_MIN_SAMPLES = 60  # nu verificăm convergența mai devreme
+CAL_CHECK_EVERY = 20  # câte citiri între verificări
+CAL_TOLERANCE = 1  # cât se pot mișca nivelurile între două verificări
+CAL_MIN_CONTRAST = 15  # sub acest contrast nu am văzut și alb și negru
+CAL_SWEEP_SPEED = 80  # deg/s pentru rotirea stânga-dreapta
+CAL_SWEEP_MS = 400  # cât durează o jumătate de baleiere
+# Contrastul (alb - negru) pentru care au fost reglate Kp, Ki și Kd.
+# Cu un contrast mai mic eroarea e mai mică, deci câștigurile cresc.
+CAL_REFERENCE_CONTRAST = 70
+
+
+def _percentile(hist, total, pct):
+    """Valoarea sub care se află pct% din citiri."""
+    target = total * pct // 100
+    count = 0
+    for value in range(len(hist)):
+        count += hist[value]
+        if count > target:
+            return value
+    return len(hist) - 1
+
+
+def _variance(hist, low, high):
+    """Varianța citirilor cu valori între low și high (inclusiv)."""
+    n = 0
+    total = 0
+    for value in range(low, high + 1):
+        n += hist[value]
+        total += hist[value] * value
+    if n < 2:
+        return 0
+    mean = total / n
+    sq = 0
+    for value in range(low, high + 1):
+        sq += hist[value] * (value - mean) * (value - mean)
+    return sq / (n - 1)
+
+
+def calibrate_sensor(sensor, hub, config, motors=None, timeout_ms=8000):
+    hub.display.text("SWEEP")
+    hist = [0] * 101
+    n = 0
+    black = white = -1
+    converged = False
+    direction = 1
+    sweep_time = CAL_SWEEP_MS // 2  # prima baleiere e pe jumătate
+
+    elapsed = 0
+    while elapsed < timeout_ms and n < CAL_MAX_SAMPLES:
+        if motors is not None:
+            motors[0].run(CAL_SWEEP_SPEED * direction)
+            motors[1].run(-CAL_SWEEP_SPEED * direction)
+            sweep_time -= 10
+            if sweep_time <= 0:
+                direction = -direction
+                sweep_time = CAL_SWEEP_MS
+
+        value = sensor.reflection()
+        value = 0 if value < 0 else 100 if value > 100 else value
+        hist[value] += 1
+        n += 1
+
+        if n >= CAL_MIN_SAMPLES and n % CAL_CHECK_EVERY == 0:
+            new_black = _percentile(hist, n, 10)
+            new_white = _percentile(hist, n, 90)
+            if (
+                new_white - new_black >= CAL_MIN_CONTRAST
+                and abs(new_black - black) <= CAL_TOLERANCE
+                and abs(new_white - white) <= CAL_TOLERANCE
+            ):
+                converged = True
+                break
+            black, white = new_black, new_white
+
+        wait(10)
+        elapsed += 10
+
+    if motors is not None:
+        motors[0].stop()
+        motors[1].stop()
+
+    black = _percentile(hist, n, 10)
+    white = _percentile(hist, n, 90)
+    contrast = white - black
+    target = (black + white) / 2
+    # Zgomotul se măsoară doar pe platourile de negru și alb, nu pe
+    # citirile de pe margine
+    noise = (
+        _variance(hist, 0, (black + int(target)) // 2)
+        + _variance(hist, (white + int(target)) // 2, 100)
+    ) / 2
+
+    print(
+        "Calibrare:",
+        n,
+        "citiri, negru",
+        black,
+        "alb",
+        white,
+        "mediana",
+        _percentile(hist, n, 50),
+        "zgomot",
+        noise,
+    )
+    if contrast < CAL_MIN_CONTRAST:
+        print("⚠️ Contrast prea mic, păstrăm calibrarea veche.")
+        hub.display.text("FAIL")
+        wait(1000)
+        return False
+    if not converged:
+        print("⚠️ Calibrarea nu s-a stabilizat, folosim ce avem.")
 
-    target = (white_val + black_val) / 2
     config["target_reflection"] = target
+    config["gain_scale"] = CAL_REFERENCE_CONTRAST / contrast
+    config["reflection_noise"] = noise
     write_config(config)
 
     hub.display.text("DONE")
     wait(1000)
+    return True
@@ -0,0 +1,378 @@
+"""Turns a path into a chain of straight lines and curves for BaseRobot.
+
+Most missions stop, turn in place and drive again. BaseRobot.curve and
+driveForDistance can be chained with then=Stop.NONE so the robot keeps
+rolling from one to the next. This tool takes any path (a list of x, y
+points in mm) and finds a short chain of lines and curves that stays
+within --tolerance mm of it: the fewest straight lines that follow the
+path, with every corner between them rounded into a curve. Every piece
+starts in the direction the piece before it ended, so the chain never
+has to stop. Only where the path has a corner too sharp to round within
+the tolerance does the robot stop and turn in place.
+
+The steps are printed as BaseRobot calls to paste into a mission, and in
+the step format of OldCode/field_routes.py. The time of the chain and of
+the same path driven as drive, turn, drive are estimated with
+tools/motion_model.py.
+
+The path file has one "x,y" line per point; lines that don't start with
+a number are skipped. The robot starts at the first point, facing the
+second one unless --heading (degrees, counterclockwise from the x axis
+like tools/field_map.py) says otherwise. --route takes a route planned
+by tools/field_planner.py instead. --benchmark compares both ways of
+driving for all planned routes and a few test paths.
+
+Examples:
+
+    python tools/arc_chain.py path.csv --tolerance 15
+    python tools/arc_chain.py --route home_left_to_forge
+    python tools/arc_chain.py --benchmark
+"""
+
+import argparse
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import motion_model  # noqa: E402
+
+TOLERANCE_MM = 15
+# Points the path is cut into before fitting
+POINT_STEP_MM = 10
+# Corners that need a tighter curve than this are turns in place
+MIN_RADIUS_MM = 40
+SPEED_PCT = 80
+
+
+def read_path(path):
+    points = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.replace(";", ",").split(",")
+            try:
+                points.append((float(parts[0]), float(parts[1])))
+            except (ValueError, IndexError):
+                continue
+    return points
+
+
+def densify(points, step=POINT_STEP_MM):
+    """The path with a point every step mm."""
+    result = [points[0]]
+    for a, b in zip(points, points[1:]):
+        n = max(1, int(math.dist(a, b) / step))
+        for i in range(1, n + 1):
+            result.append(
+                (a[0] + (b[0] - a[0]) * i / n, a[1] + (b[1] - a[1]) * i / n)
+            )
+    return result
+
+
+def fillet(a, b, c, tolerance):
+    """The widest curve at corner b of the lines a-b and b-c that stays
+    within tolerance of the corner and fits in half of each line.
+    Returns (radius, turn in degrees counterclockwise, mm taken off each
+    line), radius 0 when the corner is too sharp to round."""
+    d_in = math.atan2(b[1] - a[1], b[0] - a[0])
+    d_out = math.atan2(c[1] - b[1], c[0] - b[0])
+    turn = math.degrees(d_out - d_in + math.pi) % 360 - 180
+    half = math.radians(abs(turn)) / 2
+    if half == 0:
+        return 0, 0.0, 0.0
+    # The middle of the curve is tolerance away from the corner
+    radius = tolerance / (1 / math.cos(half) - 1) if half < 1.5 else 0
+    room = min(math.dist(a, b), math.dist(b, c)) / 2
+    radius = min(radius, room / math.tan(half))
+    if radius < MIN_RADIUS_MM:
+        return 0, turn, 0.0
+    return radius, turn, radius * math.tan(half)
+
+
+def fit_chain(points, heading, tolerance=TOLERANCE_MM):
+    """Returns the BaseRobot steps ("drive", mm), ("curve", radius,
+    angle) and ("turn", angle) for the path; angles positive to the
+    right like BaseRobot. heading is in degrees, counterclockwise.
+
+    The path is first cut down to the fewest corners that stay within
+    half the tolerance, then every corner is rounded with a curve that
+    stays within the other half. Lines and curves meet in the same
+    direction, so they chain without stopping; only corners too sharp
+    for MIN_RADIUS_MM are turns in place."""
+    corners = simplify(densify(points), tolerance / 2)
+    if len(corners) < 2:
+        return []
+    first = math.atan2(
+        corners[1][1] - corners[0][1], corners[1][0] - corners[0][0]
+    )
+    pieces = [("turn", (math.degrees(first) - heading + 180) % 360 - 180)]
+    lengths = [math.dist(a, b) for a, b in zip(corners, corners[1:])]
+    curves = []
+    for i in range(1, len(corners) - 1):
+        radius, turn, cut = fillet(
+            corners[i - 1], corners[i], corners[i + 1], tolerance / 2
+        )
+        lengths[i - 1] -= cut
+        lengths[i] -= cut
+        curves.append((radius, turn))
+    for i, length in enumerate(lengths):
+        pieces.append(("drive", length))
+        if i < len(curves):
+            radius, turn = curves[i]
+            if radius:
+                pieces.append(("curve", radius, turn))
+            else:
+                pieces.append(("turn", turn))
+    return round_steps(pieces)
+
+
+def round_steps(pieces):
+    """Rounds to whole mm and degrees like BaseRobot takes them. The
+    total heading is rounded, not every angle, so the rounding doesn't
+    add up along the chain. Angles become positive to the right."""
+    steps = []
+    exact = 0.0
+    done = 0
+    for piece in pieces:
+        if piece[0] == "drive":
+            if round(piece[1]):
+                steps.append(("drive", round(piece[1])))
+            continue
+        exact += piece[-1]
+        angle = round(exact) - done
+        done += angle
+        if angle == 0:
+            continue
+        if piece[0] == "turn":
+            steps.append(("turn", -angle))
+        else:
+            steps.append(("curve", round(piece[1]), -angle))
+    return merge(steps)
+
+
+def merge(steps):
+    """Joins lines that follow each other."""
+    result = []
+    for step in steps:
+        if result and step[0] == "drive" and result[-1][0] == "drive":
+            result[-1] = ("drive", result[-1][1] + step[1])
+        elif step != ("turn", 0):
+            result.append(step)
+    return result
+
+
+def simplify(points, tolerance):
+    """Douglas-Peucker: the fewest corners within tolerance."""
+    if len(points) < 3:
+        return list(points)
+    a, b = points[0], points[-1]
+    length = math.dist(a, b)
+    worst, index = 0.0, 0
+    for i in range(1, len(points) - 1):
+        p = points[i]
+        if length:
+            d = (
+                abs(
+                    (b[0] - a[0]) * (a[1] - p[1])
+                    - (a[0] - p[0]) * (b[1] - a[1])
+                )
+                / length
+            )
+        else:
+            d = math.dist(a, p)
+        if d > worst:
+            worst, index = d, i
+    if worst <= tolerance:
+        return [a, b]
+    left = simplify(points[: index + 1], tolerance)
+    return left[:-1] + simplify(points[index:], tolerance)
+
+
+def drive_turn_steps(points, heading, tolerance=TOLERANCE_MM):
+    """The same path driven the usual way: turn in place, drive, stop."""
+    corners = simplify(densify(points), tolerance)
+    steps = []
+    for a, b in zip(corners, corners[1:]):
+        direction = math.degrees(math.atan2(b[1] - a[1], b[0] - a[0]))
+        turn = round((direction - heading + 180) % 360 - 180)
+        if turn:
+            steps.append(("turn", -turn))
+        steps.append(("drive", round(math.dist(a, b))))
+        heading = direction
+    return steps
+
+
+def advance(pose, k, length):
+    """Where a line (k = 0) or curve of curvature k ends, from pose (x,
+    y, heading in radians)."""
+    x, y, heading = pose
+    if k == 0:
+        return (
+            x + length * math.cos(heading),
+            y + length * math.sin(heading),
+            heading,
+        )
+    turn = k * length
+    return (
+        x + (math.sin(heading + turn) - math.sin(heading)) / k,
+        y - (math.cos(heading + turn) - math.cos(heading)) / k,
+        heading + turn,
+    )
+
+
+def trace(start, heading, steps):
+    """Points every 5 mm along the steps, to check the tolerance."""
+    pose = (start[0], start[1], math.radians(heading))
+    points = [start]
+    for step in steps:
+        if step[0] == "turn":
+            pose = (pose[0], pose[1], pose[2] - math.radians(step[1]))
+            continue
+        if step[0] == "drive":
+            k, length = 0, step[1]
+        else:
+            k = -math.copysign(1 / step[1], step[2])
+            length = math.radians(abs(step[2])) * step[1]
+        for n in range(1, max(1, int(length / 5)) + 1):
+            p = advance(pose, k, length * n / max(1, int(length / 5)))
+            points.append(p[:2])
+        pose = advance(pose, k, length)
+    return points
+
+
+def deviation(path, steps, heading):
+    """Largest distance from a point of the path to the driven chain."""
+    driven = trace(path[0], heading, steps)
+    return max(min(math.dist(p, q) for q in driven) for p in densify(path))
+
+
+def print_calls(steps, speed_pct):
+    for i, step in enumerate(steps):
+        last = i == len(steps) - 1 or steps[i + 1][0] == "turn"
+        then = "Stop.BRAKE" if last or step[0] == "turn" else "Stop.NONE"
+        if step[0] == "turn":
+            print(f"    br.turnInPlace(angle={step[1]})")
+        elif step[0] == "drive":
+            print(
+                f"    br.driveForDistance(distance={step[1]}, "
+                f"speedPct={speed_pct}, then={then})"
+            )
+        else:
+            print(
+                f"    br.curve(radius={step[1]}, angle={step[2]}, "
+                f"speedPct={speed_pct}, then={then})"
+            )
+
+
+def compare(name, path, heading, tolerance, speed_pct):
+    """Returns (chain steps, chain ms, drive-turn steps, drive-turn ms,
+    chain deviation)."""
+    chain = fit_chain(path, heading, tolerance)
+    usual = drive_turn_steps(path, heading, tolerance)
+    return (
+        chain,
+        motion_model.route_ms(chain, speed_pct),
+        usual,
+        motion_model.route_ms(usual, speed_pct, chain=False),
+        deviation(path, chain, heading),
+    )
+
+
+def test_paths():
+    """A few paths with curves that missions often drive."""
+    s_curve = [
+        (x, 150 * math.sin(x / 400 * math.pi)) for x in range(0, 801, 20)
+    ]
+    quarter = [
+        (300 * math.sin(a / 20), 300 - 300 * math.cos(a / 20))
+        for a in range(0, 32)
+    ]
+    zigzag = [(0, 0), (300, 0), (500, 200), (800, 200), (800, 500)]
+    return {"s-curve": s_curve, "quarter circle": quarter, "zigzag": zigzag}
+
+
+def planned_routes():
+    """{name: (points, heading)} for the routes in the planner's cache."""
+    import field_map
+    import field_planner
+
+    waypoints = field_planner.plan_all(field_planner.PrecisionTimes())
+    routes = {}
+    for name, points in waypoints.items():
+        heading = field_map.POSES[field_map.ROUTES[name][0]][2]
+        routes[name] = (points, heading)
+    return routes
+
+
+def first_heading(points):
+    a, b = points[0], points[1]
+    return math.degrees(math.atan2(b[1] - a[1], b[0] - a[0]))
+
+
+def benchmark(tolerance, speed_pct):
+    paths = {n: (p, first_heading(p)) for n, p in test_paths().items()}
+    paths.update(planned_routes())
+    print(
+        f"\n{'path':<30}{'drive-turn':>11}{'chain':>8}{'saved':>8}"
+        f"{'steps':>9}{'off by':>8}"
+    )
+    total_usual = 0.0
+    total_chain = 0.0
+    for name, (path, heading) in paths.items():
+        chain, chain_ms, usual, usual_ms, off = compare(
+            name, path, heading, tolerance, speed_pct
+        )
+        total_usual += usual_ms
+        total_chain += chain_ms
+        print(
+            f"{name:<30}{usual_ms / 1000:>10.2f}s{chain_ms / 1000:>7.2f}s"
+            f"{100 * (1 - chain_ms / usual_ms):>7.0f}%"
+            f"{len(usual):>4} ->{len(chain):>3}{off:>6.0f}mm"
+        )
+    print(
+        f"{'all':<30}{total_usual / 1000:>10.2f}s"
+        f"{total_chain / 1000:>7.2f}s"
+        f"{100 * (1 - total_chain / total_usual):>7.0f}%"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", nargs="?", help="file with x,y points")
+    parser.add_argument("--route", help="a route from field_planner.py")
+    parser.add_argument("--heading", type=float, help="start heading")
+    parser.add_argument(
+        "--tolerance", type=float, default=TOLERANCE_MM, help="mm"
+    )
+    parser.add_argument("--speed-pct", type=int, default=SPEED_PCT)
+    parser.add_argument("--benchmark", action="store_true")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.tolerance, args.speed_pct)
+        return
+    if args.route:
+        path, heading = planned_routes()[args.route]
+    elif args.path:
+        path = read_path(args.path)
+        heading = first_heading(path)
+    else:
+        parser.error("give a path file, --route or --benchmark")
+    if args.heading is not None:
+        heading = args.heading
+    chain, chain_ms, usual, usual_ms, off = compare(
+        args.route or args.path, path, heading, args.tolerance, args.speed_pct
+    )
+    print(f"Start at {path[0]}, facing {heading:.0f} degrees\n")
+    print_calls(chain, args.speed_pct)
+    print("\nAs steps for OldCode/field_routes.py:")
+    print("    (" + ", ".join(repr(s) for s in chain) + ")")
+    print(
+        f"\n{len(chain)} steps, {chain_ms / 1000:.2f} s, at most {off:.0f} mm"
+        f" off the path. Drive, turn, drive: {len(usual)} steps,"
+        f" {usual_ms / 1000:.2f} s."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Predicts how many matches a battery pack has left from discharge logs.
+
+Reads the "BAT,..." lines that help/coach/battery_test.py prints in
+LOG_MODE. For every pack it fits the voltage under load against the
+time the load has been running, and predicts how many more 150 second
+matches fit before the voltage under load drops below BAT_LOW.
+
+It also fits the speed the load motor reached against the voltage and
+prints BAT_SPEED_MODEL_MV/PCT values that can be pasted into
+OldCode/utils.py, and BAT_MODEL_MV/VITEZA values for FLL_Program1.py
+(set LOAD_PORTS in battery_test.py to that robot's drive motors first).
+
+Save each discharge run to its own file. Example:
+
+    pybricksdev run ble --name BOB help/coach/battery_test.py > pack1.log
+    python tools/battery_predict.py pack1.log pack2.log
+"""
+
+import argparse
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "OldCode"))
+from utils import DB_MAX_SPEED_MMSEC, TIRE_DIAMETER  # noqa: E402
+
+MATCH_S = 150
+BAT_LOW = 7000  # mV, same as battery_test.py for the prime hub
+SPEED_BIN_MV = 200
+
+
+def read_logs(paths):
+    """Returns {pack name: [(time ms, mV, mA, speed, loaded)]}."""
+    packs = {}
+    for path in paths:
+        pack = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if not line.startswith("BAT,"):
+                    continue
+                fields = line.split(",")
+                if fields[1] == "pack":
+                    pack = fields[2]
+                    continue
+                if fields[1] == "end" or len(fields) != 6:
+                    continue
+                sample = tuple(int(x) for x in fields[1:])
+                packs.setdefault(pack, []).append(sample)
+    for samples in packs.values():
+        samples.sort()
+    return packs
+
+
+def loaded_curve(samples):
+    """Returns [(seconds the load has been on, mV)] for samples taken
+    while the load was on. Rest periods don't count as discharge time."""
+    curve = []
+    load_s = 0.0
+    prev_t = None
+    for t, mv, _, _, loaded in samples:
+        if prev_t is not None and loaded:
+            load_s += (t - prev_t) / 1000
+        prev_t = t
+        if loaded:
+            curve.append((load_s, mv))
+    return curve
+
+
+def fit_quadratic(points):
+    """Least squares fit of y = a + b*x + c*x^2. Returns (a, b, c)."""
+    s = [0.0] * 5
+    t = [0.0] * 3
+    for x, y in points:
+        p = 1.0
+        for k in range(5):
+            s[k] += p
+            if k < 3:
+                t[k] += p * y
+            p *= x
+    m = [[s[0], s[1], s[2], t[0]], [s[1], s[2], s[3], t[1]]]
+    m.append([s[2], s[3], s[4], t[2]])
+    # Gaussian elimination with partial pivoting
+    for col in range(3):
+        pivot = max(range(col, 3), key=lambda r: abs(m[r][col]))
+        m[col], m[pivot] = m[pivot], m[col]
+        if abs(m[col][col]) < 1e-12:
+            raise ValueError("not enough data to fit")
+        for r in range(3):
+            if r != col:
+                f = m[r][col] / m[col][col]
+                m[r] = [a - f * b for a, b in zip(m[r], m[col])]
+    return tuple(m[i][3] / m[i][i] for i in range(3))
+
+
+def time_to_voltage(coef, start_s, low_mv, horizon_s=36000):
+    """First time after start_s where the fitted curve reaches low_mv."""
+    a, b, c = coef
+    x = start_s
+    while x < start_s + horizon_s:
+        if a + b * x + c * x * x <= low_mv:
+            return x
+        x += 1.0
+    return None
+
+
+def speed_model(samples):
+    """Top loaded speed per voltage bin, in deg/sec and as a percentage
+    of the drive base top speed in utils.py. Returns [(mV, pct, deg/sec)]
+    low to high."""
+    max_degsec = DB_MAX_SPEED_MMSEC * 360 / (math.pi * TIRE_DIAMETER)
+    bins = {}
+    for _, mv, _, speed, loaded in samples:
+        if loaded and speed > 0:
+            bins.setdefault(mv // SPEED_BIN_MV * SPEED_BIN_MV, []).append(
+                speed
+            )
+    model = []
+    for mv in sorted(bins):
+        speeds = sorted(bins[mv])
+        if len(speeds) < 5:
+            continue
+        # 90th percentile, so a single fast reading doesn't count
+        top = speeds[int(len(speeds) * 0.9) - 1]
+        pct = min(100, round(100 * top / max_degsec))
+        model.append((mv + SPEED_BIN_MV // 2, pct, top))
+    return model
+
+
+def report(pack, samples, low_mv):
+    curve = loaded_curve(samples)
+    print(f"== {pack}: {len(samples)} samples")
+    if len(curve) < 10:
+        print("   not enough samples under load")
+        return
+    load_s, mv_now = curve[-1]
+    amps = [s[2] for s in samples if s[4]]
+    print(
+        f"   under load for {load_s:.0f} s, now {mv_now} mV, "
+        f"average {sum(amps) / len(amps):.0f} mA"
+    )
+    try:
+        coef = fit_quadratic(curve)
+    except ValueError as e:
+        print(f"   {e}")
+        return
+    residual = math.sqrt(
+        sum(
+            (mv - (coef[0] + coef[1] * x + coef[2] * x * x)) ** 2
+            for x, mv in curve
+        )
+        / len(curve)
+    )
+    print(
+        f"   fit: mV = {coef[0]:.0f} {coef[1]:+.3f}*s {coef[2]:+.6f}*s^2"
+        f" (rms error {residual:.0f} mV)"
+    )
+    low_s = time_to_voltage(coef, load_s, low_mv)
+    if mv_now <= low_mv:
+        print(f"   already below {low_mv} mV, swap this pack")
+    elif low_s is None:
+        print(f"   does not reach {low_mv} mV within the fitted range")
+    else:
+        remaining = low_s - load_s
+        print(
+            f"   {remaining:.0f} s of load left before {low_mv} mV: "
+            f"{int(remaining // MATCH_S)} more matches"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("logs", nargs="+", help="saved battery_test output")
+    parser.add_argument("--low", type=int, default=BAT_LOW, help="mV")
+    args = parser.parse_args()
+
+    packs = read_logs(args.logs)
+    if not packs:
+        raise SystemExit("No BAT lines found. Was LOG_MODE = True?")
+    all_samples = []
+    for pack in sorted(packs):
+        report(pack, packs[pack], args.low)
+        all_samples += packs[pack]
+
+    model = speed_model(all_samples)
+    if len(model) >= 2:
+        print("\nSpeed model for OldCode/utils.py:")
+        print(f"BAT_SPEED_MODEL_MV: tuple = {tuple(m[0] for m in model)}")
+        print(f"BAT_SPEED_MODEL_PCT: tuple = {tuple(m[1] for m in model)}")
+        print("\nSpeed model for FLL_Program1.py:")
+        print(f"BAT_MODEL_MV = {tuple(m[0] for m in model)}")
+        print(f"BAT_MODEL_VITEZA = {tuple(m[2] for m in model)}")
+
+
+if __name__ == "__main__":
+    main()
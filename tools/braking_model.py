@@ -0,0 +1,216 @@
+"""Learns the braking distance of the robot from its recorded stops.
+
+PrecisionRobot.drive_distance_rapid in FLL_Program1.py drives at full
+speed and brakes when the distance left is the braking distance, so
+it doesn't have to crawl in at 50 deg/s like drive_distance_precise.
+After every stop it prints a line:
+
+    FRANA,speed deg/s,battery mV,surface,deg after braking,deg past target
+
+This tool fits, for every surface, the braking distance in motor degrees
+as v * (a + b * v + c * (mV - FRANA_MV_REF) / 1000). The a term is the
+delay before the motors react, b is the braking itself, and c how much
+the battery changes it. It prints how well the model that was used and
+the new model predict the stops, a table of braking distances, and
+writes model_franare.py next to FLL_Program1.py. Surfaces without new
+stops keep their old values.
+
+traseu_test_franare in FLL_Program1.py stops from a few speeds. Run it
+at different battery levels, and on every surface the robot drives on
+(set SUPRAFATA first). Example:
+
+    pybricksdev run ble --name BOB FLL_Program1.py > stops1.log
+    python tools/braking_model.py stops1.log stops2.log
+"""
+
+import argparse
+import math
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+import FLL_Program1 as program  # noqa: E402
+
+MODEL_FILE = os.path.join(ROOT, "model_franare.py")
+# Below this spread of battery voltages c can't be told apart from a
+MIN_MV_SPREAD = 300
+MIN_STOPS = 5
+TABLE_SPEEDS = (200, 400, 600, 800, 1000)
+TABLE_MV_OFFSETS = (-600, 0, 400)
+
+
+def read_stops(paths):
+    """Returns {surface: [(speed, mV, deg after braking, deg past
+    target)]} in the order the surfaces appear. Stops slower than
+    FRANA_VITEZA_MIN (from older logs) are left out."""
+    stops = {}
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                fields = line.strip().split(",")
+                if fields[0] != "FRANA" or len(fields) != 6:
+                    continue
+                speed, mv, surface, braked, past = fields[1:]
+                if float(speed) < program.FRANA_VITEZA_MIN:
+                    continue
+                stops.setdefault(surface, []).append(
+                    (float(speed), int(mv), float(braked), float(past))
+                )
+    return stops
+
+
+def predict(coefs, speed, mv):
+    """Same as PrecisionRobot.distanta_franare."""
+    a, b, c = coefs
+    return speed * (a + b * speed + c * (mv - program.FRANA_MV_REF) / 1000)
+
+
+def solve(matrix, rhs):
+    """Solves matrix * x = rhs by Gaussian elimination."""
+    n = len(rhs)
+    m = [list(row) + [r] for row, r in zip(matrix, rhs)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(m[r][col]))
+        m[col], m[pivot] = m[pivot], m[col]
+        for r in range(col + 1, n):
+            f = m[r][col] / m[col][col]
+            for k in range(col, n + 1):
+                m[r][k] -= f * m[col][k]
+    x = [0.0] * n
+    for r in range(n - 1, -1, -1):
+        done = sum(m[r][k] * x[k] for k in range(r + 1, n))
+        x[r] = (m[r][n] - done) / m[r][r]
+    return x
+
+
+def fit(stops):
+    """Least squares (a, b, c). c is 0 when the battery voltages are too
+    close together to tell its effect from a's."""
+    mvs = [mv for _, mv, _, _ in stops]
+    use_mv = max(mvs) - min(mvs) >= MIN_MV_SPREAD
+    rows = []
+    targets = []
+    for speed, mv, braked, _ in stops:
+        row = [speed, speed * speed]
+        if use_mv:
+            row.append(speed * (mv - program.FRANA_MV_REF) / 1000)
+        rows.append(row)
+        targets.append(braked)
+    n = len(rows[0])
+    normal = [
+        [sum(r[i] * r[j] for r in rows) for j in range(n)] for i in range(n)
+    ]
+    rhs = [sum(r[i] * t for r, t in zip(rows, targets)) for i in range(n)]
+    coefs = solve(normal, rhs)
+    if not use_mv:
+        coefs.append(0.0)
+    return tuple(coefs)
+
+
+def to_mm(deg):
+    return deg * math.pi * program.ROBOT_WHEEL_DIAMETER_MM / 360
+
+
+def errors(coefs, stops):
+    """Typical (root mean square) and worst prediction error, in mm."""
+    diffs = [
+        to_mm(predict(coefs, speed, mv) - braked)
+        for speed, mv, braked, _ in stops
+    ]
+    rms = math.sqrt(sum(d * d for d in diffs) / len(diffs))
+    return rms, max(abs(d) for d in diffs)
+
+
+def print_surface(surface, stops, old, new):
+    speeds = [s for s, _, _, _ in stops]
+    mvs = [mv for _, mv, _, _ in stops]
+    landed = [to_mm(past) for _, _, _, past in stops]
+    print(
+        f"\n{surface}: {len(stops)} stops from {min(speeds):.0f}-"
+        f"{max(speeds):.0f} deg/s at {min(mvs)}-{max(mvs)} mV"
+    )
+    average = sum(landed) / len(landed)
+    print(
+        f"  landed {average:.1f} mm past the target on average,"
+        f" {max(landed, key=abs):.1f} mm at most"
+    )
+    for name, coefs in (("used", old), ("fitted", new)):
+        rms, worst = errors(coefs, stops)
+        print(
+            f"  {name:<7} a={coefs[0]:.4f} b={coefs[1]:.6f}"
+            f" c={coefs[2]:.5f}: off by {rms:.1f} mm typical,"
+            f" {worst:.1f} mm worst"
+        )
+    print("  braking distance in mm with the fitted model:")
+    mv_ref = program.FRANA_MV_REF
+    header = "".join(f"{mv_ref + d:>9} mV" for d in TABLE_MV_OFFSETS)
+    print(f"  {'deg/s':>7}{header}")
+    for speed in TABLE_SPEEDS:
+        cells = "".join(
+            f"{to_mm(predict(new, speed, mv_ref + d)):>12.0f}"
+            for d in TABLE_MV_OFFSETS
+        )
+        print(f"  {speed:>7}{cells}")
+
+
+def write_model(models, counts):
+    lines = [
+        "# " + "=" * 60,
+        "# model_franare.py",
+        "# Generat de tools/braking_model.py din liniile FRANA afișate de",
+        "# PrecisionRobot.drive_distance_rapid. Nu modifica de mână: fă mai",
+        "# multe opriri pe suprafața respectivă și rulează din nou.",
+        "# Distanța de frânare în grade motor, de la viteza v (grade/s) și",
+        "# tensiunea mv: v * (a + b * v + c * (mv - FRANA_MV_REF) / 1000)",
+        "# " + "=" * 60,
+        "",
+        f"FRANA_MV_REF = {program.FRANA_MV_REF}",
+        "",
+        "# suprafață: (a, b, c)",
+        "FRANA_MODEL = {",
+    ]
+    for surface, (a, b, c) in models.items():
+        note = f"{counts[surface]} opriri" if surface in counts else "vechi"
+        lines.append(
+            f'    "{surface}": ({a:.5f}, {b:.7f}, {c:.6f}),  # {note}'
+        )
+    lines.append("}")
+    with open(MODEL_FILE, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("logs", nargs="+", help="logs with FRANA lines")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only print the report, don't write model_franare.py",
+    )
+    args = parser.parse_args()
+
+    stops = read_stops(args.logs)
+    if not stops:
+        raise SystemExit("No FRANA lines found")
+    models = dict(program.FRANA_MODEL)
+    counts = {}
+    for surface, surface_stops in stops.items():
+        if len(surface_stops) < MIN_STOPS:
+            print(
+                f"\n{surface}: only {len(surface_stops)} stops, need"
+                f" {MIN_STOPS}"
+            )
+            continue
+        old = program.FRANA_MODEL.get(surface, program.FRANA_IMPLICIT)
+        new = fit(surface_stops)
+        print_surface(surface, surface_stops, old, new)
+        models[surface] = new
+        counts[surface] = len(surface_stops)
+    if counts and not args.dry_run:
+        write_model(models, counts)
+        print("\nWrote " + os.path.relpath(MODEL_FILE))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Builds a precompiled MicroPython bundle for a robot program.
+
+Cross-compiles the program and every module it imports (base_robot.py,
+utils.py, the missions, ...) with mpy-cross into one file in the same
+multi-file format the hub accepts from pybricksdev. Prints the bytecode
+size and compile time of every module.
+
+With --run, the bundle is downloaded to the hub and started, and the
+time until the program prints "Boot to ready" is measured.
+
+Examples (from the project folder, with the virtual environment active):
+
+    python tools/build_mpy.py OldCode/master_program.py
+    python tools/build_mpy.py OldCode/master_program.py --run BOB
+    python tools/build_mpy.py robot_pid_project/main.py \
+        --include robot_pid_project/missions/mission1.py
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+from modulefinder import ModuleFinder
+
+import mpy_cross_v6
+
+BUILD_DIR = "build"
+READY_PATTERN = re.compile(rb"Boot to ready: (\d+) ms")
+
+
+def find_modules(script, includes):
+    """Returns [(module name, path)] for the script and every local module
+    it imports, with the script first. Modules that are only imported by
+    name at runtime (like missions.mission1 in robot_pid_project) can be
+    added with includes."""
+    proj_dir = os.path.dirname(os.path.abspath(script))
+    finder = ModuleFinder([proj_dir])
+    finder.run_script(script)
+
+    modules = [("__main__", os.path.abspath(script))]
+    for name, module in finder.modules.items():
+        if name == "__main__" or not module.__file__:
+            continue
+        modules.append((name, os.path.abspath(module.__file__)))
+
+    for path in includes:
+        rel = os.path.relpath(os.path.abspath(path), proj_dir)
+        name = os.path.splitext(rel)[0].replace(os.sep, ".")
+        if name not in [m[0] for m in modules]:
+            modules.append((name, os.path.abspath(path)))
+    return modules
+
+
+def compile_module(proj_dir, path, optimize):
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    start = time.perf_counter()
+    proc, mpy = mpy_cross_v6.mpy_cross_compile(
+        os.path.relpath(path, proj_dir),
+        source,
+        optimization_level=optimize,
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0 or mpy is None:
+        sys.stderr.write(proc.stderr.decode())
+        raise SystemExit(f"mpy-cross failed on {path}")
+    return len(source.encode()), mpy, elapsed
+
+
+def build(script, includes, optimize):
+    """Compiles and bundles the program. Returns (bundle bytes, report)."""
+    proj_dir = os.path.dirname(os.path.abspath(script))
+    parts = []
+    report = []
+    for name, path in find_modules(script, includes):
+        src_size, mpy, elapsed = compile_module(proj_dir, path, optimize)
+        # Same layout as pybricksdev: size, zero terminated name, mpy data
+        parts.append(len(mpy).to_bytes(4, "little"))
+        parts.append(name.encode() + b"\x00")
+        parts.append(mpy)
+        report.append((name, src_size, len(mpy), elapsed))
+    return b"".join(parts), report
+
+
+def print_report(report, build_time, out_path, bundle):
+    print(f"{'module':<28}{'source':>10}{'mpy':>10}{'compile':>12}")
+    for name, src_size, mpy_size, elapsed in report:
+        print(
+            f"{name:<28}{src_size:>10}{mpy_size:>10}"
+            f"{elapsed * 1000:>10.1f}ms"
+        )
+    total_src = sum(r[1] for r in report)
+    total_mpy = sum(r[2] for r in report)
+    print(
+        f"{'total':<28}{total_src:>10}{total_mpy:>10}"
+        f"{build_time * 1000:>10.1f}ms"
+    )
+    print(f"Wrote {out_path} ({len(bundle)} bytes)")
+
+
+async def measure_startup(robot_name, bundle, timeout):
+    """Downloads the bundle, starts it and waits for the "Boot to ready"
+    line. Returns (seconds measured on the computer, ms reported by the
+    hub)."""
+    from pybricksdev.ble import find_device
+    from pybricksdev.connections.pybricks import PybricksHubBLE
+
+    print(f"Searching for {robot_name}...")
+    hub = PybricksHubBLE(await find_device(robot_name))
+    await hub.connect()
+    try:
+        await hub.download_user_program(bundle)
+        hub.print_output = False
+        hub.output = []
+        start = time.perf_counter()
+        await hub.start_user_program()
+        while time.perf_counter() - start < timeout:
+            for line in hub.output:
+                match = READY_PATTERN.search(line)
+                if match:
+                    elapsed = time.perf_counter() - start
+                    await hub.stop_user_program()
+                    return elapsed, int(match.group(1))
+            await asyncio.sleep(0.01)
+        await hub.stop_user_program()
+        return None, None
+    finally:
+        await hub.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("script", help="program to build, e.g. master_program")
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=[],
+        help="extra module that is only imported at runtime",
+    )
+    parser.add_argument(
+        "-O",
+        dest="optimize",
+        type=int,
+        default=None,
+        help="mpy-cross optimization level (3 drops line numbers)",
+    )
+    parser.add_argument("--out", help="output file")
+    parser.add_argument(
+        "--run", metavar="ROBOT", help="download, start and time it"
+    )
+    parser.add_argument("--timeout", type=float, default=20)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    bundle, report = build(args.script, args.include, args.optimize)
+    build_time = time.perf_counter() - start
+
+    out_path = args.out or os.path.join(
+        BUILD_DIR, os.path.splitext(os.path.basename(args.script))[0] + ".mpy"
+    )
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "wb") as f:
+        f.write(bundle)
+    print_report(report, build_time, out_path, bundle)
+
+    if args.run:
+        elapsed, hub_ms = asyncio.run(
+            measure_startup(args.run, bundle, args.timeout)
+        )
+        if elapsed is None:
+            print("Program did not print 'Boot to ready' in time")
+        else:
+            print(
+                f"Startup: {elapsed * 1000:.0f} ms (hub reports {hub_ms} ms)"
+            )
+
+
+if __name__ == "__main__":
+    main()
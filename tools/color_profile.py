@@ -0,0 +1,291 @@
+"""Computes the Color.SENSOR_* values from labeled color sensor samples.
+
+Reads the "HSV,label,h,s,v" lines that help/coach/colorTest.py prints
+in SAMPLE_MODE. The labels are the names of the Color.SENSOR_* values in
+OldCode/base_robot.py (GREEN, NONE, ...).
+
+Samples are compared in the same hsv cone as OldCode/launch_classifier.py
+and BaseRobot. Every color starts at the middle of its samples. Then the
+colors are moved a step at a time to make the worst separated color as
+well separated as possible: the 10% of its samples with the lowest
+confidence (see NearestCentroid) should still be far from every other
+color. To cover lighting changes, every sample is also counted a bit
+brighter and a bit darker (--light).
+
+It prints a confusion matrix for the values in base_robot.py and for the
+new values, how many samples would be ignored by the launch classifier
+(confidence below LAUNCH_MIN_CONFIDENCE), and the Color.SENSOR_* lines
+and SENSOR_COLORS list to paste into base_robot.py.
+
+Example:
+
+    pybricksdev run ble --name BOB help/coach/colorTest.py > colors1.log
+    python tools/color_profile.py colors1.log colors2.log
+"""
+
+import argparse
+import math
+import os
+import re
+import sys
+
+OLDCODE = os.path.join(os.path.dirname(__file__), "..", "OldCode")
+sys.path.insert(0, OLDCODE)
+from launch_classifier import (  # noqa: E402
+    LAUNCH_MIN_CONFIDENCE,
+    ConeDistance,
+    HsvToCone,
+)
+
+# How much brighter and darker the samples are counted, as a fraction
+LIGHT_VARIATION = 0.1
+# Which part of a color's samples decides how well it is separated
+MARGIN_PERCENTILE = 10
+# Step sizes (in cone units, same scale as s and v) the colors are moved
+STEPS = (8, 4, 2, 1)
+MAX_ROUNDS = 100
+PROFILE_RE = re.compile(
+    r"^Color\.SENSOR_(\w+) = Color\(h=(\d+), s=(\d+), v=(\d+)\)", re.M
+)
+
+
+def read_samples(paths):
+    """Returns {label: [(h, s, v)]} in the order the labels appear."""
+    samples = {}
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if not line.startswith("HSV,"):
+                    continue
+                _, label, h, s, v = line.split(",")
+                samples.setdefault(label, []).append((int(h), int(s), int(v)))
+    return samples
+
+
+def read_profile(path=None):
+    """Returns {label: (h, s, v)} for the Color.SENSOR_* in base_robot."""
+    path = path or os.path.join(OLDCODE, "base_robot.py")
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    return {
+        m.group(1): tuple(int(x) for x in m.group(2, 3, 4))
+        for m in PROFILE_RE.finditer(text)
+    }
+
+
+def cone_points(samples, light):
+    """Every sample as a cone point, plus a darker and a brighter copy.
+    Returns ([(label index, (x, y, z), weight)], raw point count)."""
+    points = {}
+    raw = 0
+    for index, hsvs in enumerate(samples.values()):
+        for h, s, v in hsvs:
+            raw += 1
+            for factor in (1 - light, 1, 1 + light):
+                point = HsvToCone(h, s, min(100, round(v * factor)))
+                # Readings repeat a lot, so count them instead of storing
+                key = (index, point)
+                points[key] = points.get(key, 0) + 1
+    return [(i, p, n) for (i, p), n in points.items()], raw
+
+
+def confidence(distances, label):
+    """Like NearestCentroid's confidence, but for the true label: positive
+    when the sample is closest to its own color, negative otherwise."""
+    own = distances[label]
+    other = min(d for i, d in enumerate(distances) if i != label)
+    if own + other == 0:
+        return 0.0
+    return 100 * (other - own) / (other + own)
+
+
+def percentile(weighted, pct):
+    """pct percentile of [(value, weight)]."""
+    weighted = sorted(weighted)
+    total = sum(w for _, w in weighted)
+    limit = total * pct / 100
+    seen = 0
+    for value, w in weighted:
+        seen += w
+        if seen >= limit:
+            return value
+    return weighted[-1][0]
+
+
+class Separation:
+    """Keeps the distance from every point to every color, so moving one
+    color only recalculates one column."""
+
+    def __init__(self, points, centroids):
+        self.points = points
+        self.centroids = list(centroids)
+        self.distances = [
+            [ConeDistance(p, c) for c in self.centroids] for _, p, _ in points
+        ]
+
+    def margins(self, distances=None):
+        """Returns {label: [(confidence, weight)]}."""
+        distances = distances or self.distances
+        result = {}
+        for (label, _, weight), d in zip(self.points, distances):
+            result.setdefault(label, []).append((confidence(d, label), weight))
+        return result
+
+    def score(self, distances=None):
+        margins = self.margins(distances)
+        return min(percentile(m, MARGIN_PERCENTILE) for m in margins.values())
+
+    def moved(self, index, centroid):
+        """The distance table with one color moved."""
+        distances = [list(row) for row in self.distances]
+        for row, (_, p, _) in zip(distances, self.points):
+            row[index] = ConeDistance(p, centroid)
+        return distances
+
+    def optimize(self):
+        """Moves the colors while the worst separated color gets better."""
+        best = self.score()
+        for step in STEPS:
+            for _ in range(MAX_ROUNDS):
+                improved = False
+                for index, centroid in enumerate(self.centroids):
+                    for axis in range(3):
+                        for sign in (-1, 1):
+                            c = list(centroid)
+                            c[axis] += sign * step
+                            c[2] = max(0, min(100, c[2]))
+                            c = tuple(c)
+                            distances = self.moved(index, c)
+                            score = self.score(distances)
+                            if score > best:
+                                best = score
+                                centroid = c
+                                self.centroids[index] = c
+                                self.distances = distances
+                                improved = True
+                if not improved:
+                    break
+        return best
+
+
+def mean_point(hsvs):
+    points = [HsvToCone(h, s, v) for h, s, v in hsvs]
+    return tuple(sum(p[i] for p in points) / len(points) for i in range(3))
+
+
+def cone_to_hsv(point):
+    """The inverse of HsvToCone, rounded like the hub's Color values."""
+    x, y, z = point
+    v = max(0, min(100, round(z)))
+    chroma = math.hypot(x, y)
+    s = max(0, min(100, round(100 * chroma / v))) if v else 0
+    h = round(math.degrees(math.atan2(y, x))) % 360
+    return (h, s, v)
+
+
+def confusion(samples, profile):
+    """Classifies the raw samples with the nearest color in profile.
+    Returns (matrix {true: {seen: count}}, samples below the launch
+    confidence)."""
+    labels = list(profile)
+    centroids = [HsvToCone(*profile[label]) for label in labels]
+    matrix = {}
+    ignored = 0
+    for label, hsvs in samples.items():
+        row = matrix.setdefault(label, {})
+        for hsv in hsvs:
+            d = [ConeDistance(HsvToCone(*hsv), c) for c in centroids]
+            seen = labels[d.index(min(d))]
+            row[seen] = row.get(seen, 0) + 1
+            if label in labels and confidence(d, labels.index(label)) < (
+                LAUNCH_MIN_CONFIDENCE
+            ):
+                ignored += 1
+    return matrix, ignored
+
+
+def print_confusion(title, samples, profile):
+    matrix, ignored = confusion(samples, profile)
+    columns = list(profile)
+    width = max(len(c) for c in columns + list(samples)) + 1
+    print(f"\n{title} (rows: what was sampled, columns: what it reads as)")
+    print(" " * width + "".join(f"{c[:7]:>8}" for c in columns))
+    right = 0
+    total = 0
+    for label, row in matrix.items():
+        cells = "".join(f"{row.get(c, 0) or '.':>8}" for c in columns)
+        print(f"{label:<{width}}{cells}")
+        right += row.get(label, 0)
+        total += sum(row.values())
+    print(
+        f"{right} of {total} samples right, {ignored} below the launch"
+        f" confidence of {LAUNCH_MIN_CONFIDENCE}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("logs", nargs="+", help="colorTest.py sample logs")
+    parser.add_argument(
+        "--light",
+        type=float,
+        default=LIGHT_VARIATION,
+        help="brightness change to allow for, as a fraction",
+    )
+    args = parser.parse_args()
+
+    samples = read_samples(args.logs)
+    if len(samples) < 2:
+        raise SystemExit("Need samples of at least two colors")
+    labels = list(samples)
+    current = read_profile()
+    if all(label in current for label in labels):
+        print_confusion(
+            "Values in base_robot.py",
+            samples,
+            {label: current[label] for label in labels},
+        )
+    else:
+        missing = [label for label in labels if label not in current]
+        print("Not in base_robot.py yet: " + ", ".join(missing))
+
+    points, raw = cone_points(samples, args.light)
+    separation = Separation(
+        points, [mean_point(hsvs) for hsvs in samples.values()]
+    )
+    start = separation.score()
+    best = separation.optimize()
+    print(
+        f"\n{raw} samples. Worst color's {MARGIN_PERCENTILE}% confidence:"
+        f" {start:.0f} at the middle of the samples, {best:.0f} after"
+        " separating"
+    )
+    profile = {
+        label: cone_to_hsv(c) for label, c in zip(labels, separation.centroids)
+    }
+    print_confusion("New values", samples, profile)
+
+    margins = Separation(
+        points, [HsvToCone(*profile[label]) for label in labels]
+    ).margins()
+    print("\nFor OldCode/base_robot.py:")
+    for i, label in enumerate(labels):
+        h, s, v = profile[label]
+        low = percentile(margins[i], MARGIN_PERCENTILE)
+        print(
+            f"# {label}: {len(samples[label])} samples, "
+            f"{MARGIN_PERCENTILE}% confidence {low:.0f}"
+        )
+        print(
+            f"Color.SENSOR_{label} = Color(h={h}, s={s}, v={v})"
+            "  # type: ignore"
+        )
+    print("\nSENSOR_COLORS: list = [")
+    for label in labels:
+        print(f"    Color.SENSOR_{label},  # type: ignore")
+    print("]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""The Unearthed field, for tools/field_planner.py.
+
+Coordinates are in mm from the south-west corner of the mat (bottom left
+when the launch areas are in front of you): x to the east (right), y to
+the north (away from you). Headings are in degrees, 0 = facing east,
+counting counterclockwise, so 90 = facing north. That is the direction
+a positive 'turn' in FLL_Program1.executa_traseu turns the robot.
+
+The mission model footprints below are measured roughly from the mat
+picture and are rectangles around the whole model, including the parts
+the robot must not touch. Measure them on your own table before relying
+on a planned route, and make them bigger rather than smaller.
+
+Run this file to print the map:
+
+    python tools/field_map.py
+"""
+
+# Inside of the table walls
+MAT_MM = (2362, 1143)
+
+# Radius of a circle around the robot's turning point that contains the
+# whole robot with attachments, plus a safety margin. The planner keeps
+# this far away from walls and models.
+ROBOT_RADIUS_MM = 100
+CLEARANCE_MM = 10
+
+# name: (x, y, width, height) of the rectangle around the model
+OBSTACLES = {
+    "M01 surface brushing": (100, 960, 160, 110),
+    "M02 map reveal": (480, 980, 130, 100),
+    "M03 mineshaft explorer": (560, 620, 150, 120),
+    "M04 careful recovery": (860, 960, 140, 110),
+    "M05 who lived here": (1200, 980, 130, 100),
+    "M06 forge": (1020, 600, 130, 120),
+    "M07 heavy lifting": (1460, 720, 110, 110),
+    "M08 silo": (1780, 980, 110, 100),
+    "M09 what's on sale": (1860, 620, 150, 110),
+    "M10 tip the scales": (1420, 300, 170, 100),
+    "M11 angler artifacts": (2140, 900, 130, 130),
+    "M12 salvage operation": (860, 220, 170, 100),
+    "M13 statue rebuild": (2180, 440, 100, 110),
+    "M14 forum": (430, 250, 130, 100),
+}
+
+# Places the robot drives to: name: (x, y, heading). The x, y is the
+# turning point, halfway between the drive wheels. Poses next to a model
+# may be closer than ROBOT_RADIUS_MM, the robot has to touch it after
+# all; the planner allows that close to the start and the end only.
+POSES = {
+    "home_left": (200, 150, 90),
+    "home_right": (2160, 150, 90),
+    "forge": (1085, 500, 90),
+    "heavy_lifting": (1515, 620, 90),
+    "silo": (1835, 880, 90),
+    "mineshaft": (635, 520, 90),
+    "tip_the_scales": (1505, 500, 270),
+    "statue": (2080, 495, 0),
+    "salvage": (945, 420, 270),
+}
+
+# Routes to plan and ship to the hub: name: (from pose, to pose)
+ROUTES = {
+    "home_left_to_forge": ("home_left", "forge"),
+    "forge_to_home_left": ("forge", "home_left"),
+    "home_left_to_mineshaft": ("home_left", "mineshaft"),
+    "home_right_to_silo": ("home_right", "silo"),
+    "silo_to_home_right": ("silo", "home_right"),
+    "home_right_to_statue": ("home_right", "statue"),
+    "home_right_to_heavy_lifting": ("home_right", "heavy_lifting"),
+    "home_left_to_salvage": ("home_left", "salvage"),
+    "home_right_to_tip_the_scales": ("home_right", "tip_the_scales"),
+}
+
+
+def inside_obstacle(x, y, margin=0):
+    """Name of the obstacle (or "wall") within margin mm of x, y, or
+    None if the point is free."""
+    if not (
+        margin <= x <= MAT_MM[0] - margin and margin <= y <= MAT_MM[1] - margin
+    ):
+        return "wall"
+    for name, (ox, oy, w, h) in OBSTACLES.items():
+        # Distance from the point to the rectangle
+        dx = max(ox - x, 0, x - (ox + w))
+        dy = max(oy - y, 0, y - (oy + h))
+        if dx * dx + dy * dy <= margin * margin:
+            return name
+    return None
+
+
+def print_map(cell_mm=50, marks=None):
+    """Prints the field as text, north at the top. marks is an optional
+    {(x, y): character} drawn over the map (a route, poses)."""
+    marks = marks or {}
+    grid = {}
+    for (x, y), char in marks.items():
+        grid[(int(x // cell_mm), int(y // cell_mm))] = char
+    cols = -(-MAT_MM[0] // cell_mm)
+    rows = -(-MAT_MM[1] // cell_mm)
+    for row in range(rows - 1, -1, -1):
+        line = ""
+        for col in range(cols):
+            x = min(col * cell_mm + cell_mm / 2, MAT_MM[0] - 1)
+            y = min(row * cell_mm + cell_mm / 2, MAT_MM[1] - 1)
+            if (col, row) in grid:
+                line += grid[(col, row)]
+            elif inside_obstacle(x, y) is not None:
+                line += "#"
+            elif inside_obstacle(x, y, ROBOT_RADIUS_MM + CLEARANCE_MM):
+                line += ":"
+            else:
+                line += "."
+        print(line)
+
+
+if __name__ == "__main__":
+    print("# = mission model, : = too close for the robot's center\n")
+    print_map(marks={(p[0], p[1]): "o" for p in POSES.values()})
+    for name, pose in POSES.items():
+        # Closer than this and the robot is standing in the model
+        blocked = inside_obstacle(pose[0], pose[1], ROBOT_RADIUS_MM // 2)
+        if blocked:
+            print(f"Pose {name} is inside {blocked}")
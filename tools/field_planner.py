@@ -0,0 +1,502 @@
+"""Plans routes on the field and generates the route files for the hub.
+
+Plans every route in tools/field_map.py ROUTES around the mission models
+and writes them in two forms:
+
+- trasee_planificate.py next to FLL_Program1.py: TRASEE["name"] is a
+  list of ('turn', degrees, speed) and ('drive', cm, speed) steps for
+  PrecisionRobot.executa_traseu.
+- OldCode/field_routes.py: the same routes as turnInPlace,
+  driveForDistance and curve steps for BaseRobot, with the corners
+  rounded into curves where they fit, and DriveRoute(br, name) to run
+  one from a mission.
+
+The planner searches a grid of CELL_MM squares with A* for the fastest
+way, counting the time of every turn and the pause after every command,
+so it prefers a few long straight lines over many short ones. Then it
+straightens the path: every corner that can be skipped without getting
+closer than ROBOT_RADIUS_MM + CLEARANCE_MM to a model or a wall is
+skipped.
+
+Planning is done on the computer only. Routes are cached in
+tools/.field_cache.json and planned again only when the field, the
+robot or the route changed. The hub only gets the short lists of steps.
+
+Examples:
+
+    python tools/field_planner.py
+    python tools/field_planner.py --show home_left_to_forge
+    python tools/field_planner.py --drive-speed 800 --force
+"""
+
+import argparse
+import hashlib
+import heapq
+import json
+import math
+import os
+import sys
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.normpath(os.path.join(TOOLS, ".."))
+sys.path.insert(0, TOOLS)
+sys.path.insert(0, ROOT)
+import field_map  # noqa: E402
+import motion_model  # noqa: E402
+from FLL_Program1 import (  # noqa: E402
+    ROBOT_AXLE_TRACK_MM,
+    ROBOT_WHEEL_DIAMETER_MM,
+)
+
+CELL_MM = 20
+CACHE = os.path.join(TOOLS, ".field_cache.json")
+TRASEE_FILE = os.path.join(ROOT, "trasee_planificate.py")
+ROUTES_FILE = os.path.join(motion_model.OLDCODE, "field_routes.py")
+
+# PrecisionRobot: motor speeds (deg/s) for the planned steps, the same as
+# traseu_patrat uses
+DRIVE_SPEED = 600
+TURN_SPEED = 300
+# executa_traseu waits 100 ms after every command, and the drive and
+# turn methods wait 300 ms when they are done
+COMMAND_MS = 400
+# Turns also have to stay within tolerance for steady_time
+TURN_SETTLE_MS = 150
+# How fast PrecisionRobot gets up to speed and slows down, roughly
+RAMP_MMSEC2 = 800
+
+# BaseRobot: corners are rounded with this radius when there is room
+FILLET_MM = 150
+MIN_FILLET_MM = 40
+
+# The 8 directions of the grid, counterclockwise from east
+DIRECTIONS = ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1))
+DIRECTIONS += ((1, -1),)
+
+
+def normalize(angle):
+    """Angle in -180..180."""
+    return (angle + 180) % 360 - 180
+
+
+class PrecisionTimes:
+    """How long PrecisionRobot.executa_traseu takes for a step."""
+
+    def __init__(self, drive_speed=DRIVE_SPEED, turn_speed=TURN_SPEED):
+        wheel_mm = math.pi * ROBOT_WHEEL_DIAMETER_MM
+        self.drive_speed = drive_speed
+        self.turn_speed = turn_speed
+        self.mm_per_sec = drive_speed * wheel_mm / 360
+        # Both wheels turn turn_speed deg/s in opposite directions
+        self.turn_deg_per_sec = (
+            turn_speed * ROBOT_WHEEL_DIAMETER_MM / ROBOT_AXLE_TRACK_MM
+        )
+
+    def drive_ms(self, mm):
+        return (
+            motion_model.trapezoid_ms(mm, self.mm_per_sec, RAMP_MMSEC2)
+            + COMMAND_MS
+        )
+
+    def turn_ms(self, degrees):
+        if abs(degrees) < 1:
+            return 0.0
+        return (
+            1000 * abs(degrees) / self.turn_deg_per_sec
+            + TURN_SETTLE_MS
+            + COMMAND_MS
+        )
+
+
+class Grid:
+    """Which cells the robot's turning point may be in."""
+
+    def __init__(self, start, goal):
+        self.cols = -(-field_map.MAT_MM[0] // CELL_MM)
+        self.rows = -(-field_map.MAT_MM[1] // CELL_MM)
+        margin = field_map.ROBOT_RADIUS_MM + field_map.CLEARANCE_MM
+        near = margin + 2 * CELL_MM
+        self.free = set()
+        for col in range(self.cols):
+            for row in range(self.rows):
+                x, y = self.center(col, row)
+                ok = field_map.inside_obstacle(x, y, margin) is None
+                if not ok and (
+                    math.dist((x, y), start) < near
+                    or math.dist((x, y), goal) < near
+                ):
+                    # Close to a model is fine at the start and the end
+                    ok = (
+                        field_map.inside_obstacle(
+                            x, y, field_map.ROBOT_RADIUS_MM // 2
+                        )
+                        is None
+                    )
+                if ok:
+                    self.free.add((col, row))
+
+    def center(self, col, row):
+        return (col * CELL_MM + CELL_MM / 2, row * CELL_MM + CELL_MM / 2)
+
+    def cell(self, x, y):
+        return (int(x // CELL_MM), int(y // CELL_MM))
+
+    def line_free(self, a, b):
+        """True when the straight line from a to b stays in free cells."""
+        steps = max(1, int(math.dist(a, b) / (CELL_MM / 2)))
+        for i in range(steps + 1):
+            x = a[0] + (b[0] - a[0]) * i / steps
+            y = a[1] + (b[1] - a[1]) * i / steps
+            if self.cell(x, y) not in self.free:
+                return False
+        return True
+
+
+def astar(grid, start, goal, times):
+    """Fastest grid path from start (x, y, heading) to goal. The state
+    is (cell, direction) so turns cost time. Returns a list of cells."""
+    begin = grid.cell(start[0], start[1])
+    end = grid.cell(goal[0], goal[1])
+    if begin not in grid.free or end not in grid.free:
+        raise SystemExit("Start or end is inside a model or a wall")
+    cell_ms = [
+        times.drive_ms(CELL_MM * math.hypot(dx, dy)) - COMMAND_MS
+        for dx, dy in DIRECTIONS
+    ]
+
+    def h(cell):
+        return 1000 * CELL_MM * math.dist(cell, end) / times.mm_per_sec
+
+    # -1 = no direction yet, still facing the start heading
+    queue = [(h(begin), 0.0, begin, -1)]
+    best = {(begin, -1): 0.0}
+    came = {}
+    while queue:
+        _, cost, cell, d = heapq.heappop(queue)
+        if cell == end:
+            path = [cell]
+            state = (cell, d)
+            while state in came:
+                state = came[state]
+                path.append(state[0])
+            return path[::-1]
+        if cost > best.get((cell, d), math.inf):
+            continue
+        heading = start[2] if d < 0 else 45 * d
+        for nd, (dx, dy) in enumerate(DIRECTIONS):
+            nxt = (cell[0] + dx, cell[1] + dy)
+            if nxt not in grid.free:
+                continue
+            new = cost + cell_ms[nd]
+            if nd != d:
+                # A new straight line: a turn and one more command
+                new += times.turn_ms(normalize(45 * nd - heading))
+                new += COMMAND_MS
+            if new < best.get((nxt, nd), math.inf):
+                best[(nxt, nd)] = new
+                came[(nxt, nd)] = (cell, d)
+                heapq.heappush(queue, (new + h(nxt), new, nxt, nd))
+    raise SystemExit("No way through, are the models too close together?")
+
+
+def shorten(grid, points):
+    """Skips every corner that has a free straight line around it."""
+    result = [points[0]]
+    i = 0
+    while i < len(points) - 1:
+        j = len(points) - 1
+        while j > i + 1 and not grid.line_free(points[i], points[j]):
+            j -= 1
+        result.append(points[j])
+        i = j
+    return result
+
+
+def plan(start, goal, times):
+    """Returns the waypoints [(x, y)] from start to goal."""
+    grid = Grid(start[:2], goal[:2])
+    cells = astar(grid, start, goal, times)
+    points = [start[:2]] + [grid.center(*c) for c in cells[1:-1]]
+    points.append(goal[:2])
+    return [(round(x), round(y)) for x, y in shorten(grid, points)]
+
+
+def segments(start, goal, waypoints):
+    """[(turn degrees counterclockwise, length mm)] for every line, then
+    the last turn to the goal heading."""
+    heading = start[2]
+    result = []
+    for a, b in zip(waypoints, waypoints[1:]):
+        direction = math.degrees(math.atan2(b[1] - a[1], b[0] - a[0]))
+        result.append((normalize(direction - heading), math.dist(a, b)))
+        heading = direction
+    return result, normalize(goal[2] - heading)
+
+
+def traseu_steps(start, goal, waypoints, times):
+    """Steps for PrecisionRobot.executa_traseu and their time in ms."""
+    lines, last_turn = segments(start, goal, waypoints)
+    steps = []
+    for turn, mm in lines:
+        if round(turn):
+            steps.append(("turn", round(turn), times.turn_speed))
+        steps.append(("drive", round(mm / 10, 1), times.drive_speed))
+    if round(last_turn):
+        steps.append(("turn", round(last_turn), times.turn_speed))
+    ms = 0.0
+    for step in steps:
+        if step[0] == "turn":
+            ms += times.turn_ms(step[1])
+        else:
+            ms += times.drive_ms(step[1] * 10)
+    return steps, ms
+
+
+def arc_free(grid, corner, before, after, radius, turn):
+    """True when the curve of radius around a corner stays free."""
+    tangent = radius * math.tan(math.radians(abs(turn)) / 2)
+    a_in = math.atan2(corner[1] - before[1], corner[0] - before[0])
+    start = (
+        corner[0] - tangent * math.cos(a_in),
+        corner[1] - tangent * math.sin(a_in),
+    )
+    side = 1 if turn > 0 else -1
+    # The center is to the left of the robot for a left turn
+    center = (
+        start[0] - side * radius * math.sin(a_in),
+        start[1] + side * radius * math.cos(a_in),
+    )
+    first = math.atan2(start[1] - center[1], start[0] - center[0])
+    steps = max(2, int(abs(turn) / 10))
+    points = []
+    for i in range(steps + 1):
+        a = first + side * math.radians(abs(turn)) * i / steps
+        points.append(
+            (
+                center[0] + radius * math.cos(a),
+                center[1] + radius * math.sin(a),
+            )
+        )
+    return all(grid.line_free(p, q) for p, q in zip(points, points[1:]))
+
+
+def curve_steps(start, goal, waypoints):
+    """Steps for BaseRobot: ("turn", angle), ("drive", mm) and
+    ("curve", radius, angle), angles positive to the right like
+    BaseRobot. Corners get a curve when it fits between the lines and
+    misses the models, otherwise the robot turns in place."""
+    grid = Grid(start[:2], goal[:2])
+    lines, last_turn = segments(start, goal, waypoints)
+    lengths = [mm for _, mm in lines]
+    # Radius of the curve at every corner between two lines
+    radii = [0] * len(lines)
+    for i in range(1, len(lines)):
+        turn = lines[i][0]
+        half = math.tan(math.radians(abs(turn)) / 2)
+        if abs(turn) < 1 or half == 0:
+            continue
+        # Each line gives at most half its length to a curve
+        room = min(lines[i - 1][1], lines[i][1]) / 2
+        radius = min(FILLET_MM, room / half)
+        while radius >= MIN_FILLET_MM and not arc_free(
+            grid,
+            waypoints[i],
+            waypoints[i - 1],
+            waypoints[i + 1],
+            radius,
+            turn,
+        ):
+            radius /= 2
+        if radius >= MIN_FILLET_MM:
+            radii[i] = radius
+            lengths[i - 1] -= radius * half
+            lengths[i] -= radius * half
+    steps = []
+    for i, (turn, _) in enumerate(lines):
+        if radii[i]:
+            steps.append(("curve", round(radii[i]), -round(turn)))
+        elif round(turn):
+            steps.append(("turn", -round(turn)))
+        if round(lengths[i]):
+            steps.append(("drive", round(lengths[i])))
+    if round(last_turn):
+        steps.append(("turn", -round(last_turn)))
+    return steps
+
+
+def cache_key(start, goal, times):
+    data = [
+        field_map.MAT_MM,
+        sorted(field_map.OBSTACLES.items()),
+        field_map.ROBOT_RADIUS_MM,
+        field_map.CLEARANCE_MM,
+        CELL_MM,
+        start,
+        goal,
+        times.drive_speed,
+        times.turn_speed,
+        ROBOT_WHEEL_DIAMETER_MM,
+        ROBOT_AXLE_TRACK_MM,
+    ]
+    return hashlib.sha1(json.dumps(data).encode()).hexdigest()
+
+
+def plan_all(times, force=False):
+    """Returns {route: waypoints}, planning only what is not cached."""
+    cache = {}
+    if os.path.exists(CACHE) and not force:
+        with open(CACHE, encoding="utf-8") as f:
+            cache = json.load(f)
+    waypoints = {}
+    for name, (a, b) in field_map.ROUTES.items():
+        start = field_map.POSES[a]
+        goal = field_map.POSES[b]
+        key = cache_key(start, goal, times)
+        if cache.get(name, {}).get("key") != key:
+            print(f"planning {name}")
+            cache[name] = {"key": key, "points": plan(start, goal, times)}
+        waypoints[name] = [tuple(p) for p in cache[name]["points"]]
+    with open(CACHE, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=1)
+    return waypoints
+
+
+def write_trasee(routes):
+    lines = [
+        "# ============================================================",
+        "# trasee_planificate.py",
+        "# Generat de tools/field_planner.py din tools/field_map.py, nu",
+        "# modifica de mână: schimbă harta sau traseele și rulează din nou.",
+        "# Pentru PrecisionRobot.executa_traseu, de ex.:",
+        '#     robot.executa_traseu(TRASEE["home_left_to_forge"])',
+        "# ============================================================",
+        "",
+        "TRASEE = {",
+    ]
+    for name, (steps, ms) in routes.items():
+        lines.append(f'    "{name}": [  # {ms / 1000:.1f} s')
+        lines += [f"        {step!r}," for step in steps]
+        lines.append("    ],")
+    lines.append("}")
+    with open(TRASEE_FILE, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+ROUTES_HEADER = """\
+from base_robot import *
+
+# Generated by tools/field_planner.py from tools/field_map.py. Don't edit,
+# change the map or the routes and run the planner again.
+#
+# Every route is a tuple of steps, angles are positive to the right:
+#   ("turn", angle)           turnInPlace
+#   ("drive", distance)       driveForDistance, in mm
+#   ("curve", radius, angle)  curve
+"""
+
+ROUTES_FOOTER = '''
+
+def DriveRoute(
+    br: BaseRobot, name: str, speedPct: int = DEFAULT_BIG_MOT_SPEED_PCT
+):
+    """Drives one of the planned routes in ROUTES. Drives and curves \\
+    that follow each other are chained with Stop.NONE so the robot \\
+    doesn't stop between them.
+
+    Example:
+    >>> DriveRoute(br, "home_left_to_forge")
+
+    Args:
+    br (REQUIRED BaseRobot): The robot.
+
+    name (REQUIRED str): Name of the route in ROUTES.
+
+    speedPct (OPTIONAL, integer > 0): How fast to drive the straight \\
+    lines and curves. Defaults to DEFAULT_BIG_MOT_SPEED_PCT.
+    """
+    steps = ROUTES[name]
+    for i in range(len(steps)):
+        step = steps[i]
+        last = i == len(steps) - 1 or steps[i + 1][0] == "turn"
+        then = Stop.BRAKE if last else Stop.NONE
+        if step[0] == "turn":
+            br.turnInPlace(angle=step[1])
+        elif step[0] == "drive":
+            br.driveForDistance(distance=step[1], speedPct=speedPct, then=then)
+        else:
+            br.curve(
+                radius=step[1], angle=step[2], speedPct=speedPct, then=then
+            )
+'''
+
+
+def write_field_routes(routes):
+    lines = [ROUTES_HEADER, "ROUTES: dict = {"]
+    for name, (steps, ms) in routes.items():
+        lines.append(f'    "{name}": (  # {ms / 1000:.1f} s')
+        for step in steps:
+            # Double quotes, like the rest of OldCode
+            text = ", ".join(json.dumps(v) for v in step)
+            lines.append(f"        ({text}),")
+        lines.append("    ),")
+    lines.append("}")
+    with open(ROUTES_FILE, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n" + ROUTES_FOOTER)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--drive-speed", type=int, default=DRIVE_SPEED, help="deg/s"
+    )
+    parser.add_argument(
+        "--turn-speed", type=int, default=TURN_SPEED, help="deg/s"
+    )
+    parser.add_argument(
+        "--speed-pct",
+        type=int,
+        default=80,
+        help="BaseRobot speedPct the route times are estimated with",
+    )
+    parser.add_argument("--force", action="store_true", help="plan again")
+    parser.add_argument("--show", help="print the map with this route")
+    args = parser.parse_args()
+
+    times = PrecisionTimes(args.drive_speed, args.turn_speed)
+    waypoints = plan_all(times, args.force)
+    trasee = {}
+    curves = {}
+    print(f"\n{'route':<32}{'executa_traseu':>15}{'BaseRobot':>11}")
+    for name, points in waypoints.items():
+        start = field_map.POSES[field_map.ROUTES[name][0]]
+        goal = field_map.POSES[field_map.ROUTES[name][1]]
+        trasee[name] = traseu_steps(start, goal, points, times)
+        steps = curve_steps(start, goal, points)
+        curves[name] = (steps, motion_model.route_ms(steps, args.speed_pct))
+        print(
+            f"{name:<32}{trasee[name][1] / 1000:>14.1f}s"
+            f"{curves[name][1] / 1000:>10.1f}s"
+        )
+    write_trasee(trasee)
+    write_field_routes(curves)
+    print(f"\nWrote {TRASEE_FILE}\nWrote {ROUTES_FILE}")
+
+    if args.show:
+        points = waypoints[args.show]
+        marks = {}
+        for a, b in zip(points, points[1:]):
+            steps = max(1, int(math.dist(a, b) / 25))
+            for i in range(steps + 1):
+                x = a[0] + (b[0] - a[0]) * i / steps
+                y = a[1] + (b[1] - a[1]) * i / steps
+                marks[(x, y)] = "*"
+        for p in points:
+            marks[p] = "o"
+        print()
+        field_map.print_map(marks=marks)
+        for step in trasee[args.show][0]:
+            print(step)
+
+
+if __name__ == "__main__":
+    main()
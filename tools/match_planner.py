@@ -0,0 +1,227 @@
+"""Plans which missions to run in a 150 second match, and in what order.
+
+Reads a CSV file with one line per mission:
+
+    name,points,mean_s,std_s,reset_s,color
+    noah2,30,11.5,0.8,6,
+    shaila,20,9.0,1.5,5,
+    carternoah,45,24.0,2.0,8,RED
+
+mean_s and std_s are how long the mission runs (the average and how much
+it varies). reset_s is the time in base to bring the robot back, change
+attachments and launch the next mission. color is optional, to keep a
+mission on the color the team is used to.
+
+Durations can also come from saved profiler runs (see
+tools/timeline_report.py): every --timeline log replaces mean_s and std_s
+of the missions it contains with the measured values.
+
+The planner picks the missions that give the most points when every
+mission is counted as mean + risk * std seconds long (a knapsack solved
+with dynamic programming), then orders them so the most points per
+second run first. If the match runs long, the missions that get cut off
+are the ones worth the least. It prints the plan, the expected score and
+a MISSIONS table to paste into OldCode/master_program.py.
+
+Example:
+
+    python tools/match_planner.py missions.csv
+    python tools/match_planner.py missions.csv --risk 2 --timeline run1.log
+"""
+
+import argparse
+import csv
+import math
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+from timeline_report import read_timelines  # noqa: E402
+
+MATCH_S = 150
+STEP_S = 0.5  # time resolution of the knapsack
+# The launch colors in master_program.py, in the order they are handed out
+LAUNCH_COLORS = (
+    "YELLOW",
+    "GREEN",
+    "LIME",
+    "WHITE",
+    "ORANGE",
+    "RED",
+    "MAGENTA",
+    "BLUE",
+)
+
+
+def read_missions(path):
+    """Returns a list of mission dicts from the CSV file."""
+    missions = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            missions.append(
+                {
+                    "name": row["name"].strip(),
+                    "points": int(row["points"]),
+                    "mean_s": float(row["mean_s"]),
+                    "std_s": float(row.get("std_s") or 0),
+                    "reset_s": float(row.get("reset_s") or 0),
+                    "color": (row.get("color") or "").strip().upper(),
+                }
+            )
+    return missions
+
+
+def apply_timelines(missions, paths):
+    """Replaces mean_s and std_s with the durations measured in the
+    profiler logs."""
+    runs = {}
+    for name, total, _, _ in read_timelines(paths):
+        runs.setdefault(name, []).append(total / 1000)
+    for mission in missions:
+        times = runs.get(mission["name"])
+        if not times:
+            continue
+        mission["mean_s"] = statistics.mean(times)
+        if len(times) > 1:
+            mission["std_s"] = statistics.stdev(times)
+        print(
+            f"{mission['name']}: {len(times)} measured runs, "
+            f"{mission['mean_s']:.1f} s +- {mission['std_s']:.1f} s"
+        )
+
+
+def mission_cost(mission, risk):
+    """Seconds the mission uses up in the plan, in STEP_S steps."""
+    seconds = mission["mean_s"] + risk * mission["std_s"] + mission["reset_s"]
+    return max(1, math.ceil(seconds / STEP_S))
+
+
+def choose_missions(missions, risk, match_s=MATCH_S):
+    """0/1 knapsack: the missions with the most points whose risk
+    weighted times fit in the match. Returns the chosen missions."""
+    capacity = int(match_s / STEP_S)
+    # best[t] = (points, chosen indexes) using at most t steps
+    best = [(0, ())] * (capacity + 1)
+    for i, mission in enumerate(missions):
+        cost = mission_cost(mission, risk)
+        for t in range(capacity, cost - 1, -1):
+            points = best[t - cost][0] + mission["points"]
+            if points > best[t][0]:
+                best[t] = (points, best[t - cost][1] + (i,))
+    return [missions[i] for i in best[capacity][1]]
+
+
+def order_missions(chosen):
+    """Most points per second first, so a long match loses the least."""
+
+    def rate(m):
+        return m["points"] / (m["mean_s"] + m["reset_s"])
+
+    return sorted(chosen, key=rate, reverse=True)
+
+
+def normal_cdf(x, mean, std):
+    if std <= 0:
+        return 1.0 if x >= mean else 0.0
+    return 0.5 * (1 + math.erf((x - mean) / (std * math.sqrt(2))))
+
+
+def expected_score(plan, match_s=MATCH_S):
+    """Expected points when the mission times are normally distributed.
+    A mission only scores if it is finished before the match ends. The
+    last mission doesn't need its reset time."""
+    mean = 0.0
+    var = 0.0
+    score = 0.0
+    finish = []
+    for mission in plan:
+        mean += mission["mean_s"]
+        var += mission["std_s"] ** 2
+        p = normal_cdf(match_s, mean, math.sqrt(var))
+        score += p * mission["points"]
+        finish.append((mean, p))
+        mean += mission["reset_s"]
+    return score, finish
+
+
+def assign_colors(plan):
+    """Keeps the colors asked for in the CSV and hands out the free
+    launch colors in run order. Two missions can't ask for the same
+    color, MISSIONS on the hub would keep only one of them."""
+    taken = {}
+    for mission in plan:
+        color = mission["color"]
+        if color in taken:
+            raise SystemExit(
+                f"{taken[color]} and {mission['name']} both ask for {color}"
+            )
+        if color:
+            taken[color] = mission["name"]
+    free = [c for c in LAUNCH_COLORS if c not in taken]
+    colors = []
+    for mission in plan:
+        if mission["color"]:
+            colors.append(mission["color"])
+        elif free:
+            colors.append(free.pop(0))
+        else:
+            raise SystemExit("More missions than launch colors")
+    return colors
+
+
+def print_plan(plan, colors, skipped, match_s=MATCH_S):
+    score, finish = expected_score(plan, match_s)
+    print(f"\n{'#':>2}  {'mission':<20}{'color':<10}{'points':>7}", end="")
+    print(f"{'done at':>10}{'chance':>8}")
+    for i, mission in enumerate(plan):
+        done_s, p = finish[i]
+        print(
+            f"{i + 1:>2}  {mission['name']:<20}{colors[i]:<10}"
+            f"{mission['points']:>7}{done_s:>9.1f}s{100 * p:>7.0f}%"
+        )
+    total = sum(m["points"] for m in plan)
+    print(f"\nPoints if everything works: {total}")
+    print(f"Expected points: {score:.1f}")
+    if skipped:
+        print("Left out: " + ", ".join(m["name"] for m in skipped))
+
+    print("\nMISSIONS table for OldCode/master_program.py:")
+    print("MISSIONS: dict = {")
+    for mission, color in zip(plan, colors):
+        print(
+            f'    Color.SENSOR_{color}: ("{mission["name"]}",),'
+            "  # type: ignore"
+        )
+    print("}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("missions", help="CSV file with the missions")
+    parser.add_argument(
+        "--risk",
+        type=float,
+        default=1.0,
+        help="how many std_s to add to every mission (0 = average times)",
+    )
+    parser.add_argument(
+        "--timeline",
+        action="append",
+        default=[],
+        help="profiler log with measured mission times",
+    )
+    parser.add_argument("--match", type=float, default=MATCH_S, help="s")
+    args = parser.parse_args()
+
+    missions = read_missions(args.missions)
+    if args.timeline:
+        apply_timelines(missions, args.timeline)
+    chosen = choose_missions(missions, args.risk, args.match)
+    plan = order_missions(chosen)
+    skipped = [m for m in missions if m not in chosen]
+    print_plan(plan, assign_colors(plan), skipped, args.match)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Estimates how long a mission takes by reading its code.
+
+Reads the BaseRobot calls in a mission's Run(br) without running
+anything and estimates each step with tools/motion_model.py, which uses
+the speed and acceleration limits in OldCode/utils.py. It prints every
+step with its line number and time, the total, and the steps where a
+higher speedPct or accelerationPct would save the most time.
+
+Only plain code is followed: literal arguments, simple variables like
+"dist = 45" and "for i in range(3)" loops. Steps inside if or while
+blocks, or with arguments the tool can't work out (sensor readings),
+are listed as skipped. Steps marked ? take an unknown time (a button or
+a stall). Use tools/mission_harness.py to actually run the missions.
+With --robot, the times use that robot's drive motor model from
+OldCode/motor_model.py.
+
+Examples:
+
+    python tools/mission_duration.py OldCode/gideon.py
+    python tools/mission_duration.py OldCode/*.py --top 10
+    python tools/mission_duration.py OldCode/gideon.py --robot BOB
+"""
+
+import argparse
+import ast
+import copy
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import motion_model  # noqa: E402
+from motor_model import MOTOR_MODELS  # noqa: E402
+
+# What the savings are calculated with
+FASTEST_PCT = 100
+SPEED_ARGS = ("speedPct", "accelerationPct")
+# Builtins a mission can use in the arguments
+BUILTINS = {f.__name__: f for f in (range, abs, min, max, int, round, len)}
+
+
+class Step:
+    def __init__(self, line, method, args):
+        self.line = line
+        self.method = method
+        self.args = args
+        self.start = 0.0
+        self.ms = 0.0
+        self.guessed = False
+        self.saving = 0.0
+
+
+class Skipped(Exception):
+    pass
+
+
+class MissionReader:
+    """Walks Run(br) and collects the steps in the order they run."""
+
+    def __init__(self, ns, signatures):
+        self.ns = ns
+        self.signatures = signatures
+        self.steps = []
+        self.skipped = []
+
+    def read(self, path):
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+        for node in tree.body:
+            if isinstance(node, ast.FunctionDef) and node.name == "Run":
+                robot = node.args.args[0].arg if node.args.args else "br"
+                self._block(node.body, robot, dict(self.ns))
+                return True
+        return False
+
+    def _eval(self, node, env):
+        try:
+            code = compile(ast.Expression(node), "mission", "eval")
+            return eval(code, {"__builtins__": BUILTINS}, env)
+        except Exception:
+            raise Skipped(ast.unparse(node))
+
+    def _block(self, body, robot, env):
+        for node in body:
+            if isinstance(node, ast.Assign):
+                try:
+                    value = self._eval(node.value, env)
+                except Skipped:
+                    value = None
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        env[target.id] = value
+            elif isinstance(node, ast.Expr) and isinstance(
+                node.value, ast.Call
+            ):
+                self._call(node.value, robot, env)
+            elif isinstance(node, ast.For) and isinstance(
+                node.target, ast.Name
+            ):
+                try:
+                    values = list(self._eval(node.iter, env))
+                except (Skipped, TypeError):
+                    self.skipped.append((node.lineno, "for loop"))
+                    continue
+                for value in values:
+                    env[node.target.id] = value
+                    self._block(node.body, robot, env)
+            elif isinstance(node, (ast.If, ast.While, ast.For, ast.Try)):
+                kind = type(node).__name__.lower()
+                self.skipped.append((node.lineno, kind + " block"))
+
+    def _call(self, call, robot, env):
+        func = call.func
+        if not (
+            isinstance(func, ast.Attribute)
+            and isinstance(func.value, ast.Name)
+            and func.value.id == robot
+        ):
+            return
+        signature = self.signatures.get(func.attr)
+        if signature is None:
+            return
+        try:
+            args = [self._eval(a, env) for a in call.args]
+            kwargs = {k.arg: self._eval(k.value, env) for k in call.keywords}
+            bound = signature.bind(*args, **kwargs)
+        except Skipped as e:
+            self.skipped.append((call.lineno, f"{func.attr}: {e}"))
+            return
+        except TypeError as e:
+            self.skipped.append((call.lineno, f"{func.attr}: {e}"))
+            return
+        bound.apply_defaults()
+        self.steps.append(Step(call.lineno, func.attr, dict(bound.arguments)))
+
+
+def estimate(steps, motors=None):
+    """Fills in start, ms, guessed and saving for every step and returns
+    the total in ms. Commands with waiting=False run in the background
+    until the next command to the same motor. motors is a robot's entry
+    in MOTOR_MODELS, or None. A step's saving is how much shorter the
+    whole mission gets with only that step at FASTEST_PCT, so a
+    background step that nothing waits for saves nothing."""
+    model = motion_model.MotionModel(motors=motors)
+    total = timeline(steps, copy.copy(model))
+    for step in steps:
+        if not any(name in step.args for name in SPEED_ARGS):
+            continue
+        trial = [fastest(s) if s is step else copy.copy(s) for s in steps]
+        step.saving = total - timeline(trial, copy.copy(model))
+    return total
+
+
+def timeline(steps, model):
+    """Fills in start, ms and guessed for every step, starting from the
+    model's settings, and returns the total in ms."""
+    clock = 0.0
+    busy = {}
+    for step in steps:
+        device, ms, step.guessed = model.step(step.method, step.args)
+        step.start = clock
+        step.ms = ms
+        if device is not None:
+            busy[device] = clock + ms
+        if device is None or step.args.get("waiting", True):
+            clock += ms
+    return max([clock] + list(busy.values()))
+
+
+def fastest(step):
+    """A copy of the step with speedPct and accelerationPct at 100."""
+    args = dict(step.args)
+    for name in SPEED_ARGS:
+        if name in args:
+            args[name] = FASTEST_PCT
+    return Step(step.line, step.method, args)
+
+
+def describe(step):
+    a = step.args
+    parts = []
+    for name in ("distance", "dist", "angle", "radius", "degrees", "millis"):
+        if name in a:
+            parts.append(f"{name}={a[name]}")
+    for name in SPEED_ARGS:
+        if name in a:
+            parts.append(f"{name[:-3]}={a[name]}%")
+    if a.get("waiting") is False:
+        parts.append("background")
+    return f"{step.method}({', '.join(parts)})"
+
+
+def report(path, top, motors=None):
+    ns, _ = motion_model.base_robot_namespace()
+    reader = MissionReader(ns, motion_model.load_signatures())
+    if not reader.read(path):
+        return False
+    total = estimate(reader.steps, motors)
+
+    print(f"\n{os.path.basename(path)}")
+    print(f"{'line':>5} {'start':>8} {'time':>8}  step")
+    for step in reader.steps:
+        mark = " ?" if step.guessed else ""
+        print(
+            f"{step.line:>5} {step.start / 1000:>7.2f}s {step.ms / 1000:>7.2f}s"
+            f"  {describe(step)}{mark}"
+        )
+    for line, why in reader.skipped:
+        print(f"{line:>5} {'':>8} {'skipped':>8}  {why}")
+    print(f"Total: {total / 1000:.2f} s")
+
+    savings = sorted(
+        (s for s in reader.steps if s.saving >= 1),
+        key=lambda s: s.saving,
+        reverse=True,
+    )
+    if savings:
+        print(f"Faster at speedPct/accelerationPct {FASTEST_PCT}:")
+        for step in savings[:top]:
+            print(
+                f"  line {step.line:>3}: saves {step.saving / 1000:.2f} s"
+                f"  {describe(step)}"
+            )
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("missions", nargs="+", help="mission .py files")
+    parser.add_argument(
+        "--top", type=int, default=5, help="how many savings to show"
+    )
+    parser.add_argument(
+        "--robot", help="hub name of the robot in OldCode/motor_model.py"
+    )
+    args = parser.parse_args()
+
+    motors = None
+    if args.robot:
+        if args.robot not in MOTOR_MODELS:
+            known = ", ".join(MOTOR_MODELS) or "none yet"
+            raise SystemExit(f"No motor model for {args.robot} ({known})")
+        motors = MOTOR_MODELS[args.robot]
+
+    for path in args.missions:
+        if os.path.basename(path) in ("master_program.py", "base_robot.py"):
+            continue
+        report(path, args.top, motors)
+
+
+if __name__ == "__main__":
+    main()
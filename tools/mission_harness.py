@@ -0,0 +1,293 @@
+"""Runs the OldCode missions on the computer and checks what they do.
+
+Every mission's Run(br) is called with a fake BaseRobot that records
+each command with all of its arguments (defaults filled in from
+base_robot.py) and moves a simulated clock forward by the time
+tools/motion_model.py estimates for it. Commands started with
+waiting=False run in the background like on the robot, and a newer
+command to the same motor replaces the old one.
+
+The result is a trace per mission with the start and end time of every
+step and the simulated total. Traces are compared with the saved ones
+in tools/mission_traces/, so a change to a mission, to base_robot.py or
+to utils.py that changes what a mission does shows up as a diff. Use
+--update to save the current traces after checking the diff.
+
+Examples:
+
+    python tools/mission_harness.py
+    python tools/mission_harness.py OldCode/rock.py OldCode/Delivery2.py
+    python tools/mission_harness.py --update
+"""
+
+import argparse
+import ast
+import difflib
+import glob
+import importlib.util
+import os
+import sys
+import types
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import motion_model  # noqa: E402
+
+TRACE_DIR = os.path.join(os.path.dirname(__file__), "mission_traces")
+# Files in OldCode with a Run(br) that are not missions
+NOT_MISSIONS = ("master_program.py", "base_robot.py")
+
+
+class Sim:
+    """The simulated clock and what every motor is busy with."""
+
+    def __init__(self):
+        self.clock = 0.0
+        self.model = motion_model.MotionModel()
+        self.busy = {}
+        self.trace = []
+
+    def command(self, text, device, ms, waiting, guessed):
+        start = self.clock
+        if device is not None:
+            old = self.busy.get(device)
+            if old is not None and not old.done():
+                # A new command replaces what the motor was doing
+                old.until = self.clock
+                old.superseded = True
+        if device is None or waiting:
+            self.clock += ms
+            end = self.clock
+        else:
+            end = self.clock + ms
+        handle = FakeHandle(self, end)
+        if device is not None:
+            self.busy[device] = handle
+        self.trace.append((start, end, text + (" ?" if guessed else "")))
+        return handle
+
+    def total(self):
+        """The end of the last step, including background motions."""
+        ends = [h.until for h in self.busy.values()]
+        return max([self.clock] + ends)
+
+
+class FakeHandle:
+    """Same methods as MotionHandle in base_robot.py, on the sim clock."""
+
+    def __init__(self, sim, until):
+        self.sim = sim
+        self.until = until
+        self.superseded = False
+        self.cancelled = False
+
+    def done(self):
+        return (
+            self.superseded or self.cancelled or (self.sim.clock >= self.until)
+        )
+
+    def join(self, timeoutMillis=0):
+        if self.done():
+            return True
+        if timeoutMillis > 0 and self.sim.clock + timeoutMillis < self.until:
+            self.sim.clock += timeoutMillis
+            return False
+        self.sim.clock = self.until
+        return True
+
+    def cancel(self):
+        if not self.done():
+            self.until = self.sim.clock
+        self.cancelled = True
+
+
+class FakeDevice:
+    """br.hub, br.robot, br.colorSensor, ...: calls are recorded and take
+    no time. Reads return None, so missions that read sensors directly
+    can't be simulated."""
+
+    def __init__(self, sim, name):
+        self._sim = sim
+        self._name = name
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        return FakeDevice(self._sim, self._name + "." + attr)
+
+    def __call__(self, *args, **kwargs):
+        self._sim.command(
+            format_call(self._name, args, kwargs), None, 0, True, False
+        )
+
+
+class FakeBaseRobot:
+    """Has every public BaseRobot method, with the real signatures."""
+
+    def __init__(self, sim, signatures, ns):
+        self._sim = sim
+        self._signatures = signatures
+        self.sensorColors = [
+            ns["Color"].SENSOR_WHITE,
+            ns["Color"].SENSOR_RED,
+            ns["Color"].SENSOR_YELLOW,
+            ns["Color"].SENSOR_GREEN,
+            ns["Color"].SENSOR_BLUE,
+            ns["Color"].SENSOR_MAGENTA,
+            ns["Color"].SENSOR_ORANGE,
+            ns["Color"].SENSOR_DARKGRAY,
+            ns["Color"].SENSOR_NONE,
+            ns["Color"].SENSOR_LIME,
+        ]
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        signature = self._signatures.get(attr)
+        if signature is None:
+            return FakeDevice(self._sim, "br." + attr)
+
+        def call(*args, **kwargs):
+            # Fails like the robot would on a misspelled or missing argument
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            a = dict(bound.arguments)
+            device, ms, guessed = self._sim.model.step(attr, a)
+            text = format_call(attr, (), a)
+            return self._sim.command(
+                text, device, ms, a.get("waiting", True), guessed
+            )
+
+        return call
+
+
+def format_call(name, args, kwargs):
+    parts = [repr(a) for a in args]
+    parts += [f"{k}={v!r}" for k, v in kwargs.items()]
+    return name + "(" + ", ".join(parts) + ")"
+
+
+def fake_base_robot_module(sim):
+    """The module a mission gets instead of the real base_robot."""
+    ns, _ = motion_model.base_robot_namespace()
+    signatures = motion_model.load_signatures()
+    module = types.ModuleType("base_robot")
+    module.__dict__.update(ns)
+
+    def wait(time):
+        sim.command(f"wait({time!r})", None, time, True, False)
+
+    class StopWatch:
+        def __init__(self):
+            self.start = sim.clock
+
+        def time(self):
+            return int(sim.clock - self.start)
+
+        def reset(self):
+            self.start = sim.clock
+
+    def JoinAll(handles, timeoutMillis=0):
+        end = max([h.until for h in handles if not h.done()] or [sim.clock])
+        if timeoutMillis > 0 and end > sim.clock + timeoutMillis:
+            sim.clock += timeoutMillis
+            return False
+        sim.clock = max(sim.clock, end)
+        return True
+
+    module.wait = wait
+    module.StopWatch = StopWatch
+    module.JoinAll = JoinAll
+    module.MotionHandle = FakeHandle
+    module.BaseRobot = lambda: FakeBaseRobot(sim, signatures, ns)
+    return module
+
+
+def run_mission(path):
+    """Runs one mission. Returns (path, trace text or None, error)."""
+    sim = Sim()
+    sys.modules["base_robot"] = fake_base_robot_module(sim)
+    try:
+        name = "mission_" + os.path.splitext(os.path.basename(path))[0]
+        spec = importlib.util.spec_from_file_location(name, path)
+        mission = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mission)
+        mission.Run(sys.modules["base_robot"].BaseRobot())
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+    lines = [f"{s:8.0f} {e:8.0f}  {text}" for s, e, text in sim.trace]
+    lines.append(f"total {sim.total():.0f} ms")
+    return path, "\n".join(lines) + "\n", None
+
+
+def find_missions():
+    """The OldCode files that define Run(br)."""
+    missions = []
+    for path in sorted(glob.glob(os.path.join(motion_model.OLDCODE, "*.py"))):
+        if os.path.basename(path) in NOT_MISSIONS:
+            continue
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+        if any(
+            isinstance(n, ast.FunctionDef) and n.name == "Run"
+            for n in tree.body
+        ):
+            missions.append(path)
+    return missions
+
+
+def trace_path(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(TRACE_DIR, name + ".trace")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("missions", nargs="*", help="default: all missions")
+    parser.add_argument(
+        "--update", action="store_true", help="save the current traces"
+    )
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    paths = args.missions or find_missions()
+    os.makedirs(TRACE_DIR, exist_ok=True)
+    problems = 0
+    with Pool(min(args.jobs, len(paths))) as pool:
+        for path, trace, error in pool.imap(run_mission, paths):
+            name = os.path.basename(path)
+            if error:
+                print(f"CRASH    {name}: {error}")
+                problems += 1
+                continue
+            total = trace.splitlines()[-1].split()[1]
+            saved_path = trace_path(path)
+            saved = None
+            if os.path.exists(saved_path):
+                with open(saved_path, encoding="utf-8") as f:
+                    saved = f.read()
+            if args.update:
+                with open(saved_path, "w", encoding="utf-8") as f:
+                    f.write(trace)
+                print(f"saved    {name} ({int(total) / 1000:.1f} s)")
+            elif saved is None:
+                print(f"NEW      {name} ({int(total) / 1000:.1f} s)")
+                problems += 1
+            elif saved != trace:
+                print(f"CHANGED  {name} ({int(total) / 1000:.1f} s)")
+                sys.stdout.writelines(
+                    difflib.unified_diff(
+                        saved.splitlines(True),
+                        trace.splitlines(True),
+                        "saved",
+                        "now",
+                    )
+                )
+                problems += 1
+            else:
+                print(f"same     {name} ({int(total) / 1000:.1f} s)")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
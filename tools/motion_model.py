@@ -0,0 +1,351 @@
+"""Estimates how long BaseRobot commands take, without a robot.
+
+Shared by tools/mission_harness.py and tools/mission_duration.py. The
+speed and acceleration limits come from OldCode/utils.py and the
+defaults and signatures from OldCode/base_robot.py, so the estimates
+follow those files when they change.
+
+Drive base moves are modeled as trapezoid speed profiles: speed up with
+the acceleration, cruise, slow down with the same acceleration. The
+model follows what BaseRobot passes to DriveBase.settings():
+driveForDistance sets the straight speed and acceleration, turnInPlace
+the turn rate and acceleration, and curve the straight speed and the
+turn acceleration. The settings start out as in BaseRobot.__init__.
+
+A drive or curve that ends with then=Stop.NONE keeps the robot rolling,
+so the next drive or curve starts at speed and doesn't speed up again.
+
+With a robot's drive motor model from OldCode/motor_model.py (see
+tools/motor_sysid.py), the straight speed is also limited to what the
+slower motor reaches, and every drive base move that stops takes one
+time constant longer: the motors lag behind the speed profile by that
+much.
+"""
+
+import ast
+import inspect
+import math
+import os
+import sys
+
+OLDCODE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+OLDCODE = os.path.normpath(os.path.join(OLDCODE, "OldCode"))
+sys.path.insert(0, OLDCODE)
+import utils  # noqa: E402
+
+# Acceleration of the attachment motors, set in BaseRobot.__init__
+MED_MOT_ACCEL_DEGSEC2 = 20000
+# Time for a step the model can't know, like UntilStalled
+UNKNOWN_MS = 500
+# Extra time for the wallsquare back-up in driveForDistance
+WALLSQUARE_MS = 150
+
+DRIVE = "drive base"
+LEFT = "left attachment"
+RIGHT = "right attachment"
+
+
+class Name(str):
+    """A pybricks constant like Stop.BRAKE, shown by its name. Like the
+    pybricks enums, the other members can be reached from a member:
+    Stop.NONE.BRAKE is Stop.BRAKE."""
+
+    def __repr__(self):
+        return str(self)
+
+    def __getattr__(self, attr):
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return Name(self.split(".")[0] + "." + attr)
+
+
+class Names:
+    """Stands in for Stop, Color, Port, ...
+    Stop.BRAKE is Name("Stop.BRAKE")."""
+
+    def __init__(self, prefix):
+        self._prefix = prefix
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        return Name(self._prefix + "." + attr)
+
+    def __call__(self, *args, **kwargs):
+        parts = [repr(a) for a in args]
+        parts += [f"{k}={v!r}" for k, v in kwargs.items()]
+        return Name(self._prefix + "(" + ", ".join(parts) + ")")
+
+
+PYBRICKS_NAMES = (
+    "Port",
+    "Direction",
+    "Axis",
+    "Side",
+    "Stop",
+    "Color",
+    "Button",
+    "Icon",
+)
+
+
+def base_robot_namespace(path=None):
+    """Everything a mission gets from "from base_robot import *" that is
+    plain data: the utils.py constants, the DEFAULT_* constants from
+    base_robot.py and stand-ins for the pybricks constants."""
+    path = path or os.path.join(OLDCODE, "base_robot.py")
+    ns = {k: v for k, v in vars(utils).items() if not k.startswith("_")}
+    for name in PYBRICKS_NAMES:
+        ns[name] = Names(name)
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if (
+            isinstance(node, ast.Assign)
+            and len(node.targets) == 1
+            and isinstance(node.targets[0], ast.Name)
+        ):
+            try:
+                ns[node.targets[0].id] = ast.literal_eval(node.value)
+            except ValueError:
+                pass
+    return ns, tree
+
+
+def load_signatures(path=None):
+    """Returns {method name: inspect.Signature without self} for the
+    public BaseRobot methods, with the defaults from base_robot.py."""
+    ns, tree = base_robot_namespace(path)
+    signatures = {}
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == "BaseRobot":
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef) and not (
+                    item.name.startswith("_")
+                ):
+                    signatures[item.name] = _signature(item, ns)
+    return signatures
+
+
+def _signature(func, ns):
+    positional = func.args.args[1:]  # skip self
+    first_default = len(positional) - len(func.args.defaults)
+    params = []
+    for i, arg in enumerate(positional):
+        default = inspect.Parameter.empty
+        if i >= first_default:
+            node = ast.Expression(func.args.defaults[i - first_default])
+            default = eval(compile(node, "base_robot.py", "eval"), ns)
+        params.append(
+            inspect.Parameter(
+                arg.arg,
+                inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                default=default,
+            )
+        )
+    return inspect.Signature(params)
+
+
+def trapezoid_ms(distance, speed, accel, stop=True, moving=False):
+    """Time to move distance (mm or degrees) with a trapezoid profile
+    that starts from standing still. With stop=False the profile does
+    not slow down at the end (Stop.NONE), with moving=True it starts at
+    full speed (the command before ended with Stop.NONE)."""
+    distance = abs(distance)
+    if distance == 0:
+        return 0.0
+    if speed <= 0 or accel <= 0:
+        return math.inf
+    ramps = (1 if stop else 0) + (0 if moving else 1)
+    if ramps == 0:
+        return 1000 * distance / speed
+    ramp_distance = ramps * speed * speed / (2 * accel)
+    if distance >= ramp_distance:
+        seconds = (distance - ramp_distance) / speed + ramps * speed / accel
+    else:
+        # Never reaches full speed
+        peak = math.sqrt(2 * accel * distance / ramps)
+        seconds = ramps * peak / accel
+    return 1000 * seconds
+
+
+class MotionModel:
+    """Keeps track of the DriveBase settings, which stay in effect from
+    one command to the next, and estimates each command.
+
+    step(method, args) takes the fully bound arguments of one BaseRobot
+    call and returns (device, ms, guessed). device is DRIVE, LEFT, RIGHT
+    or None (no motor moves). guessed is True when the time is not
+    something the model can predict (waiting for a button or a stall).
+    """
+
+    def __init__(self, battery_mv=8200, motors=None):
+        ns, _ = base_robot_namespace()
+        self.max_straight = (
+            utils.DB_MAX_SPEED_MMSEC
+            * utils.AchievableSpeedPct(battery_mv)
+            // 100
+        )
+        self.settle_ms = 0.0
+        if motors is not None:
+            self.max_straight = min(
+                self.max_straight,
+                utils.MotorTopSpeedMmSec(motors, battery_mv),
+            )
+            self.settle_ms = max(motors["left"][0], motors["right"][0])
+        self.straight_speed = utils.RescaleStraightSpeed(
+            ns["DEFAULT_BIG_MOT_SPEED_PCT"]
+        )
+        self.straight_accel = utils.RescaleStraightAccel(
+            ns["DEFAULT_BIG_MOT_ACCEL_PCT"]
+        )
+        self.turn_rate = utils.RescaleTurnSpeed(ns["DEFAULT_TURN_SPEED_PCT"])
+        self.turn_accel = utils.RescaleTurnAccel(ns["DEFAULT_TURN_ACCEL_PCT"])
+        # The last drive or curve ended with Stop.NONE
+        self.rolling = False
+
+    def _limit(self, speed):
+        return min(abs(speed), self.max_straight)
+
+    def _arc_ms(self, length, angle, stop):
+        # The drive base runs the distance and the heading controllers
+        # together; the slower one decides
+        moving = self.rolling
+        return max(
+            trapezoid_ms(
+                length,
+                self._limit(self.straight_speed),
+                self.straight_accel,
+                stop,
+                moving,
+            ),
+            trapezoid_ms(angle, self.turn_rate, self.turn_accel, stop, moving),
+        )
+
+    def step(self, method, a):
+        handler = getattr(self, "_" + method, None)
+        if handler is None:
+            return None, 0.0, False
+        result = handler(a)
+        if result[0] == DRIVE:
+            self.rolling = (
+                method in ("driveForDistance", "curve", "driveArcDist")
+                and a["then"] == "Stop.NONE"
+            )
+            if a.get("then") != "Stop.NONE":
+                result = (DRIVE, result[1] + self.settle_ms, result[2])
+        return result
+
+    def _driveForDistance(self, a):
+        speed = self._limit(utils.RescaleStraightSpeed(a["speedPct"]))
+        acceleration = utils.RescaleStraightAccel(a["accelerationPct"])
+        self.straight_speed, self.straight_accel = speed, abs(acceleration)
+        ms = trapezoid_ms(
+            a["distance"],
+            self._limit(self.straight_speed),
+            self.straight_accel,
+            a["then"] != "Stop.NONE",
+            self.rolling,
+        )
+        if a["wallsquare"]:
+            ms += WALLSQUARE_MS
+        return DRIVE, ms, False
+
+    def _driveForMillis(self, a):
+        self.straight_accel = abs(
+            utils.RescaleStraightAccel(a["accelerationPct"])
+        )
+        return DRIVE, float(a["millis"]), False
+
+    def _turnInPlace(self, a):
+        speed = utils.RescaleTurnSpeed(a["speedPct"])
+        acceleration = utils.RescaleTurnAccel(a["accelerationPct"])
+        self.turn_rate, self.turn_accel = abs(speed), abs(acceleration)
+        ms = trapezoid_ms(
+            a["angle"],
+            self.turn_rate,
+            self.turn_accel,
+            a["then"] != "Stop.NONE",
+        )
+        return DRIVE, ms, False
+
+    def _curve(self, a):
+        speed = self._limit(utils.RescaleStraightSpeed(a["speedPct"]))
+        acceleration = utils.RescaleTurnAccel(a["accelerationPct"])
+        self.straight_speed, self.turn_accel = speed, abs(acceleration)
+        length = abs(a["radius"]) * abs(a["angle"]) * math.pi / 180
+        ms = self._arc_ms(length, a["angle"], a["then"] != "Stop.NONE")
+        return DRIVE, ms, False
+
+    def _driveArcDist(self, a):
+        self.straight_speed = self._limit(
+            utils.RescaleStraightSpeed(a["speedPct"])
+        )
+        self.straight_accel = abs(
+            utils.RescaleStraightAccel(a["accelerationPct"])
+        )
+        angle = 0.0
+        if a["radius"]:
+            angle = math.degrees(abs(a["dist"]) / abs(a["radius"]))
+        ms = self._arc_ms(a["dist"], angle, a["then"] != "Stop.NONE")
+        return DRIVE, ms, False
+
+    def _attachment_degrees(self, device, a):
+        speed = abs(utils.RescaleMedMotSpeed(a["speedPct"]))
+        return (
+            device,
+            trapezoid_ms(a["degrees"], speed, MED_MOT_ACCEL_DEGSEC2),
+            False,
+        )
+
+    def _moveLeftAttachmentMotorForDegrees(self, a):
+        return self._attachment_degrees(LEFT, a)
+
+    def _moveRightAttachmentMotorForDegrees(self, a):
+        return self._attachment_degrees(RIGHT, a)
+
+    def _moveLeftAttachmentMotorForMillis(self, a):
+        return LEFT, float(a["millis"]), False
+
+    def _moveRightAttachmentMotorForMillis(self, a):
+        return RIGHT, float(a["millis"]), False
+
+    def _moveLeftAttachmentMotorUntilStalled(self, a):
+        return LEFT, float(UNKNOWN_MS), True
+
+    def _moveRightAttachmentMotorUntilStalled(self, a):
+        return RIGHT, float(UNKNOWN_MS), True
+
+    def _waitForMillis(self, a):
+        return None, float(a["millis"]), False
+
+    def _waitForForwardButton(self, a):
+        return None, 0.0, True
+
+    def _waitForBackButton(self, a):
+        return None, 0.0, True
+
+
+def route_ms(steps, speedPct, chain=True):
+    """Time of a route made of ("turn", angle), ("drive", mm) and
+    ("curve", radius, angle) steps, like OldCode/field_routes.py runs
+    them. With chain=True drives and curves that follow each other use
+    Stop.NONE; with chain=False every step stops."""
+    model = MotionModel()
+    ms = 0.0
+    for i, step in enumerate(steps):
+        last = i == len(steps) - 1 or steps[i + 1][0] == "turn"
+        rolls = chain and not last and step[0] != "turn"
+        then = "Stop.NONE" if rolls else "Stop.BRAKE"
+        if step[0] == "turn":
+            args = {"angle": step[1], "speedPct": 45, "accelerationPct": 45}
+            ms += model.step("turnInPlace", dict(args, then=then))[1]
+        elif step[0] == "drive":
+            args = {"distance": step[1], "wallsquare": False}
+            args.update(speedPct=speedPct, accelerationPct=80, then=then)
+            ms += model.step("driveForDistance", args)[1]
+        else:
+            args = {"radius": step[1], "angle": step[2], "then": then}
+            args.update(speedPct=speedPct, accelerationPct=45)
+            ms += model.step("curve", args)[1]
+    return ms
@@ -0,0 +1,294 @@
+"""Fits a model of each drive motor from help/coach/motorSysId.py logs.
+
+The motors are modeled as first order: with p percent of power (dc)
+the speed moves towards gain * (p - deadband) deg/sec, and gets 63% of
+the way there in one time constant. Below the deadband the motor
+doesn't turn at all. Backlash is how far the motor turns after it
+changes direction before the wheel moves the robot.
+
+- The deadband is the power at which the wheel starts turning in the
+  ramp tests.
+- The backlash comes from the ramps that change direction: the motor
+  angle when the gyro first sees the robot pivot, minus the angle the
+  pivot itself needs.
+- The time constant and the gain are fitted to the step and chirp tests
+  by simulating the model and comparing it with the measured speed.
+
+It prints the model of both motors and how well it fits, and writes it
+for the robot (the hub name) to OldCode/motor_model.py, which BaseRobot
+and tools/motion_model.py use, and to model_motoare.py next to
+FLL_Program1.py. Other robots keep their values.
+
+Example:
+
+    pybricksdev run ble --name BOB help/coach/motorSysId.py > bob.log
+    python tools/motor_sysid.py bob.log
+"""
+
+import argparse
+import math
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+OLDCODE = os.path.join(ROOT, "OldCode")
+sys.path.insert(0, OLDCODE)
+from motor_model import MOTOR_MODELS  # noqa: E402
+
+MODEL_FILE = os.path.join(OLDCODE, "motor_model.py")
+MODELE_FILE = os.path.join(ROOT, "model_motoare.py")
+# The wheel counts as turning above this speed
+BREAKAWAY_DEG_SEC = 30
+# The robot counts as pivoting after the gyro moved this much
+PIVOT_DEG = 1.0
+TAU_MS = range(5, 305, 5)
+MOTORS = ("left", "right")
+
+
+def read_log(path):
+    """Returns (robot, tests). robot is (name, mV, wheel mm, axle mm),
+    tests is {test: [(ms, left pct, right pct, left deg, right deg,
+    heading)]}."""
+    robot = None
+    tests = {}
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            fields = line.strip().split(",")
+            if fields[0] != "SYSID":
+                continue
+            if fields[1] == "robot":
+                name, mv, wheel, axle = fields[2:]
+                robot = (name, int(mv), float(wheel), float(axle))
+                continue
+            t, lp, rp, la, ra, heading = (int(x) for x in fields[2:])
+            sample = (t, lp, rp, la, ra, heading / 10)
+            tests.setdefault(fields[1], []).append(sample)
+    return robot, tests
+
+
+def speeds(samples, motor):
+    """Speed (deg/sec) at every sample, from the angles around it."""
+    column = 3 + motor
+    result = []
+    for k in range(len(samples)):
+        before = samples[max(k - 1, 0)]
+        after = samples[min(k + 1, len(samples) - 1)]
+        ms = after[0] - before[0]
+        result.append(
+            1000 * (after[column] - before[column]) / ms if ms else 0
+        )
+    return result
+
+
+def segments(samples, motor):
+    """(first, last) sample index of every stretch of power in the same
+    direction."""
+    column = 1 + motor
+    result = []
+    start = None
+    for k, sample in enumerate(samples + [(0, 0, 0, 0, 0, 0)]):
+        sign = (sample[column] > 0) - (sample[column] < 0)
+        if start is not None and sign != start[1]:
+            result.append((start[0], k - 1, start[1]))
+            start = None
+        if start is None and sign:
+            start = (k, sign)
+    return result
+
+
+def deadband(samples, motor, tau_ms=0, gain=None):
+    """Average power at which the wheel starts turning in the ramps.
+    Without the gain, the power when the speed first goes above
+    BREAKAWAY_DEG_SEC. With the time constant and the gain, the speed
+    after that tells the deadband more exactly: it follows the power of
+    one time constant earlier, as gain * (power - deadband)."""
+    speed = speeds(samples, motor)
+    found = []
+    for first, last, _ in segments(samples, motor):
+        for k in range(first, last + 1):
+            if abs(speed[k]) <= BREAKAWAY_DEG_SEC:
+                continue
+            if not gain:
+                found.append(abs(samples[k][1 + motor]))
+                break
+            j = k
+            while j > first and samples[j][0] > samples[k][0] - tau_ms:
+                j -= 1
+            found.append(abs(samples[j][1 + motor]) - abs(speed[k]) / gain)
+    return sum(found) / len(found) if found else 0.0
+
+
+def backlash(samples, motor, wheel, axle):
+    """Average motor degrees lost when the ramps change direction."""
+    # Heading degrees per motor degree when one wheel pivots the robot
+    ratio = wheel / (2 * axle)
+    found = []
+    parts = segments(samples, motor)
+    for (_, _, before), (first, last, sign) in zip(parts, parts[1:]):
+        if sign == before:
+            continue
+        angle = samples[first][3 + motor]
+        heading = samples[first][5]
+        for k in range(first, last + 1):
+            if abs(samples[k][5] - heading) >= PIVOT_DEG:
+                turned = abs(samples[k][3 + motor] - angle)
+                found.append(max(0.0, turned - PIVOT_DEG / ratio))
+                break
+    return sum(found) / len(found) if found else 0.0
+
+
+def simulate(runs, tau_ms, dead):
+    """Model speed per unit of gain at every sample of the runs, each run
+    starting from standing still."""
+    result = []
+    for samples, motor in runs:
+        y = 0.0
+        for k, sample in enumerate(samples):
+            result.append(y)
+            pct = sample[1 + motor]
+            x = math.copysign(max(abs(pct) - dead, 0), pct)
+            if k + 1 < len(samples):
+                dt = samples[k + 1][0] - sample[0]
+                y += (1 - math.exp(-dt / tau_ms)) * (x - y)
+    return result
+
+
+def fit(runs, dead):
+    """Returns (time constant ms, gain, rms error deg/sec) with the least
+    error on the powered samples."""
+    measured = []
+    powered = []
+    for samples, motor in runs:
+        measured += speeds(samples, motor)
+        powered += [s[1 + motor] != 0 for s in samples]
+    best = None
+    for tau in TAU_MS:
+        model = simulate(runs, tau, dead)
+        pairs = [(y, w) for y, w, p in zip(model, measured, powered) if p]
+        yy = sum(y * y for y, _ in pairs)
+        if not yy:
+            continue
+        gain = sum(y * w for y, w in pairs) / yy
+        error = sum((w - gain * y) ** 2 for y, w in pairs) / len(pairs)
+        if best is None or error < best[2]:
+            best = (tau, gain, error)
+    if best is None:
+        raise SystemExit("No step or chirp samples with power")
+    return best[0], best[1], math.sqrt(best[2])
+
+
+def identify(robot, tests):
+    """Returns ({motor: (tau ms, gain, deadband, backlash)}, {motor: rms
+    error})."""
+    _, _, wheel, axle = robot
+    models = {}
+    errors = {}
+    for motor, name in enumerate(MOTORS):
+        ramp = tests.get("ramp_" + name, [])
+        slack = backlash(ramp, motor, wheel, axle)
+        runs = [(tests[t], motor) for t in ("steps", "chirp") if t in tests]
+        # The deadband and the fit depend on each other, so fit twice
+        dead = deadband(ramp, motor)
+        tau, gain, error = fit(runs, dead)
+        dead = deadband(ramp, motor, tau, gain)
+        tau, gain, error = fit(runs, dead)
+        models[name] = (tau, round(gain, 2), round(dead, 1), round(slack, 1))
+        errors[name] = error
+    return models, errors
+
+
+def print_models(robot, models, errors):
+    name, mv, _, _ = robot
+    print(f"\n{name} (test at {mv} mV)")
+    print(
+        f"{'':>7}{'time constant':>15}{'gain':>16}{'deadband':>10}"
+        f"{'backlash':>10}{'top speed':>11}{'fit error':>11}"
+    )
+    for motor in MOTORS:
+        tau, gain, dead, slack = models[motor]
+        top = gain * (100 - dead)
+        print(
+            f"{motor:>7}{tau:>12} ms{gain:>7.2f} deg/s/%{dead:>8.1f} %"
+            f"{slack:>6.1f} deg{top:>7.0f} d/s{errors[motor]:>7.0f} d/s"
+        )
+    ratio = models["right"][1] / models["left"][1]
+    print(f"right/left gain: {ratio:.3f}")
+
+
+def write_models(models):
+    lines = [
+        '# Made by tools/motor_sysid.py from the "SYSID,..." lines that',
+        "# help/coach/motorSysId.py prints. Don't edit by hand, run the",
+        "# test on the robot again instead.",
+        "#",
+        "# For every robot, by hub name: the battery voltage (mV) during the",
+        "# test, and for each drive motor (time constant ms, deg/sec per % of",
+        "# power, deadband % of power, backlash deg). BaseRobot and",
+        "# tools/motion_model.py use them, FLL_Program1.py uses the same",
+        "# values from model_motoare.py.",
+    ]
+    if not models:
+        lines.append("MOTOR_MODELS: dict = {}")
+    else:
+        lines.append("MOTOR_MODELS: dict = {")
+        for name, model in models.items():
+            lines.append(f'    "{name}": {{')
+            lines.append(f'        "mv": {model["mv"]},')
+            for motor in MOTORS:
+                lines.append(f'        "{motor}": {model[motor]},')
+            lines.append("    },")
+        lines.append("}")
+    with open(MODEL_FILE, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+    lines = [
+        "# " + "=" * 60,
+        "# model_motoare.py",
+        "# Generat de tools/motor_sysid.py, aceleași valori ca",
+        "# OldCode/motor_model.py. Nu modifica de mână: rulează din nou",
+        "# help/coach/motorSysId.py pe robot și apoi tools/motor_sysid.py.",
+        "# Pentru fiecare robot (numele hub-ului): tensiunea bateriei (mV) la",
+        "# test și, pentru fiecare motor de deplasare, (constanta de timp ms,",
+        "# grade/s la 1% putere, zona moartă % putere, joc în angrenaje grade).",
+        "# " + "=" * 60,
+        "",
+        "MODELE_MOTOARE = {",
+    ]
+    for name, model in models.items():
+        lines.append(f'    "{name}": {{')
+        lines.append(f'        "mv": {model["mv"]},')
+        lines.append(f'        "stanga": {model["left"]},')
+        lines.append(f'        "dreapta": {model["right"]},')
+        lines.append("    },")
+    lines.append("}")
+    with open(MODELE_FILE, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("logs", nargs="+", help="motorSysId.py logs")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only print the models, don't write them",
+    )
+    args = parser.parse_args()
+
+    models = dict(MOTOR_MODELS)
+    for path in args.logs:
+        robot, tests = read_log(path)
+        if robot is None:
+            print(f"{path}: no SYSID,robot line, is the log complete?")
+            continue
+        motors, errors = identify(robot, tests)
+        print_models(robot, motors, errors)
+        models[robot[0]] = dict(motors, mv=robot[1])
+    if not args.dry_run:
+        write_models(models)
+        print("\nWrote " + os.path.relpath(MODEL_FILE))
+        print("Wrote " + os.path.relpath(MODELE_FILE))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""Replays recorded robot runs through the controllers on the computer.
+
+Set INREGISTRARE = True in FLL_Program1.py and run it on the robot. Every
+sensor read (motor angles, IMU heading, stopwatch times, ...) and every
+motor command is printed as "REC,..." lines at the end. Save the output
+to a file, one file per run.
+
+This tool feeds the recorded reads back into the current PrecisionRobot
+code, collects the commands it gives, and compares them with the
+commands that were recorded. When a change to the controllers changes
+what the robot does, the report shows which command changed first and by
+how much. Runs are replayed in parallel, so a whole folder of recordings
+can be checked after every change.
+
+The hub calculates with single precision floats and the computer with
+double precision, so small differences are expected; --tolerance sets
+how big a difference still counts as the same.
+
+Examples:
+
+    pybricksdev run ble --name BOB FLL_Program1.py > recordings/square1.log
+    python tools/replay.py recordings/square1.log
+    python tools/replay.py recordings --jobs 8 --tolerance 1
+"""
+
+import argparse
+import ast
+import contextlib
+import io
+import os
+import sys
+from multiprocessing import Pool
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# Reads after the recording ran out before a replay counts as stuck
+MAX_OVERRUN = 1000
+
+
+class ReplayOverrun(Exception):
+    pass
+
+
+def parse_value(text):
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def parse_args(text):
+    """Turns "1;-2.5;wait=False" back into ((1, -2.5), {"wait": False})."""
+    args = []
+    kwargs = {}
+    if not text:
+        return (), kwargs
+    for part in text.split(";"):
+        key, sep, value = part.partition("=")
+        if sep and key.isidentifier():
+            kwargs[key] = parse_value(value)
+        else:
+            args.append(parse_value(part))
+    return tuple(args), kwargs
+
+
+def read_recording(path):
+    """Returns (notes, reads, commands). reads maps a channel name to its
+    values in order; commands is [(time ms, channel, args, kwargs)]."""
+    notes = {}
+    channels = {}
+    reads = {}
+    commands = []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line.startswith("REC,"):
+                continue
+            kind = line[4:].split(",", 1)[0]
+            if kind == "note":
+                _, _, key, value = line.split(",", 3)
+                notes[key] = parse_value(value)
+            elif kind == "ch":
+                _, _, index, name = line.split(",", 3)
+                channels[int(index)] = name
+            elif kind in ("r", "c"):
+                _, _, t, index, text = line.split(",", 4)
+                name = channels[int(index)]
+                if kind == "r":
+                    reads.setdefault(name, []).append(parse_value(text))
+                else:
+                    args, kwargs = parse_args(text)
+                    commands.append((int(t), name, args, kwargs))
+    return notes, reads, commands
+
+
+class Replay:
+    """Hands out the recorded reads in order and collects the commands."""
+
+    def __init__(self, reads):
+        self.reads = reads
+        self.next = {name: 0 for name in reads}
+        self.commands = []
+        self.overrun = 0
+
+    def call(self, name, args, kwargs):
+        if name not in self.reads:
+            self.commands.append((name, args, kwargs))
+            return None
+        values = self.reads[name]
+        i = self.next[name]
+        if i >= len(values):
+            # The new code reads more than the old code did
+            self.overrun += 1
+            if self.overrun > MAX_OVERRUN:
+                raise ReplayOverrun(f"ran past the recording at {name}")
+            return values[-1]
+        self.next[name] = i + 1
+        return values[i]
+
+
+class FakeDevice:
+    """Stands in for a motor, the hub, hub.imu, a stopwatch or wait().
+    Calling it replays a read or records a command; attributes are
+    nested devices named like the recorder names them."""
+
+    def __init__(self, replay, name):
+        self._replay = replay
+        self._name = name
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        return FakeDevice(self._replay, self._name + "." + attr)
+
+    def __call__(self, *args, **kwargs):
+        return self._replay.call(self._name, args, kwargs)
+
+
+def fake_class(replay, names):
+    """Same naming as Recorder.device_class on the hub."""
+    created = [0]
+
+    def create(*args, **kwargs):
+        i = min(created[0], len(names) - 1)
+        created[0] += 1
+        return FakeDevice(replay, names[i])
+
+    return create
+
+
+def run_fll_program1(replay, notes):
+    sys.path.insert(0, ROOT)
+    import FLL_Program1 as program
+
+    wheel_mm, axle_mm = notes["robot"]
+    robot = program.PrecisionRobot(
+        hub=FakeDevice(replay, "hub"),
+        left_motor_port=program.Port.C,
+        right_motor_port=program.Port.F,
+        wheel_diameter_mm=wheel_mm,
+        axle_track_mm=axle_mm,
+        fabrica_motor=fake_class(replay, ("motor_stanga", "motor_dreapta")),
+        fabrica_ceas=fake_class(replay, ("ceas",)),
+        asteapta=FakeDevice(replay, "wait"),
+    )
+    if notes.get("bias_giro"):
+        robot.estimeaza_bias_giro()
+    robot.executa_traseu(notes["traseu"])
+
+
+def numbers_differ(a, b, tolerance):
+    """Largest difference between two argument lists, or None if they
+    can't be compared (different length or non-numbers that differ)."""
+    if len(a) != len(b):
+        return None
+    worst = 0.0
+    for x, y in zip(a, b):
+        if isinstance(x, (int, float)) and isinstance(y, (int, float)):
+            worst = max(worst, abs(x - y))
+        elif x != y:
+            return None
+    return worst
+
+
+def compare(recorded, replayed, tolerance):
+    """Compares the commands per channel. Returns a list of problems."""
+    problems = []
+    rec_by_channel = {}
+    for t, name, args, kwargs in recorded:
+        rec_by_channel.setdefault(name, []).append(
+            (t, args + tuple(sorted(kwargs.items())))
+        )
+    rep_by_channel = {}
+    for name, args, kwargs in replayed:
+        rep_by_channel.setdefault(name, []).append(
+            args + tuple(sorted(kwargs.items()))
+        )
+    for name in sorted(set(rec_by_channel) | set(rep_by_channel)):
+        old = rec_by_channel.get(name, [])
+        new = rep_by_channel.get(name, [])
+        worst = 0.0
+        first = None
+        for i in range(min(len(old), len(new))):
+            diff = numbers_differ(old[i][1], new[i], tolerance)
+            if diff is None or diff > tolerance:
+                if first is None:
+                    first = (i, old[i][0], old[i][1], new[i])
+                if diff is None:
+                    diff = float("inf")
+            worst = max(worst, diff)
+        if len(old) != len(new):
+            problems.append(
+                f"{name}: {len(old)} commands recorded, {len(new)} replayed"
+            )
+        if first is not None:
+            i, t, a, b = first
+            problems.append(
+                f"{name}: first difference at command {i} ({t} ms): "
+                f"{a} -> {b}, largest difference {worst:g}"
+            )
+    return problems
+
+
+def replay_file(job):
+    """Replays one recording. Returns (path, ok, lines)."""
+    path, tolerance = job
+    notes, reads, recorded = read_recording(path)
+    if "traseu" not in notes:
+        return path, False, ["no REC lines, was INREGISTRARE = True?"]
+    if notes.get("pierdute"):
+        # The end of the run is missing, so it can't be replayed
+        return (
+            path,
+            False,
+            [
+                f"the recorder buffer was full, the last {notes['pierdute']}"
+                " events are missing (see REC_SIZE in recorder.py)"
+            ],
+        )
+    replay = Replay(reads)
+    lines = []
+    try:
+        # The controllers print a lot; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_fll_program1(replay, notes)
+    except ReplayOverrun as e:
+        lines.append(str(e))
+    lines += compare(recorded, replay.commands, tolerance)
+    unread = sum(len(v) - replay.next[k] for k, v in reads.items())
+    if unread:
+        lines.append(f"{unread} recorded reads were never used")
+    return path, not lines, lines
+
+
+def find_recordings(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, _, names in os.walk(path):
+                files += [
+                    os.path.join(folder, n)
+                    for n in sorted(names)
+                    if n.endswith(".log")
+                ]
+        else:
+            files.append(path)
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="recordings or folders")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    files = find_recordings(args.paths)
+    if not files:
+        raise SystemExit("No recordings found")
+    jobs = [(f, args.tolerance) for f in files]
+    failed = 0
+    with Pool(min(args.jobs, len(files))) as pool:
+        for path, ok, lines in pool.imap(replay_file, jobs):
+            print(("same  " if ok else "DIFF  ") + path)
+            for line in lines:
+                print("      " + line)
+            failed += not ok
+    print(f"\n{len(files) - failed} of {len(files)} runs replay the same")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
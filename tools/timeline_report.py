@@ -0,0 +1,122 @@
+"""Shows where the time goes in a mission run.
+
+Reads the "TL,..." lines that OldCode/profiler.py prints when PROFILE is
+True in master_program.py. For every mission it prints how much of the
+mission time was spent in BaseRobot commands and how much in between
+them (mission code, waiting for a person, ...), the time per command,
+and the slowest single steps.
+
+Example:
+
+    pybricksdev run ble --name BOB OldCode/master_program.py > run1.log
+    python tools/timeline_report.py run1.log
+    python tools/timeline_report.py run1.log run2.log --top 20
+"""
+
+import argparse
+
+
+def read_timelines(paths):
+    """Returns [(mission, total ms, dropped, [call])] in the order the
+    missions ran. A call is (method, start ms, end ms, depth, args)."""
+    missions = []
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if not line.startswith("TL,"):
+                    continue
+                fields = line.split(",", 6)
+                if fields[1] == "mission":
+                    missions.append(
+                        (fields[2], int(fields[3]), int(fields[4]), [])
+                    )
+                elif fields[1] == "call" and missions:
+                    missions[-1][3].append(
+                        (
+                            fields[2],
+                            int(fields[3]),
+                            int(fields[4]),
+                            int(fields[5]),
+                            fields[6] if len(fields) > 6 else "",
+                        )
+                    )
+    return missions
+
+
+def idle_gaps(calls, total):
+    """Returns [(start ms, length ms, method after the gap)] for the time
+    between top level calls, including before the first and after the
+    last call."""
+    gaps = []
+    t = 0
+    for method, start, end, depth, _ in calls:
+        if depth > 0:
+            continue
+        if start > t:
+            gaps.append((t, start - t, method))
+        t = max(t, end)
+    if total > t:
+        gaps.append((t, total - t, "the end of the mission"))
+    return gaps
+
+
+def report_mission(name, total, dropped, calls, top):
+    busy = sum(end - start for _, start, end, depth, _ in calls if depth == 0)
+    gaps = idle_gaps(calls, total)
+    idle = sum(g[1] for g in gaps)
+    print(f"== {name}: {total / 1000:.2f} s, {len(calls)} commands")
+    if dropped:
+        print(f"   {dropped} commands did not fit in PROFILE_SIZE")
+    if total:
+        print(
+            f"   commands {busy / 1000:.2f} s ({100 * busy / total:.0f}%),"
+            f" between commands {idle / 1000:.2f} s"
+            f" ({100 * idle / total:.0f}%)"
+        )
+
+    per_method = {}
+    for method, start, end, depth, _ in calls:
+        if depth == 0:
+            count, ms = per_method.get(method, (0, 0))
+            per_method[method] = (count + 1, ms + end - start)
+    print(f"   {'command':<40}{'calls':>6}{'total s':>10}{'share':>8}")
+    for method, (count, ms) in sorted(
+        per_method.items(), key=lambda kv: -kv[1][1]
+    ):
+        share = 100 * ms / total if total else 0
+        print(f"   {method:<40}{count:>6}{ms / 1000:>10.2f}{share:>7.0f}%")
+
+    print("   slowest steps:")
+    steps = [
+        (end - start, start, f"{method}({args})")
+        for method, start, end, depth, args in calls
+    ]
+    steps += [(ms, start, f"idle before {m}") for start, ms, m in gaps]
+    for ms, start, text in sorted(steps, reverse=True)[:top]:
+        print(f"   {ms:>7} ms at {start / 1000:>6.2f} s  {text}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("logs", nargs="+", help="saved master_program output")
+    parser.add_argument(
+        "--top", type=int, default=10, help="how many slow steps to list"
+    )
+    args = parser.parse_args()
+
+    missions = read_timelines(args.logs)
+    if not missions:
+        raise SystemExit("No TL lines found. Was PROFILE = True?")
+
+    run_total = 0
+    for name, total, dropped, calls in missions:
+        report_mission(name, total, dropped, calls, args.top)
+        run_total += total
+    print(f"\nAll missions: {run_total / 1000:.2f} s of the 150 s match")
+    for name, total, _, _ in missions:
+        print(f"   {name:<20}{total / 1000:>8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
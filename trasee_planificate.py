@@ -0,0 +1,83 @@
+# ============================================================
+# trasee_planificate.py
+# Generat de tools/field_planner.py din tools/field_map.py, nu
+# modifica de mână: schimbă harta sau traseele și rulează din nou.
+# Pentru PrecisionRobot.executa_traseu, de ex.:
+#     robot.executa_traseu(TRASEE["home_left_to_forge"])
+# ============================================================
+
+TRASEE = {
+    "home_left_to_forge": [  # 8.7 s
+        ('turn', -25, 300),
+        ('drive', 26.4, 600),
+        ('turn', -20, 300),
+        ('drive', 14.1, 600),
+        ('turn', -44, 300),
+        ('drive', 67.5, 600),
+        ('turn', 89, 300),
+    ],
+    "forge_to_home_left": [  # 9.5 s
+        ('turn', 92, 300),
+        ('drive', 69.6, 600),
+        ('turn', 43, 300),
+        ('drive', 25.5, 600),
+        ('turn', 41, 300),
+        ('drive', 14.0, 600),
+        ('turn', -176, 300),
+    ],
+    "home_left_to_mineshaft": [  # 7.4 s
+        ('turn', -25, 300),
+        ('drive', 26.4, 600),
+        ('turn', -20, 300),
+        ('drive', 19.8, 600),
+        ('turn', -48, 300),
+        ('drive', 18.5, 600),
+        ('turn', 93, 300),
+    ],
+    "home_right_to_silo": [  # 8.3 s
+        ('turn', 44, 300),
+        ('drive', 61.5, 600),
+        ('turn', -44, 300),
+        ('drive', 20.0, 600),
+        ('turn', -49, 300),
+        ('drive', 13.8, 600),
+        ('turn', 49, 300),
+    ],
+    "silo_to_home_right": [  # 9.0 s
+        ('turn', 145, 300),
+        ('drive', 18.3, 600),
+        ('turn', 35, 300),
+        ('drive', 14.0, 600),
+        ('turn', 44, 300),
+        ('drive', 61.5, 600),
+        ('turn', 136, 300),
+    ],
+    "home_right_to_statue": [  # 3.5 s
+        ('turn', 13, 300),
+        ('drive', 35.4, 600),
+        ('turn', -103, 300),
+    ],
+    "home_right_to_heavy_lifting": [  # 4.8 s
+        ('turn', 54, 300),
+        ('drive', 79.8, 600),
+        ('turn', -54, 300),
+    ],
+    "home_left_to_salvage": [  # 9.6 s
+        ('turn', -25, 300),
+        ('drive', 26.4, 600),
+        ('turn', -20, 300),
+        ('drive', 11.3, 600),
+        ('turn', -47, 300),
+        ('drive', 54.0, 600),
+        ('turn', -61, 300),
+        ('drive', 3.4, 600),
+        ('turn', -27, 300),
+    ],
+    "home_right_to_tip_the_scales": [  # 6.4 s
+        ('turn', 55, 300),
+        ('drive', 62.4, 600),
+        ('turn', 39, 300),
+        ('drive', 14.5, 600),
+        ('turn', 86, 300),
+    ],
+}